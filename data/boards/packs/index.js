@@ -0,0 +1,13 @@
+// Generated by scripts/build_level_packs.py, do not edit.
+// Each loader parses its pack only when called.
+import manifest from './manifest.json';
+
+export { manifest };
+
+export const packLoaders = {
+  'levels_01-10.json': () => require('./levels_01-10.json'),
+  'levels_11-20.json': () => require('./levels_11-20.json'),
+  'levels_21-30.json': () => require('./levels_21-30.json'),
+  'levels_31-40.json': () => require('./levels_31-40.json'),
+  'levels_41-50.json': () => require('./levels_41-50.json'),
+};
@@ -5,15 +5,20 @@ This counts the number of '0' characters in the puzzle string for each row.
 
 Run this script from the project root:
     py scripts/add_empty_cell_count.py
+    py scripts/add_empty_cell_count.py --workers 8
 """
 
+import argparse
 import csv
 from pathlib import Path
 
+from instrumentation import instrumented
+from shard_io import open_shard
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
-NUM_FILES = 20
 
 
 def count_zeros(puzzle_string):
@@ -31,10 +36,15 @@ def process_file(file_path):
     
     # Read all rows and process them
     rows = []
-    with open(file_path, 'r', encoding='utf-8') as infile:
+    with open_shard(file_path) as infile:
         reader = csv.reader(infile)
         header = next(reader)
         
+        # Re-running on a finished shard must not append a second column
+        if 'empty cell count' in header:
+            print("  'empty cell count' column already present, skipping...")
+            return 0
+        
         # Add new column to header
         new_header = header + ['empty cell count']
         rows.append(new_header)
@@ -50,33 +60,35 @@ def process_file(file_path):
                 rows_processed += 1
     
     # Write back to the same file
-    with open(file_path, 'w', encoding='utf-8', newline='') as outfile:
+    with open_shard(file_path, 'w', newline='') as outfile:
         writer = csv.writer(outfile)
         writer.writerows(rows)
     
     print(f"  Processed {rows_processed:,} rows")
     print(f"  Completed {file_path.name}")
+    return rows_processed
 
 
-def main():
-    """Process all 20 CSV files."""
-    print(f"Adding 'empty cell count' column to {NUM_FILES} CSV files...")
+@instrumented
+def main(workers=1):
+    """Process every CSV shard."""
+    paths = shard_paths(INPUT_DIR)
+    print(f"Adding 'empty cell count' column to {len(paths)} CSV files...")
     print(f"Directory: {INPUT_DIR}\n")
     
-    for file_num in range(1, NUM_FILES + 1):
-        file_path = INPUT_DIR / f"sudoku_{file_num}.csv"
-        if file_path.exists():
-            process_file(file_path)
-        else:
-            print(f"Warning: {file_path.name} not found, skipping...")
+    rows_per_shard = map_shards(process_file, paths, workers)
     
-    print(f"\nSuccessfully processed all files")
+    print(f"\nSuccessfully processed all files ({sum(rows_per_shard):,} rows)")
     print(f"Output directory: {INPUT_DIR}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_workers_argument(parser)
+    args = parser.parse_args()
+    
     if not INPUT_DIR.exists():
         print(f"Error: {INPUT_DIR} not found!")
         exit(1)
     
-    main()
+    main(args.workers)
@@ -0,0 +1,310 @@
+"""
+Script to benchmark every stage of the data pipeline on a synthetic dataset.
+
+A throwaway project tree is set up under kaggle_sudokus/benchmark_work/
+(a copy of scripts/, a synthetic kaggle_sudokus/sudoku.csv from
+synthetic_dataset.py and an empty data/boards/), and the stage scripts are
+run there one after another, each in its own process:
+
+    split       split_sudoku_csv.py
+    empty       add_empty_cell_count.py
+    difficulty  add_difficulty_column.py
+    dedupe      dedupe_canonical.py
+    extract     extract_boards_from_csv.py
+    reformat    reformat_boards.py
+    combine     combine_boards.py
+
+For every stage the wall time, rows/s, MB/s (of the files the stage reads)
+and peak RSS of the stage process are recorded. Peak RSS is measured inside
+the stage process by STAGE_LAUNCHER, so it is the stage's own memory and not
+what it inherited from this process. It needs psutil on Windows and does not
+include --workers child processes. The results are saved as JSON in
+kaggle_sudokus/benchmarks/, and --compare checks them against an earlier
+results file, exiting with status 1 if a stage got slower than --tolerance
+allows.
+
+--codecs runs the whole pipeline once per shard codec and level (see
+shard_io.py), e.g. csv gz:1 gz:6 xz:0, with SUDOKU_SHARD_CODEC and
+SUDOKU_SHARD_LEVEL set for every stage. It reports the shard size and the
+time of every stage per codec, to pick the codec and level where less I/O
+outweighs the extra CPU.
+
+Run this script from the project root:
+    py scripts/benchmark_pipeline.py --rows 10000
+    py scripts/benchmark_pipeline.py --rows 1000000 --workers 8 --skip dedupe
+    py scripts/benchmark_pipeline.py --rows 1000000 --compare kaggle_sudokus/benchmarks/baseline.json
+    py scripts/benchmark_pipeline.py --rows 1000000 --workers 8 --codecs csv gz:1 gz:6 xz:0
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from instrumentation import instrumented
+from shard_io import CODECS, SHARD_CODEC_VAR, SHARD_LEVEL_VAR, find_shard_files, parse_level
+from synthetic_dataset import write_dataset
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+WORK_DIR = PROJECT_ROOT / "kaggle_sudokus" / "benchmark_work"
+RESULTS_DIR = PROJECT_ROOT / "kaggle_sudokus" / "benchmarks"
+
+# (stage, script, takes --workers, what it reads)
+STAGES = [
+    ("split", "split_sudoku_csv.py", False, "source"),
+    ("empty", "add_empty_cell_count.py", True, "shards"),
+    ("difficulty", "add_difficulty_column.py", True, "shards"),
+    ("dedupe", "dedupe_canonical.py", True, "shards"),
+    ("extract", "extract_boards_from_csv.py", True, "shards"),
+    ("reformat", "reformat_boards.py", False, "boards"),
+    ("combine", "combine_boards.py", False, "boards"),
+]
+STAGE_ARGS = {"extract": ["--seed", "0"]}
+DEFAULT_TOLERANCE = 0.2
+
+# Runs a stage script (argv[2:]) and writes the peak RSS of this process to
+# argv[1] when it exits. ru_maxrss from os.wait4 can't be used from outside:
+# on Linux it also counts the parent's memory the child was forked from. So
+# Linux reads VmHWM, the high-water mark of the process's own address space;
+# macOS has no such inheritance and uses ru_maxrss, Windows psutil.
+STAGE_LAUNCHER = """
+import os, runpy, sys
+rss_file = sys.argv[1]
+sys.argv = sys.argv[2:]
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+finally:
+    peak = ""
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+    elif sys.platform == "darwin":
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    else:
+        try:
+            import psutil
+            peak = psutil.Process().memory_info().peak_wset
+        except (ImportError, AttributeError):
+            pass
+    with open(rss_file, "w") as f:
+        f.write(str(peak))
+"""
+
+
+def setup_work_dir(work_dir, rows, seed):
+    """Create the throwaway project tree with a synthetic sudoku.csv."""
+    if work_dir.exists():
+        shutil.rmtree(work_dir)
+    shutil.copytree(SCRIPTS_DIR, work_dir / "scripts", ignore=shutil.ignore_patterns('__pycache__'))
+    (work_dir / "data" / "boards").mkdir(parents=True)
+    write_dataset(work_dir / "kaggle_sudokus" / "sudoku.csv", rows, seed)
+
+
+def input_files(work_dir, reads):
+    """Return the files a stage reads, so its MB/s can be computed."""
+    if reads == "source":
+        return [work_dir / "kaggle_sudokus" / "sudoku.csv"]
+    if reads == "shards":
+        return find_shard_files(work_dir / "kaggle_sudokus")
+    return sorted((work_dir / "data" / "boards").glob("board*.json"))
+
+
+def run_measured(command, cwd, env=None):
+    """
+    Run a Python script command and return (exit code, seconds, peak RSS in bytes or None).
+
+    command is [python, script, args...]; the script runs under STAGE_LAUNCHER,
+    which reports the peak RSS of the stage process itself.
+    """
+    rss_file = Path(cwd) / ".stage_peak_rss"
+    rss_file.unlink(missing_ok=True)
+    start = time.perf_counter()
+    returncode = subprocess.call([command[0], "-c", STAGE_LAUNCHER, str(rss_file)] + command[1:],
+                                 cwd=cwd, env=env, stdout=subprocess.DEVNULL)
+    seconds = time.perf_counter() - start
+    peak_rss = None
+    if rss_file.exists():
+        text = rss_file.read_text().strip()
+        peak_rss = int(text) if text else None
+        rss_file.unlink()
+    return returncode, seconds, peak_rss
+
+
+def run_stage(work_dir, stage, script, takes_workers, reads, rows, workers, env=None):
+    """Run one stage in the work tree and return its measurements."""
+    files = input_files(work_dir, reads)
+    total_bytes = sum(path.stat().st_size for path in files)
+    stage_rows = rows if reads != "boards" else len(files)
+
+    command = [sys.executable, str(Path("scripts") / script)] + STAGE_ARGS.get(stage, [])
+    if takes_workers:
+        command += ["--workers", str(workers)]
+    print(f"Running {stage} ({script})...")
+    returncode, seconds, peak_rss = run_measured(command, work_dir, env)
+    if returncode != 0:
+        raise RuntimeError(f"{script} exited with status {returncode}")
+
+    result = {
+        "script": script,
+        "seconds": round(seconds, 4),
+        "rows": stage_rows,
+        "bytes": total_bytes,
+        "rows_per_s": round(stage_rows / seconds, 1),
+        "mb_per_s": round(total_bytes / (1024**2) / seconds, 3),
+        "peak_rss_mb": round(peak_rss / (1024**2), 1) if peak_rss is not None else None,
+    }
+    rss = f"{result['peak_rss_mb']:,.1f} MB" if peak_rss is not None else "n/a"
+    print(f"  {seconds:.2f}s, {result['rows_per_s']:,.0f} rows/s, "
+          f"{result['mb_per_s']:,.2f} MB/s, peak RSS {rss}")
+    return result
+
+
+def parse_codec(spec):
+    """Turn a --codecs entry like gz:6 into (codec, level)."""
+    codec, _, level = spec.partition(':')
+    if codec not in CODECS:
+        raise ValueError(f"unknown codec {codec!r} in {spec!r} (use {', '.join(CODECS)})")
+    return codec, parse_level(codec, level)
+
+
+def run_pipeline_stages(args, env=None):
+    """Set up the work tree and run every stage not skipped. Returns {stage: result}."""
+    setup_work_dir(WORK_DIR, args.rows, args.seed)
+    stages = {}
+    for stage, script, takes_workers, reads in STAGES:
+        if stage not in args.skip:
+            stages[stage] = run_stage(WORK_DIR, stage, script, takes_workers, reads,
+                                      args.rows, args.workers, env)
+    return stages
+
+
+def run_codecs(args, codecs):
+    """Run the stages once per (codec, level). Returns {label: result}."""
+    results = {}
+    for codec, level in codecs:
+        label = codec if level is None else f"{codec}:{level}"
+        print(f"\n=== Shards as {label} ===")
+        env = dict(os.environ, **{SHARD_CODEC_VAR: codec, SHARD_LEVEL_VAR: str(level or "")})
+        stages = run_pipeline_stages(args, env)
+        results[label] = {
+            "codec": codec,
+            "level": level,
+            "shard_bytes": sum(path.stat().st_size for path in input_files(WORK_DIR, "shards")),
+            "seconds": round(sum(result["seconds"] for result in stages.values()), 4),
+            "stages": stages,
+        }
+    return results
+
+
+def print_codec_table(results):
+    """Print shard size and stage times side by side for every codec."""
+    first = next(iter(results.values()))
+    stages = list(first["stages"])
+    print(f"\n{'codec':<8} {'shard MB':>9} {'ratio':>6} "
+          + " ".join(f"{stage:>10}" for stage in stages) + f" {'total s':>9}")
+    for label, result in results.items():
+        ratio = result["shard_bytes"] / first["shard_bytes"] if first["shard_bytes"] else 0
+        times = " ".join(f"{result['stages'][stage]['seconds']:>10.2f}" for stage in stages)
+        print(f"{label:<8} {result['shard_bytes'] / (1024**2):>9.1f} {ratio:>6.2f} {times} "
+              f"{result['seconds']:>9.2f}")
+
+
+def compare(results, baseline_file, tolerance):
+    """Print rows/s against a baseline run. Returns the stages that regressed."""
+    with open(baseline_file, 'r', encoding='utf-8') as infile:
+        baseline = json.load(infile)
+    if baseline["rows"] != results["rows"]:
+        print(f"\nWarning: baseline used {baseline['rows']:,} rows, this run {results['rows']:,}")
+
+    print(f"\nCompared with {baseline_file}:")
+    regressions = []
+    for stage, result in results["stages"].items():
+        before = baseline["stages"].get(stage)
+        if not before:
+            continue
+        change = result["rows_per_s"] / before["rows_per_s"] - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(stage)
+            flag = "  <-- regression"
+        print(f"  {stage:<11} {before['rows_per_s']:>12,.0f} -> {result['rows_per_s']:>12,.0f} rows/s "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+@instrumented
+def main():
+    """Generate the dataset, benchmark the stages and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help="synthetic rows to benchmark on (default: 10000)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the synthetic dataset (default: 0)")
+    parser.add_argument('--skip', nargs='+', default=[], choices=[stage[0] for stage in STAGES],
+                        help="stages to leave out, e.g. dedupe on large datasets")
+    parser.add_argument('--workers', type=int, default=1, help="--workers for the stages that take it")
+    parser.add_argument('--output', type=Path, help="results file (default: a timestamped file in benchmarks/)")
+    parser.add_argument('--compare', type=Path, metavar='BASELINE', help="results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed rows/s slowdown for --compare (default: 0.2 = 20%%)")
+    parser.add_argument('--codecs', nargs='+', metavar='CODEC[:LEVEL]',
+                        help="run the pipeline once per shard codec and level, e.g. csv gz:1 gz:6 xz:0")
+    parser.add_argument('--keep', action='store_true', help="keep the work tree afterwards")
+    args = parser.parse_args()
+
+    if args.compare and not args.compare.exists():
+        print(f"Error: {args.compare} not found!")
+        exit(1)
+    if args.compare and args.codecs:
+        print("Error: --compare and --codecs cannot be combined")
+        exit(1)
+    try:
+        codecs = [parse_codec(spec) for spec in args.codecs or []]
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    results = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "rows": args.rows,
+        "seed": args.seed,
+        "workers": args.workers,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    try:
+        if codecs:
+            results["codecs"] = run_codecs(args, codecs)
+        else:
+            results["stages"] = run_pipeline_stages(args)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+    finally:
+        if not args.keep:
+            shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    output_file = args.output or RESULTS_DIR / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as outfile:
+        json.dump(results, outfile, indent=2)
+    if codecs:
+        print_codec_table(results["codecs"])
+    print(f"\nResults written to {output_file}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
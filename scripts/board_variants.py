@@ -0,0 +1,194 @@
+"""
+Script to expand the base boards into symmetry variants.
+
+A variant is a base board plus a seed: sudoku_symmetry.transform_board
+relabels the digits, shuffles bands, rows, stacks and columns and maybe
+transposes, following a spec the app implements too
+(src/game/sudoku/transform.js). So only the base boards and the seeds have
+to ship, not the variants themselves.
+
+By default the script writes data/boards/variants.json, the seed manifest:
+
+    {"prng": "mulberry32", "seed": 0, "variants": {"1": [seed, ...], ...}}
+
+with --variants seeds per base board, keyed by board Id. Seeds that would
+repeat the base board or another variant of it are skipped.
+
+With --expand N every base board is expanded N times in one vectorized
+batch (NumPy, or the pure-Python path with --engine python), every variant
+is checked to be a valid board, and the throughput is reported. --output
+also writes the variants as a puzzle,solution CSV, for testing the
+pipeline on millions of rows.
+
+Run this script from the project root:
+    py scripts/board_variants.py
+    py scripts/board_variants.py --variants 1000 --seed 7
+    py scripts/board_variants.py --expand 25000 --output kaggle_sudokus/variants.csv
+"""
+
+import argparse
+import json
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from build_shards import atomic_open
+from combine_boards import grid_to_digits, load_corpus
+from instrumentation import instrumented
+from shard_engine import get_analyzer, numpy_available
+from sudoku_symmetry import Mulberry32, expand_batch, transform_board
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+BOARDS_DIR = PROJECT_ROOT / "data" / "boards"
+MANIFEST_FILE = BOARDS_DIR / "variants.json"
+VARIANTS_PER_BOARD = 100
+BATCH_ROWS = 1 << 16
+
+
+def load_base_boards():
+    """Return [(Id, puzzle, solution)] of the boards from combine_boards.load_corpus."""
+    boards = load_corpus(BOARDS_DIR)
+    return [(board["Id"], grid_to_digits(board["puzzle"]), grid_to_digits(board["solution"]))
+            for board in boards]
+
+
+def variant_seeds(puzzle, solution, count, rng):
+    """Draw count seeds from rng whose variants of the board are all distinct."""
+    seen = {puzzle}
+    seeds = []
+    while len(seeds) < count:
+        seed = rng.next()
+        variant = transform_board(puzzle, solution, seed)[0]
+        if variant not in seen:
+            seen.add(variant)
+            seeds.append(seed)
+    return seeds
+
+
+def write_manifest(base_boards, count, seed, output_file):
+    """Write the seed manifest for count variants per base board."""
+    rng = Mulberry32(seed)
+    manifest = {
+        "prng": "mulberry32",
+        "seed": seed,
+        "variants": {str(board_id): variant_seeds(puzzle, solution, count, rng)
+                     for board_id, puzzle, solution in base_boards},
+    }
+    text = json.dumps(manifest, separators=(',', ':'))
+    with atomic_open(output_file) as f:
+        f.write(text)
+
+    total = count * len(base_boards)
+    # A compact bundle spends 2 x 81 digits plus quotes and commas per board
+    as_boards = total * (2 * 84)
+    print(f"Wrote {total:,} variant seeds for {len(base_boards)} base boards to {output_file}")
+    print(f"Manifest: {len(text):,} bytes ({len(text) / max(total, 1):.1f} per variant), "
+          f"about {as_boards:,} bytes as boards")
+
+
+def digit_rows(grids):
+    """Turn 81-character digit strings into a (n, 81) uint8 array."""
+    return np.frombuffer(''.join(grids).encode('ascii'), dtype=np.uint8).reshape(len(grids), 81) - ord('0')
+
+
+def expand_numpy(base_boards, per_board, rng):
+    """Yield (puzzles, solutions) byte-string batches of variants, vectorized."""
+    puzzles = digit_rows([puzzle for _, puzzle, _ in base_boards])
+    solutions = digit_rows([solution for _, _, solution in base_boards])
+    total = per_board * len(base_boards)
+    for start in range(0, total, BATCH_ROWS):
+        rows = np.arange(start, min(start + BATCH_ROWS, total)) % len(base_boards)
+        seeds = [rng.next() for _ in range(len(rows))]
+        batch = expand_batch(puzzles[rows], solutions[rows], seeds)
+        yield [(grids + ord('0')).astype(np.uint8) for grids in batch]
+
+
+def expand_python(base_boards, per_board, rng):
+    """Pure-Python fallback for expand_numpy, with the same variants."""
+    total = per_board * len(base_boards)
+    for start in range(0, total, BATCH_ROWS):
+        puzzles, solutions = [], []
+        for row in range(start, min(start + BATCH_ROWS, total)):
+            _, puzzle, solution = base_boards[row % len(base_boards)]
+            variant = transform_board(puzzle, solution, rng.next())
+            puzzles.append(variant[0].encode('ascii'))
+            solutions.append(variant[1].encode('ascii'))
+        yield puzzles, solutions
+
+
+def expand(base_boards, per_board, seed, engine, output_file=None):
+    """Expand every base board per_board times, check the variants and report the rate."""
+    use_numpy = engine == 'numpy' or (engine == 'auto' and numpy_available())
+    if use_numpy and not numpy_available():
+        print("Error: NumPy is not installed; use --engine python")
+        exit(1)
+    expander = expand_numpy if use_numpy else expand_python
+    analyze = get_analyzer('numpy' if use_numpy else 'python')
+    rng = Mulberry32(seed)
+
+    print(f"Expanding {len(base_boards)} base boards x {per_board:,} variants "
+          f"({'numpy' if use_numpy else 'python'} engine)...")
+    total = invalid = 0
+    elapsed = 0.0
+    with atomic_open(output_file) if output_file else nullcontext() as outfile:
+        if outfile:
+            outfile.write("puzzle,solution\n")
+        batches = expander(base_boards, per_board, rng)
+        while True:
+            start = time.perf_counter()
+            batch = next(batches, None)
+            elapsed += time.perf_counter() - start
+            if batch is None:
+                break
+            puzzles, solutions = batch
+            if use_numpy:
+                puzzles = [row.tobytes() for row in puzzles]
+                solutions = [row.tobytes() for row in solutions]
+            _, _, given_mismatch, invalid_solution = analyze(puzzles, solutions)
+            invalid += sum(a or b for a, b in zip(given_mismatch, invalid_solution))
+            total += len(puzzles)
+            if outfile:
+                outfile.writelines(f"{p.decode()},{s.decode()}\n" for p, s in zip(puzzles, solutions))
+
+    print(f"Expanded {total:,} variants in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} boards/s)")
+    if output_file:
+        print(f"Wrote {output_file}")
+    if invalid:
+        print(f"Error: {invalid:,} variants are not valid boards")
+        exit(1)
+    print("All variants are valid boards")
+
+
+@instrumented
+def main():
+    """Write the variant seed manifest, or expand the base boards with --expand."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--variants', type=int, default=VARIANTS_PER_BOARD,
+                        help=f"seeds per base board in the manifest (default: {VARIANTS_PER_BOARD})")
+    parser.add_argument('--seed', type=int, default=0, help="seed for drawing the variant seeds (default: 0)")
+    parser.add_argument('--manifest', type=Path, default=MANIFEST_FILE, help="seed manifest to write")
+    parser.add_argument('--expand', type=int, metavar='N', help="expand every base board N times and check the variants")
+    parser.add_argument('--engine', choices=['auto', 'numpy', 'python'], default='auto',
+                        help="batch engine for --expand (default: numpy if installed)")
+    parser.add_argument('--output', type=Path, help="with --expand, write the variants to this CSV")
+    args = parser.parse_args()
+
+    base_boards = load_base_boards()
+    if not base_boards:
+        print(f"Error: no boards found in {BOARDS_DIR}")
+        exit(1)
+
+    if args.expand:
+        expand(base_boards, args.expand, args.seed, args.engine, args.output)
+    else:
+        write_manifest(base_boards, args.variants, args.seed, args.manifest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Script to split the boards into level-aligned packs the app loads lazily.
+
+data/levels.json says how many sudokus a player needs for each level. The
+levels are grouped into ranges (1-10, 11-20, ... with the default
+--levels-per-pack 10) and each range gets its own pack under
+data/boards/packs/ with enough boards for the sudokus a player completes
+in those levels, plus --spare (default 25%) for boards skipped or reset.
+
+A board's difficulty follows a ramp over the levels: the early packs are
+mostly Easy, the late packs mostly Hard and Advanced. Every pack keeps at
+least MIN_PER_DIFFICULTY boards of each difficulty, since the player still
+picks the difficulty of the next board. A pack holds one compact bundle
+(see combine_boards.py) per difficulty:
+
+    {"format": "strings", "firstLevel": 1, "lastLevel": 10,
+     "bundles": {"easy": {"ids": [...], "puzzles": [...], ...}, ...}}
+
+Boards are drawn with a seeded shuffle, so the same seed gives the same
+packs. A board appears at most once per pack; when the corpus is smaller
+than the packs need, boards are reused across packs and a warning says so.
+
+manifest.json lists the packs with their level ranges and board counts,
+and index.js exposes one loader per pack, so src/config/loadBoards.js only
+parses the pack for the player's level and prefetches the next one. Since a
+board can be in several packs, the manifest also lists the distinct board
+Ids (boardIds) and the first pack holding each (boardPacks); board numbers
+in the app index boardIds.
+
+The packs replace the per-difficulty compact bundles of
+combine_boards.py --compact as what the app loads.
+
+Run this script from the project root:
+    py scripts/build_level_packs.py
+    py scripts/build_level_packs.py --levels-per-pack 5 --spare 0.5 --seed 42
+"""
+
+import argparse
+import json
+import math
+import random
+from pathlib import Path
+
+from combine_boards import add_hints, compact_bundle, load_corpus
+from extract_boards_from_csv import DIFFICULTIES
+from instrumentation import instrumented
+from shard_pool import add_workers_argument
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+LEVELS_FILE = PROJECT_ROOT / "data" / "levels.json"
+BOARDS_DIR = PROJECT_ROOT / "data" / "boards"
+OUTPUT_DIR = BOARDS_DIR / "packs"
+LEVELS_PER_PACK = 10
+SPARE = 0.25
+MIN_PER_DIFFICULTY = 2
+
+# Difficulty mix (Easy, Medium, Hard, Advanced) at points of the level
+# progression, 0 = level 1 and 1 = the last level, interpolated in between
+DIFFICULTY_RAMP = [
+    (0.0, [0.70, 0.20, 0.10, 0.00]),
+    (0.5, [0.25, 0.35, 0.25, 0.15]),
+    (1.0, [0.10, 0.20, 0.35, 0.35]),
+]
+
+
+def load_requirements(levels_file):
+    """Return {level: requiredSudokus}, with level 1 at 0."""
+    with open(levels_file, 'r', encoding='utf-8') as f:
+        requirements = {1: 0}
+        for requirement in json.load(f)["levelRequirements"]:
+            requirements[requirement["level"]] = requirement["requiredSudokus"]
+    return dict(sorted(requirements.items()))
+
+
+def sudokus_per_level(requirements):
+    """Return {level: sudokus completed while at that level}."""
+    levels = list(requirements)
+    per_level = {}
+    for level, next_level in zip(levels, levels[1:]):
+        per_level[level] = requirements[next_level] - requirements[level]
+    # The last level has no next requirement; assume it lasts as long as the one before
+    per_level[levels[-1]] = per_level[levels[-2]] if len(levels) > 1 else 1
+    return per_level
+
+
+def difficulty_mix(progress):
+    """Interpolate DIFFICULTY_RAMP at a progress between 0 and 1."""
+    for (start, start_mix), (end, end_mix) in zip(DIFFICULTY_RAMP, DIFFICULTY_RAMP[1:]):
+        if progress <= end:
+            fraction = (progress - start) / (end - start)
+            return [a + (b - a) * fraction for a, b in zip(start_mix, end_mix)]
+    return DIFFICULTY_RAMP[-1][1]
+
+
+def apportion(total, weights):
+    """Split total into integers proportional to weights (largest remainder)."""
+    shares = [total * weight / sum(weights) for weight in weights]
+    counts = [math.floor(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def plan_packs(per_level, levels_per_pack, spare):
+    """Return [(first level, last level, [boards per difficulty])]."""
+    levels = list(per_level)
+    last_progress = max(len(levels) - 1, 1)
+    packs = []
+    for start in range(0, len(levels), levels_per_pack):
+        pack_levels = levels[start:start + levels_per_pack]
+        weights = [0.0] * len(DIFFICULTIES)
+        for offset, level in enumerate(pack_levels):
+            mix = difficulty_mix((start + offset) / last_progress)
+            weights = [weight + share * per_level[level] for weight, share in zip(weights, mix)]
+        total = math.ceil(sum(per_level[level] for level in pack_levels) * (1 + spare))
+        counts = [max(count, MIN_PER_DIFFICULTY) for count in apportion(total, weights)]
+        packs.append((pack_levels[0], pack_levels[-1], counts))
+    return packs
+
+
+class BoardPool:
+    """A seeded shuffle of one difficulty's boards, dealt out in a cycle."""
+
+    def __init__(self, boards, rng):
+        self.boards = list(boards)
+        rng.shuffle(self.boards)
+        self.position = 0
+        self.dealt = 0
+
+    def draw(self, count):
+        """Return the next count boards (at most one full cycle, so no repeats)."""
+        count = min(count, len(self.boards))
+        drawn = [self.boards[(self.position + i) % len(self.boards)] for i in range(count)]
+        self.position = (self.position + count) % max(len(self.boards), 1)
+        self.dealt += count
+        return drawn
+
+
+def pack_name(first_level, last_level, width):
+    """Return the file name of the pack for a level range."""
+    return f"levels_{first_level:0{width}d}-{last_level:0{width}d}.json"
+
+
+def write_loader_index(output_dir, names):
+    """Write index.js with the manifest and a lazy loader per pack."""
+    lines = [
+        "// Generated by scripts/build_level_packs.py, do not edit.",
+        "// Each loader parses its pack only when called.",
+        "import manifest from './manifest.json';",
+        "",
+        "export { manifest };",
+        "",
+        "export const packLoaders = {",
+    ]
+    lines += [f"  '{name}': () => require('./{name}')," for name in names]
+    lines += ["};", ""]
+    with open(output_dir / "index.js", 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def build_packs(all_boards, requirements, output_dir, levels_per_pack=LEVELS_PER_PACK,
+                spare=SPARE, seed=0):
+    """Write the level packs, manifest.json and index.js. Returns the manifest."""
+    rng = random.Random(seed)
+    pools = [
+        BoardPool([board for board in all_boards if board["difficulty"] == difficulty.lower()], rng)
+        for difficulty in DIFFICULTIES
+    ]
+    packs = plan_packs(sudokus_per_level(requirements), levels_per_pack, spare)
+    width = len(str(max(requirements)))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for stale in output_dir.glob("levels_*.json"):
+        stale.unlink()
+
+    manifest = {"format": "strings", "levelsPerPack": levels_per_pack, "seed": seed, "packs": []}
+    first_pack = {}
+    print(f"{'pack':<20} {'boards':>7}  " + "  ".join(f"{d:>8}" for d in DIFFICULTIES))
+    for first_level, last_level, counts in packs:
+        bundles = {}
+        drawn_counts = {}
+        for difficulty, pool, count in zip(DIFFICULTIES, pools, counts):
+            boards = pool.draw(count)
+            for board in boards:
+                first_pack.setdefault(board["Id"], len(manifest["packs"]))
+            if boards:
+                bundles[difficulty.lower()] = compact_bundle(boards, difficulty.lower(), "strings")
+            drawn_counts[difficulty.lower()] = len(boards)
+
+        name = pack_name(first_level, last_level, width)
+        pack = {"format": "strings", "firstLevel": first_level, "lastLevel": last_level, "bundles": bundles}
+        with open(output_dir / name, 'w', encoding='utf-8') as f:
+            json.dump(pack, f, separators=(',', ':'))
+
+        boards = sum(drawn_counts.values())
+        manifest["packs"].append({
+            "file": name, "firstLevel": first_level, "lastLevel": last_level,
+            "boards": boards, "counts": drawn_counts,
+        })
+        print(f"{name:<20} {boards:>7,}  " + "  ".join(f"{drawn_counts[d.lower()]:>8,}" for d in DIFFICULTIES)
+              + f"  (wanted {sum(counts):,})")
+
+    board_ids = sorted(first_pack)
+    manifest["boardIds"] = board_ids
+    manifest["boardPacks"] = [first_pack[board_id] for board_id in board_ids]
+    with open(output_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    write_loader_index(output_dir, [pack["file"] for pack in manifest["packs"]])
+
+    for difficulty, pool in zip(DIFFICULTIES, pools):
+        if pool.dealt > len(pool.boards):
+            print(f"Warning: only {len(pool.boards)} {difficulty} boards for {pool.dealt} pack slots, "
+                  f"boards are reused across packs")
+    print(f"\nWrote {len(packs)} packs to {output_dir}")
+    return manifest
+
+
+@instrumented
+def main():
+    """Build the level packs from the boards of combine_boards.load_corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--levels-per-pack', type=int, default=LEVELS_PER_PACK,
+                        help=f"levels per pack (default: {LEVELS_PER_PACK})")
+    parser.add_argument('--spare', type=float, default=SPARE,
+                        help=f"extra boards per pack, as a fraction of the sudokus its levels need (default: {SPARE})")
+    parser.add_argument('--seed', type=int, default=0, help="board shuffle seed (default: 0)")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not LEVELS_FILE.exists():
+        print(f"Error: {LEVELS_FILE} not found!")
+        exit(1)
+    if args.levels_per_pack < 1:
+        print("Error: --levels-per-pack must be at least 1")
+        exit(1)
+
+    all_boards = load_corpus(BOARDS_DIR)
+    if not all_boards:
+        print(f"Error: no boards found in {BOARDS_DIR}")
+        exit(1)
+    add_hints(all_boards, args.workers)
+
+    build_packs(all_boards, load_requirements(LEVELS_FILE), OUTPUT_DIR,
+                args.levels_per_pack, args.spare, args.seed)
+
+
+if __name__ == "__main__":
+    main()
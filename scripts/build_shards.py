@@ -0,0 +1,187 @@
+"""
+Script to build the final Sudoku CSV shards from sudoku.csv in a single pass.
+
+This replaces running split_sudoku_csv.py, add_empty_cell_count.py,
+remove_duplicate_columns.py and add_difficulty_column.py one after another.
+The source is read once and every row is written straight to its shard with
+the "empty cell count" and "Difficulty" columns computed inline, so memory
+use stays constant no matter how large a shard is.
+
+Shards are cut by source byte size instead of by a line count, which saves
+the separate counting pass. Every row in the Kaggle dataset has the same
+width, so the shards still end up with (near) equal row counts.
+
+Each shard is written to a temporary file and renamed into place once it is
+complete, so an interrupted run never leaves a half-written shard behind.
+Shards are written with the codec set in SUDOKU_SHARD_CODEC (see
+shard_io.py).
+
+Run this script from the project root:
+    py scripts/build_shards.py
+"""
+
+import csv
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+from add_difficulty_column import get_difficulty
+from add_empty_cell_count import count_zeros
+from instrumentation import Progress, span
+from shard_io import codec_of, new_shard_path, open_shard
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_FILE = PROJECT_ROOT / "kaggle_sudokus" / "sudoku.csv"
+OUTPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+NUM_FILES = 20
+
+NEW_COLUMNS = ["empty cell count", "Difficulty"]
+PROGRESS_ROWS = 10000
+
+
+class ByteCountingLines:
+    """Iterate over the lines of a text file while counting consumed bytes."""
+
+    def __init__(self, infile):
+        self.infile = infile
+        self.bytes_read = 0
+
+    def __iter__(self):
+        for line in self.infile:
+            # The dataset is plain ASCII, so characters equal bytes
+            self.bytes_read += len(line)
+            yield line
+
+
+@contextmanager
+def atomic_open(file_path, mode='w'):
+    """
+    Open file_path for writing through a temp file renamed on success.
+
+    Files named .gz or .xz are compressed (see shard_io.open_shard).
+    """
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    try:
+        with open_shard(tmp_path, mode, newline='', codec=codec_of(file_path)) as outfile:
+            yield outfile
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def annotate_row(row, puzzle_idx):
+    """Return the row with the empty cell count and difficulty appended."""
+    empty_count = count_zeros(row[puzzle_idx])
+    return row + [str(empty_count), get_difficulty(empty_count)]
+
+
+def build_shards(infile, total_bytes, output_dir, num_files,
+                 start_file=1, start_offset=None, on_shard_done=None):
+    """
+    Stream an open sudoku.csv file into num_files annotated shards.
+
+    total_bytes is the size of the source and is only used to place the
+    shard boundaries; the final shard takes whatever rows remain.
+
+    To resume an interrupted run, pass the first shard still to build as
+    start_file and the source byte offset where it starts as start_offset.
+    on_shard_done(file_num, rows, end_offset) is called after each shard is
+    renamed into place. Returns the number of rows written to each shard.
+    """
+    header_line = infile.readline()
+    header = next(csv.reader([header_line]))
+    header_bytes = len(header_line)
+
+    existing = [col for col in NEW_COLUMNS if col in header]
+    if existing:
+        raise ValueError(f"source already has column(s) {existing}, refusing to add them again")
+    try:
+        puzzle_idx = header.index("puzzle")
+    except ValueError:
+        raise ValueError("'puzzle' column not found in source")
+
+    lines = ByteCountingLines(infile)
+    lines.bytes_read = header_bytes
+    if start_offset is not None:
+        infile.seek(start_offset)
+        lines.bytes_read = start_offset
+    reader = csv.reader(lines)
+
+    new_header = header + NEW_COLUMNS
+    data_bytes = max(total_bytes - header_bytes, 0)
+    rows_per_shard = []
+    progress = Progress("build_shards", total_bytes)
+    progress.update(lines.bytes_read)
+
+    for file_num in range(start_file, num_files + 1):
+        output_file = new_shard_path(output_dir, file_num)
+        print(f"Creating {output_file.name}...")
+
+        if file_num < num_files:
+            limit = header_bytes + data_bytes * file_num / num_files
+        else:
+            limit = float('inf')
+
+        rows_written = 0
+        shard_start = lines.bytes_read
+        with span("build_shards.shard", shard=output_file.name) as shard_span:
+            with atomic_open(output_file) as outfile:
+                writer = csv.writer(outfile)
+                writer.writerow(new_header)
+
+                while lines.bytes_read < limit:
+                    row = next(reader, None)
+                    if row is None:
+                        break
+                    if len(row) < 2:  # Skip blank or truncated lines
+                        continue
+                    writer.writerow(annotate_row(row, puzzle_idx))
+                    rows_written += 1
+                    if rows_written % PROGRESS_ROWS == 0:
+                        progress.update(lines.bytes_read - progress.done)
+
+            shard_span.rows = rows_written
+            shard_span.bytes_read = lines.bytes_read - shard_start
+            shard_span.bytes_written = output_file.stat().st_size
+        progress.update(lines.bytes_read - progress.done)
+
+        print(f"  Wrote {rows_written:,} rows to {output_file.name}")
+        rows_per_shard.append(rows_written)
+        if on_shard_done:
+            on_shard_done(file_num, rows_written, lines.bytes_read)
+
+    progress.close()
+    return rows_per_shard
+
+
+def build_shards_from_file(input_file, output_dir, num_files,
+                           start_file=1, start_offset=None, on_shard_done=None):
+    """Build annotated shards from a sudoku.csv file on disk."""
+    print(f"Building {num_files} shards from {input_file}...")
+    total_bytes = os.path.getsize(input_file)
+
+    with open(input_file, 'r', encoding='utf-8', newline='') as infile:
+        rows_per_shard = build_shards(infile, total_bytes, output_dir, num_files,
+                                      start_file, start_offset, on_shard_done)
+
+    print(f"\nSuccessfully wrote {sum(rows_per_shard):,} rows into {len(rows_per_shard)} files")
+    print(f"Output directory: {output_dir}")
+    return rows_per_shard
+
+
+if __name__ == "__main__":
+    if not INPUT_FILE.exists():
+        print(f"Error: {INPUT_FILE} not found!")
+        print("Make sure you've downloaded the dataset first.")
+        exit(1)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        with span("build_shards"):
+            build_shards_from_file(INPUT_FILE, OUTPUT_DIR, NUM_FILES)
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit(1)
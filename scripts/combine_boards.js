@@ -27,7 +27,8 @@ for (const boardFile of boardFiles) {
     Id: boardId,
     puzzle: boardData.puzzle,
     solution: boardData.solution,
-    difficulty: boardData.difficulty
+    difficulty: boardData.difficulty,
+    ...(boardData.hints !== undefined && { hints: boardData.hints })
   });
   
   boardId++;
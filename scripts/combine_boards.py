@@ -1,35 +1,391 @@
+"""
+Script to combine the numbered board files into one bundle for the app.
+
+By default board1.json ... boardN.json are combined into boards.json as
+pretty-printed 9x9 arrays. With --compact, the boards are written instead
+as one small file per difficulty under data/boards/compact/, with each grid
+stored as an 81-character digit string. --compact base64 stores the 4-bit
+packed bytes from puzzle_store.py in base64 instead, under
+data/boards/compact/base64/ so it never replaces the string bundles:
+
+    {"format": "strings", "difficulty": "easy",
+     "ids": [1, ...], "puzzles": ["3900...", ...], "solutions": ["3916...", ...]}
+
+Compact mode reads the boards through load_corpus (the numbered board
+files, or the boards{Difficulty}.json bundles), and reports the size and
+JSON parse time of both layouts. The app no longer reads data/boards/compact/:
+it loads the level packs of build_level_packs.py, which hold the same
+string bundles split by level range.
+
+With --append, the numbered board files are instead appended to the
+boards{Difficulty}.json bundles in place, without loading or rewriting the
+boards already in them, so an update costs only the new boards. New boards
+get Ids from a persistent allocator, so existing Ids never change and
+players' saved progress keeps pointing at the same boards. The allocator is
+board_ids.txt, an append-only log of "<content hash> <Id>" lines: the next Id
+is one past the highest logged Id, and boards whose puzzle and solution are
+already logged are skipped. The log is created from the bundles on the first
+--append. From then on the bundles are the corpus: --compact,
+build_level_packs.py and board_variants.py read them (load_corpus), so the
+app data carries the same Ids.
+
+All modes give every board a "hints" field: its logical solving trace from
+hint_traces.py, packed to 2 bytes per step and base64 encoded (a "hints"
+column in the compact bundles). Boards that already carry hints keep them.
+
+Run this script from the project root:
+    py scripts/combine_boards.py
+    py scripts/combine_boards.py --compact
+    py scripts/combine_boards.py --compact base64
+    py scripts/combine_boards.py --workers 8
+    py scripts/combine_boards.py --append
+"""
+
+import argparse
+import base64
+import hashlib
 import json
 import os
+import re
+import time
 from pathlib import Path
 
+from build_shards import atomic_open
+from extract_boards_from_csv import DIFFICULTIES
+from hint_traces import trace_boards
+from instrumentation import instrumented
+from puzzle_store import pack_grid
+from shard_pool import add_workers_argument
+
 # Get absolute path to script directory, then go to project root
 script_dir = Path(__file__).parent.resolve()
 project_root = script_dir.parent
 boards_dir = project_root / 'data' / 'boards'
+compact_dir = boards_dir / 'compact'
+id_log_file = boards_dir / 'board_ids.txt'
+
+# Only the numbered board1.json ... boardN.json files, not the boards*.json bundles
+BOARD_FILE_PATTERN = re.compile(r'board(\d+)\.json')
+
+COMPACT_FORMATS = ['strings', 'base64']
+PARSE_REPEATS = 20
+# Enough to find the closing bracket of a bundle behind trailing whitespace
+BUNDLE_TAIL_BYTES = 64
+
+
+def find_board_files(directory):
+    """Return the numbered board files in numeric order."""
+    board_files = [path for path in directory.glob('board*.json') if BOARD_FILE_PATTERN.fullmatch(path.name)]
+    return sorted(board_files, key=lambda x: int(x.stem.replace('board', '')))
+
+
+def load_boards(board_files):
+    """Load the board files and number them from 1 in file order."""
+    all_boards = []
+    for idx, board_file in enumerate(board_files, start=1):
+        with open(board_file, 'r', encoding='utf-8') as f:
+            board_data = json.load(f)
+        board = {
+            "Id": idx,
+            "puzzle": board_data["puzzle"],
+            "solution": board_data["solution"],
+            "difficulty": board_data["difficulty"]
+        }
+        if "hints" in board_data:
+            board["hints"] = board_data["hints"]
+        all_boards.append(board)
+    return all_boards
+
+
+def load_bundles(directory):
+    """Load the boards{Difficulty}.json bundles, keeping their Ids."""
+    all_boards = []
+    for difficulty in DIFFICULTIES:
+        bundle_file = directory / f'boards{difficulty}.json'
+        if bundle_file.exists():
+            with open(bundle_file, 'r', encoding='utf-8') as f:
+                all_boards.extend(json.load(f))
+    return all_boards
+
+
+def grid_to_digits(grid):
+    """Flatten a 9x9 grid into an 81-character digit string."""
+    return ''.join(str(value) for row in grid for value in row)
+
+
+def add_hints(all_boards, workers=1):
+    """Compute the hint trace of every board that does not have one yet."""
+    missing = [board for board in all_boards if "hints" not in board]
+    if not missing:
+        return
+    print(f'Computing hint traces for {len(missing)} boards...')
+    pairs = [(grid_to_digits(board["puzzle"]), grid_to_digits(board["solution"])) for board in missing]
+    for board, hints in zip(missing, trace_boards(pairs, workers)):
+        board["hints"] = hints
+
+
+def encode_grid(grid, compact_format):
+    """Encode a 9x9 grid in the given compact format."""
+    digits = grid_to_digits(grid)
+    if compact_format == 'base64':
+        return base64.b64encode(pack_grid(digits)).decode('ascii')
+    return digits
+
+
+def compact_bundle(boards, difficulty, compact_format):
+    """Build the column-oriented compact bundle of one difficulty."""
+    return {
+        "format": compact_format,
+        "difficulty": difficulty,
+        "ids": [board["Id"] for board in boards],
+        "puzzles": [encode_grid(board["puzzle"], compact_format) for board in boards],
+        "solutions": [encode_grid(board["solution"], compact_format) for board in boards],
+        "hints": [board["hints"] for board in boards],
+    }
+
+
+def parse_time(text):
+    """Return the average time in milliseconds to parse a JSON document."""
+    start = time.perf_counter()
+    for _ in range(PARSE_REPEATS):
+        json.loads(text)
+    return (time.perf_counter() - start) / PARSE_REPEATS * 1000
+
+
+def write_compact(all_boards, compact_format):
+    """Write one compact bundle per difficulty and report size and parse time."""
+    # Only the string bundles are for the app; the others go to a subdirectory
+    output_dir = compact_dir if compact_format == 'strings' else compact_dir / compact_format
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f'Writing {compact_format} bundles to: {output_dir}\n')
+    print(f'{"file":<22} {"boards":>7} {"nested":>10} {"compact":>10} {"parse nested":>13} {"parse compact":>14}')
+
+    written = []
+    for difficulty in DIFFICULTIES:
+        boards = [board for board in all_boards if board["difficulty"] == difficulty.lower()]
+        if not boards:
+            continue
+        # Baseline: the same boards as unindented nested arrays
+        nested = json.dumps(boards)
+        compact = json.dumps(compact_bundle(boards, difficulty.lower(), compact_format), separators=(',', ':'))
+
+        output_file = output_dir / f'boards{difficulty}.json'
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(compact)
+        written.append(output_file)
+
+        print(f'{output_file.name:<22} {len(boards):>7,} {len(nested):>9,}B {len(compact):>9,}B '
+              f'{parse_time(nested):>11.3f}ms {parse_time(compact):>12.3f}ms')
+
+    print(f'\nWrote {len(written)} compact bundles with {len(all_boards)} boards')
+    return written
+
+
+def combine(workers=1):
+    """Combine board1.json ... boardN.json into boards.json."""
+    print(f'Working directory: {os.getcwd()}')
+    print(f'Boards directory: {boards_dir}')
+    print(f'Boards directory exists: {boards_dir.exists()}')
+
+    board_files = find_board_files(boards_dir)
+    print(f'Found {len(board_files)} board files')
+
+    all_boards = load_boards(board_files)
+    add_hints(all_boards, workers)
+
+    output_file = boards_dir / 'boards.json'
+    print(f'Writing to: {output_file}')
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(all_boards, f, indent=2)
+
+    print(f'File written. Exists: {output_file.exists()}, Size: {output_file.stat().st_size if output_file.exists() else 0} bytes')
+    print(f'Created {output_file} with {len(all_boards)} boards')
+    return output_file
+
+
+def board_hash(board):
+    """Return the content hash of a board, from its puzzle and solution digits."""
+    digits = grid_to_digits(board["puzzle"]) + grid_to_digits(board["solution"])
+    return hashlib.blake2b(digits.encode('ascii'), digest_size=8).hexdigest()
+
+
+def load_id_log():
+    """Return the {content hash: Id} map of every board ever bundled, creating the log if needed."""
+    if not id_log_file.exists():
+        bundled = sorted(load_bundles(boards_dir), key=lambda board: board["Id"])
+        print(f'Creating {id_log_file.name} from the {len(bundled)} bundled boards')
+        with atomic_open(id_log_file) as f:
+            f.writelines(f'{board_hash(board)} {board["Id"]}\n' for board in bundled)
+
+    return read_id_log(id_log_file)
+
+
+def read_id_log(log_file):
+    """Return the {content hash: Id} map of an Id log."""
+    ids = {}
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                content_hash, board_id = line.split()
+                ids[content_hash] = int(board_id)
+    return ids
+
+
+def load_corpus(directory):
+    """
+    Return every board with its stable Id, for building what the app ships.
+
+    Once --append has started the Id log, the difficulty bundles hold every
+    board under its allocated Id, while the numbered board files are only
+    the last boards appended (numbered from 1 by load_boards), so the
+    bundles are read. Before that, the numbered board files are read, or the
+    bundles when there are none.
+    """
+    board_files = find_board_files(directory)
+    log_file = directory / id_log_file.name
+    if board_files and not log_file.exists():
+        print(f'Found {len(board_files)} board files')
+        return load_boards(board_files)
+
+    all_boards = load_bundles(directory)
+    print(f'Using the {len(all_boards)} boards in the difficulty bundles')
+    if board_files:
+        ids = read_id_log(log_file)
+        pending = sum(1 for board in load_boards(board_files) if board_hash(board) not in ids)
+        if pending:
+            print(f'Warning: {pending} board files are not in the bundles yet, '
+                  f'run combine_boards.py --append to add them')
+    return all_boards
+
+
+def format_grid(grid):
+    """Format a 9x9 grid with one row per line, as in the bundles."""
+    rows = ',\n'.join(f'      [{", ".join(map(str, row))}]' for row in grid)
+    return f'[\n{rows}\n    ]'
+
+
+def format_board(board):
+    """Format a board as an element of a bundle (the layout of splitBoardsByDifficulty.js)."""
+    hints = f',\n    "hints": {json.dumps(board["hints"])}' if "hints" in board else ''
+    return (f'  {{\n    "Id": {board["Id"]},\n    "puzzle": {format_grid(board["puzzle"])},\n'
+            f'    "solution": {format_grid(board["solution"])},\n'
+            f'    "difficulty": "{board["difficulty"]}"{hints}\n  }}')
+
+
+def append_to_bundle(bundle_file, boards):
+    """
+    Append boards to a bundle in place, before its closing bracket.
+
+    Only the last BUNDLE_TAIL_BYTES of the bundle are read. Returns
+    (offset, original tail) for restore_bundle.
+    """
+    text = ',\n'.join(format_board(board) for board in boards).encode('utf-8')
+    if not bundle_file.exists():
+        with atomic_open(bundle_file, 'wb') as f:
+            f.write(b'[\n' + text + b'\n]\n')
+        return None
+
+    with open(bundle_file, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        tail_offset = f.seek(max(size - BUNDLE_TAIL_BYTES, 0))
+        tail = f.read()
+        body = tail.rstrip()
+        if not body.endswith(b']'):
+            raise ValueError(f'{bundle_file.name} does not end with a JSON array')
+        body = body[:-1].rstrip()
+        separator = b'\n' if body.endswith(b'[') else b',\n'
+        offset = tail_offset + len(body)
+        f.seek(offset)
+        f.write(separator + text + b'\n]\n')
+        f.truncate()
+    return offset, tail[len(body):]
+
+
+def restore_bundle(bundle_file, restore):
+    """Undo append_to_bundle, given what it returned."""
+    if restore is None:
+        bundle_file.unlink(missing_ok=True)
+        return
+    offset, tail = restore
+    with open(bundle_file, 'r+b') as f:
+        f.seek(offset)
+        f.write(tail)
+        f.truncate()
+
+
+def append(workers=1):
+    """Append the numbered board files to the difficulty bundles with new, stable Ids."""
+    board_files = find_board_files(boards_dir)
+    print(f'Found {len(board_files)} board files')
+    ids = load_id_log()
+    next_id = max(ids.values(), default=0) + 1
+
+    new_boards = []
+    skipped = 0
+    for board in load_boards(board_files):
+        content_hash = board_hash(board)
+        if content_hash in ids:
+            skipped += 1
+            continue
+        board["Id"] = ids[content_hash] = next_id
+        next_id += 1
+        new_boards.append((content_hash, board))
+    print(f'{len(new_boards)} new boards, {skipped} already bundled')
+    if not new_boards:
+        return []
+    add_hints([board for _, board in new_boards], workers)
+
+    appended = []
+    try:
+        for difficulty in DIFFICULTIES:
+            boards = [board for _, board in new_boards if board["difficulty"] == difficulty.lower()]
+            if not boards:
+                continue
+            bundle_file = boards_dir / f'boards{difficulty}.json'
+            appended.append((bundle_file, append_to_bundle(bundle_file, boards)))
+            print(f'Appended {len(boards)} boards to {bundle_file.name} (Ids {boards[0]["Id"]}-{boards[-1]["Id"]})')
+        # Logged last, so a failed append leaves neither the boards nor their Ids behind
+        with open(id_log_file, 'a', encoding='utf-8') as f:
+            f.writelines(f'{content_hash} {board["Id"]}\n' for content_hash, board in new_boards)
+    except BaseException:
+        for bundle_file, restore in reversed(appended):
+            restore_bundle(bundle_file, restore)
+        raise
+    print('Run build_level_packs.py to ship the new boards in the app')
+    return [bundle_file for bundle_file, _ in appended]
+
 
-print(f'Working directory: {os.getcwd()}')
-print(f'Boards directory: {boards_dir}')
-print(f'Boards directory exists: {boards_dir.exists()}')
+@instrumented
+def main():
+    """Write boards.json, the compact bundles with --compact, or append to the bundles with --append."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--compact', nargs='?', const='strings', choices=COMPACT_FORMATS,
+                        help="write compact per-difficulty bundles (default format: strings)")
+    parser.add_argument('--append', action='store_true',
+                        help="append new board files to the difficulty bundles, keeping existing Ids")
+    add_workers_argument(parser)
+    args = parser.parse_args()
 
-board_files = sorted(boards_dir.glob('board*.json'), key=lambda x: int(x.stem.replace('board', '')))
-print(f'Found {len(board_files)} board files')
+    if args.append:
+        try:
+            append(args.workers)
+        except ValueError as e:
+            print(f'Error: {e}')
+            exit(1)
+        return
 
-all_boards = []
-for idx, board_file in enumerate(board_files, start=1):
-    with open(board_file, 'r', encoding='utf-8') as f:
-        board_data = json.load(f)
-    all_boards.append({
-        "Id": idx,
-        "puzzle": board_data["puzzle"],
-        "solution": board_data["solution"],
-        "difficulty": board_data["difficulty"]
-    })
+    if not args.compact:
+        combine(args.workers)
+        return
 
-output_file = boards_dir / 'boards.json'
-print(f'Writing to: {output_file}')
+    all_boards = load_corpus(boards_dir)
+    if not all_boards:
+        print(f'Error: no boards found in {boards_dir}')
+        exit(1)
+    add_hints(all_boards, args.workers)
+    write_compact(all_boards, args.compact)
 
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(all_boards, f, indent=2)
 
-print(f'File written. Exists: {output_file.exists()}, Size: {output_file.stat().st_size if output_file.exists() else 0} bytes')
-print(f'Created {output_file} with {len(all_boards)} boards')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Script to find puzzles that repeat under Sudoku symmetries across all shards.
+
+Some Kaggle puzzles are the same puzzle with the digits relabelled, bands or
+stacks swapped or the grid transposed. This script hashes the canonical
+form of every puzzle (see sudoku_symmetry.py) and finds repeated keys
+without holding all 9M keys in one dict:
+
+1. Every shard is canonicalised in parallel and its keys are spilled into
+   PARTITIONS bucket files by key prefix, one file per (bucket, shard).
+2. Every bucket is then deduplicated on its own, also in parallel, so only
+   about 1/PARTITIONS of the keys are in memory at any time.
+
+The first occurrence (lowest shard, then lowest row) of each puzzle is kept.
+The results go to dedupe_report.json, and --filter writes a copy of the
+shards without the repeats.
+
+Run this script from the project root:
+    py scripts/dedupe_canonical.py --workers 16
+    py scripts/dedupe_canonical.py --workers 16 --filter kaggle_sudokus/deduped
+    py scripts/dedupe_canonical.py --benchmark 5000
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import shutil
+import time
+from functools import partial
+from pathlib import Path
+
+from build_shards import atomic_open
+from instrumentation import instrumented
+from shard_io import find_shard, open_shard, shard_number
+from shard_pool import add_workers_argument, map_shards, shard_paths
+from sudoku_symmetry import canonical_key
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+WORK_DIR = INPUT_DIR / "dedupe_work"
+REPORT_FILE = INPUT_DIR / "dedupe_report.json"
+PARTITIONS = 64
+
+
+def partition_of(key, partitions):
+    """Return the bucket a canonical key belongs to."""
+    return int(key[:8], 16) % partitions
+
+
+def spill_shard(file_path, work_dir, partitions=PARTITIONS):
+    """Canonicalise a shard and spill 'key,shard,row' lines into the buckets."""
+    print(f"Canonicalising {file_path.name}...")
+    shard_num = shard_number(file_path)
+    rows = 0
+    buckets = [[] for _ in range(partitions)]
+
+    with open_shard(file_path) as infile:
+        reader = csv.reader(infile)
+        puzzle_idx = next(reader).index("puzzle")
+        for row_num, row in enumerate(reader, start=1):
+            if len(row) > puzzle_idx:
+                key = canonical_key(row[puzzle_idx])
+                buckets[partition_of(key, partitions)].append(f"{key},{shard_num},{row_num}\n")
+                rows += 1
+                # Flush in blocks so memory stays bounded on big shards
+                if rows % 100000 == 0:
+                    _flush_buckets(buckets, work_dir, shard_num)
+
+    _flush_buckets(buckets, work_dir, shard_num)
+    print(f"  Canonicalised {rows:,} puzzles in {file_path.name}")
+    return rows
+
+
+def _flush_buckets(buckets, work_dir, shard_num):
+    for partition, lines in enumerate(buckets):
+        if lines:
+            with open(work_dir / f"part_{partition:03d}_shard_{shard_num}.txt", 'a', encoding='ascii') as outfile:
+                outfile.writelines(lines)
+            lines.clear()
+
+
+def dedupe_partition(partition, work_dir):
+    """Find repeated keys in one bucket. Returns [(key, kept, duplicate)] locations."""
+    first_seen = {}
+    duplicates = []
+    entries = []
+    for bucket_file in sorted(work_dir.glob(f"part_{partition:03d}_shard_*.txt")):
+        with open(bucket_file, 'r', encoding='ascii') as infile:
+            for line in infile:
+                key, shard_num, row_num = line.rstrip('\n').split(',')
+                entries.append((key, int(shard_num), int(row_num)))
+
+    # Sorting by location makes the first occurrence the one that is kept
+    entries.sort(key=lambda entry: (entry[1], entry[2]))
+    for key, shard_num, row_num in entries:
+        kept = first_seen.get(key)
+        if kept is None:
+            first_seen[key] = (shard_num, row_num)
+        else:
+            duplicates.append((key, kept, (shard_num, row_num)))
+    return duplicates
+
+
+def filter_shard(file_path, output_dir, drop_rows):
+    """Copy a shard to output_dir without the rows in drop_rows. Returns rows kept."""
+    kept = 0
+    with open_shard(file_path, newline='') as infile, \
+            atomic_open(output_dir / file_path.name) as outfile:
+        reader = csv.reader(infile)
+        writer = csv.writer(outfile)
+        writer.writerow(next(reader))
+        for row_num, row in enumerate(reader, start=1):
+            if row_num not in drop_rows:
+                writer.writerow(row)
+                kept += 1
+    print(f"  Kept {kept:,} rows of {file_path.name}")
+    return kept
+
+
+def _filter_task(task):
+    file_path, output_dir, drop_rows = task
+    return filter_shard(file_path, output_dir, drop_rows)
+
+
+def benchmark(file_path, count):
+    """Time canonicalisation on the first count puzzles of a shard."""
+    with open_shard(file_path) as infile:
+        reader = csv.reader(infile)
+        puzzle_idx = next(reader).index("puzzle")
+        puzzles = [row[puzzle_idx] for row in itertools.islice(reader, count)]
+    start = time.perf_counter()
+    for puzzle in puzzles:
+        canonical_key(puzzle)
+    elapsed = time.perf_counter() - start
+    print(f"Canonicalised {len(puzzles):,} puzzles in {elapsed:.2f}s")
+    print(f"  {len(puzzles) / elapsed:,.0f} puzzles/s per core")
+
+
+@instrumented
+def main():
+    """Find symmetric duplicates, write the report and optionally filtered shards."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', type=Path, metavar='DIR', help="write shards without duplicates to DIR")
+    parser.add_argument('--partitions', type=int, default=PARTITIONS, help="number of key buckets")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="benchmark canonicalisation on N puzzles")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+
+    if args.benchmark:
+        first_shard = find_shard(INPUT_DIR, 1)
+        if first_shard is None:
+            print(f"Error: sudoku_1.csv not found in {INPUT_DIR}")
+            exit(1)
+        benchmark(first_shard, args.benchmark)
+        return
+
+    paths = shard_paths(INPUT_DIR)
+    if WORK_DIR.exists():
+        shutil.rmtree(WORK_DIR)
+    WORK_DIR.mkdir(parents=True)
+
+    try:
+        spill = partial(spill_shard, work_dir=WORK_DIR, partitions=args.partitions)
+        total = sum(map_shards(spill, paths, args.workers))
+
+        print(f"\nDeduplicating {args.partitions} buckets...")
+        dedupe = partial(dedupe_partition, work_dir=WORK_DIR)
+        duplicates = [dup for part in map_shards(dedupe, range(args.partitions), args.workers) for dup in part]
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    duplicates.sort(key=lambda dup: dup[2])
+    groups = len({key for key, _, _ in duplicates})
+    report = {
+        "puzzles": total,
+        "unique": total - len(duplicates),
+        "duplicates": len(duplicates),
+        "duplicate_groups": groups,
+        "rows": [
+            {"key": key, "kept": f"sudoku_{kept[0]}.csv:{kept[1]}", "duplicate": f"sudoku_{dup[0]}.csv:{dup[1]}"}
+            for key, kept, dup in duplicates
+        ],
+    }
+    with open(REPORT_FILE, 'w', encoding='utf-8') as outfile:
+        json.dump(report, outfile, indent=2)
+
+    print(f"\nPuzzles: {total:,}")
+    print(f"Unique up to symmetry: {total - len(duplicates):,}")
+    print(f"Duplicates: {len(duplicates):,} in {groups:,} groups")
+    print(f"Report written to {REPORT_FILE}")
+
+    if args.filter:
+        args.filter.mkdir(parents=True, exist_ok=True)
+        drop = {}
+        for _, _, (shard_num, row_num) in duplicates:
+            drop.setdefault(shard_num, set()).add(row_num)
+        print(f"\nWriting filtered shards to {args.filter}...")
+        tasks = [(path, args.filter, drop.get(shard_number(path), set())) for path in paths]
+        kept = map_shards(_filter_task, tasks, args.workers)
+        print(f"Kept {sum(kept):,} puzzles")
+
+
+if __name__ == "__main__":
+    main()
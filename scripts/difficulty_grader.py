@@ -0,0 +1,421 @@
+"""
+Technique-based difficulty grader for Sudoku puzzles.
+
+get_difficulty only counts blanks, so an "Advanced" board can fall to naked
+singles while a "Medium" one needs an X-wing. This grader solves each
+puzzle the way a person would, always trying the cheapest technique first:
+
+    naked single, hidden single, locked candidates, naked pair,
+    hidden pair, naked triple, hidden triple, X-wing, swordfish
+
+It records the hardest technique needed and the number of steps, and turns
+them into a numeric score (the summed technique weights) and a difficulty
+label. Puzzles the techniques cannot finish are labelled Advanced with the
+"guess" technique.
+
+Candidates are kept as one 9-bit mask per cell and most techniques work on
+ORs of those masks, so grading allocates very little per step.
+
+With --write the grader appends "technique score" and "Technique Difficulty"
+columns to the CSV shards.
+
+Run this script from the project root:
+    py scripts/difficulty_grader.py --workers 16            (report only)
+    py scripts/difficulty_grader.py --workers 16 --write    (append the columns)
+    py scripts/difficulty_grader.py --benchmark 2000
+"""
+
+import argparse
+import csv
+import itertools
+import time
+from collections import Counter, namedtuple
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+
+from build_shards import atomic_open
+from extract_boards_from_csv import DIFFICULTIES
+from instrumentation import instrumented
+from shard_io import find_shard, open_shard
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+
+GRADE_COLUMNS = ["technique score", "Technique Difficulty"]
+
+# (name, weight per step, difficulty label), cheapest first.
+# The index of a technique in this list is its code.
+TECHNIQUES = [
+    ("naked single", 1, "Easy"),
+    ("hidden single", 2, "Easy"),
+    ("locked candidates", 5, "Medium"),
+    ("naked pair", 8, "Hard"),
+    ("hidden pair", 10, "Hard"),
+    ("naked triple", 12, "Hard"),
+    ("hidden triple", 15, "Hard"),
+    ("x-wing", 20, "Advanced"),
+    ("swordfish", 30, "Advanced"),
+    ("guess", 50, "Advanced"),
+]
+NAKED_SINGLE, HIDDEN_SINGLE, LOCKED_CANDIDATES, NAKED_PAIR, HIDDEN_PAIR, \
+    NAKED_TRIPLE, HIDDEN_TRIPLE, X_WING, SWORDFISH, GUESS = range(len(TECHNIQUES))
+
+ALL_DIGITS = 0x1FF
+POPCOUNT = [bin(mask).count('1') for mask in range(512)]
+DIGIT_OF_BIT = {1 << d: d + 1 for d in range(9)}
+BITS_OF = [[1 << d for d in range(9) if mask >> d & 1] for mask in range(512)]
+
+ROWS = [[r * 9 + c for c in range(9)] for r in range(9)]
+COLS = [[r * 9 + c for r in range(9)] for c in range(9)]
+BOXES = [[(br + r) * 9 + bc + c for r in range(3) for c in range(3)]
+         for br in (0, 3, 6) for bc in (0, 3, 6)]
+UNITS = ROWS + COLS + BOXES
+PEERS = [sorted({peer for unit in UNITS if i in unit for peer in unit} - {i}) for i in range(81)]
+
+# Box/line intersections for locked candidates: (segment, rest of line, rest of box)
+INTERSECTIONS = []
+for _box in BOXES:
+    for _line in ROWS + COLS:
+        _segment = [cell for cell in _line if cell in _box]
+        if _segment:
+            INTERSECTIONS.append((
+                _segment,
+                [cell for cell in _line if cell not in _box],
+                [cell for cell in _box if cell not in _line],
+            ))
+
+Grade = namedtuple("Grade", ["score", "technique", "steps", "solved", "difficulty", "trace"])
+
+
+class GradingState:
+    """Digits and candidate masks of a puzzle being solved logically."""
+
+    def __init__(self, puzzle):
+        self.grid = [ord(char) - 48 if '1' <= char <= '9' else 0 for char in puzzle]
+        self.cands = [0 if digit else ALL_DIGITS for digit in self.grid]
+        self.valid = True
+        for i, digit in enumerate(self.grid):
+            if digit:
+                bit = 1 << (digit - 1)
+                for peer in PEERS[i]:
+                    if self.grid[peer] == digit:
+                        self.valid = False
+                    self.cands[peer] &= ~bit
+        self.unsolved = sum(1 for digit in self.grid if not digit)
+
+    def place(self, cell, bit):
+        """Set a cell and remove its digit from the candidates of its peers."""
+        self.grid[cell] = DIGIT_OF_BIT[bit]
+        self.cands[cell] = 0
+        self.unsolved -= 1
+        cands = self.cands
+        mask = ~bit
+        for peer in PEERS[cell]:
+            cands[peer] &= mask
+
+    def eliminate(self, cells, mask):
+        """Remove the digits in mask from the given cells. Returns True on progress."""
+        cands = self.cands
+        progress = False
+        for cell in cells:
+            if cands[cell] & mask:
+                cands[cell] &= ~mask
+                progress = True
+        return progress
+
+    def broken(self):
+        """Return True if an empty cell has no candidates left."""
+        return any(not cand and not digit for cand, digit in zip(self.cands, self.grid))
+
+    def positions(self, unit, bit):
+        """Return the 9-bit mask of positions within unit where bit is a candidate."""
+        cands = self.cands
+        mask = 0
+        for k, cell in enumerate(unit):
+            if cands[cell] & bit:
+                mask |= 1 << k
+        return mask
+
+
+def find_naked_single(state):
+    """Return [(cell, bit)] for every cell with exactly one candidate."""
+    return [(cell, cand) for cell, cand in enumerate(state.cands) if cand and POPCOUNT[cand] == 1]
+
+
+def find_hidden_single(state):
+    """Return (cell, bit) for a digit that fits only one cell of a unit, or None."""
+    cands = state.cands
+    for unit in UNITS:
+        once = twice = 0
+        for cell in unit:
+            mask = cands[cell]
+            twice |= once & mask
+            once |= mask
+        hidden = once & ~twice
+        if hidden:
+            bit = hidden & -hidden
+            for cell in unit:
+                if cands[cell] & bit:
+                    return cell, bit
+    return None
+
+
+def apply_locked_candidates(state):
+    """Pointing and claiming: digits confined to one box/line intersection."""
+    cands = state.cands
+    for segment, line_rest, box_rest in INTERSECTIONS:
+        seg = 0
+        for cell in segment:
+            seg |= cands[cell]
+        if not seg:
+            continue
+        in_box_rest = 0
+        for cell in box_rest:
+            in_box_rest |= cands[cell]
+        in_line_rest = 0
+        for cell in line_rest:
+            in_line_rest |= cands[cell]
+        # Pointing: only this segment of the box has the digit
+        pointing = seg & ~in_box_rest
+        if pointing and state.eliminate(line_rest, pointing):
+            return True
+        # Claiming: only this segment of the line has the digit
+        claiming = seg & ~in_line_rest
+        if claiming and state.eliminate(box_rest, claiming):
+            return True
+    return False
+
+
+def apply_naked_subset(state, size):
+    """Naked pairs/triples: size cells of a unit sharing exactly size candidates."""
+    cands = state.cands
+    for unit in UNITS:
+        small = [cell for cell in unit if 2 <= POPCOUNT[cands[cell]] <= size]
+        if len(small) < size:
+            continue
+        for combo in itertools.combinations(small, size):
+            union = 0
+            for cell in combo:
+                union |= cands[cell]
+            if POPCOUNT[union] == size:
+                others = [cell for cell in unit if cell not in combo]
+                if state.eliminate(others, union):
+                    return True
+    return False
+
+
+def apply_hidden_subset(state, size):
+    """Hidden pairs/triples: size digits of a unit confined to size cells."""
+    for unit in UNITS:
+        digit_positions = []
+        for bit in (1 << d for d in range(9)):
+            positions = state.positions(unit, bit)
+            if 2 <= POPCOUNT[positions] <= size:
+                digit_positions.append((bit, positions))
+        if len(digit_positions) < size:
+            continue
+        for combo in itertools.combinations(digit_positions, size):
+            digits = 0
+            positions = 0
+            for bit, mask in combo:
+                digits |= bit
+                positions |= mask
+            if POPCOUNT[positions] == size:
+                cells = [unit[k] for k in range(9) if positions >> k & 1]
+                if state.eliminate(cells, ALL_DIGITS & ~digits):
+                    return True
+    return False
+
+
+def apply_fish(state, size):
+    """X-wing (size 2) and swordfish (size 3) on rows and on columns."""
+    for bases, covers in ((ROWS, COLS), (COLS, ROWS)):
+        for bit in (1 << d for d in range(9)):
+            lines = []
+            for k, line in enumerate(bases):
+                positions = state.positions(line, bit)
+                if 2 <= POPCOUNT[positions] <= size:
+                    lines.append((k, positions))
+            if len(lines) < size:
+                continue
+            for combo in itertools.combinations(lines, size):
+                positions = 0
+                for _, mask in combo:
+                    positions |= mask
+                if POPCOUNT[positions] != size:
+                    continue
+                base_lines = {k for k, _ in combo}
+                cells = [cell
+                         for c in range(9) if positions >> c & 1
+                         for k, cell in enumerate(covers[c]) if k not in base_lines]
+                if state.eliminate(cells, bit):
+                    return True
+    return False
+
+
+# Elimination techniques tried after the singles, cheapest first
+ELIMINATIONS = [
+    (LOCKED_CANDIDATES, apply_locked_candidates),
+    (NAKED_PAIR, partial(apply_naked_subset, size=2)),
+    (HIDDEN_PAIR, partial(apply_hidden_subset, size=2)),
+    (NAKED_TRIPLE, partial(apply_naked_subset, size=3)),
+    (HIDDEN_TRIPLE, partial(apply_hidden_subset, size=3)),
+    (X_WING, partial(apply_fish, size=2)),
+    (SWORDFISH, partial(apply_fish, size=3)),
+]
+
+
+def grade(puzzle, solution=None, record_trace=False):
+    """
+    Grade an 81-character puzzle string.
+
+    Returns a Grade with the score, the hardest technique code, the step
+    count, whether logic alone solved it, the difficulty label and, with
+    record_trace, the list of (cell, digit, technique code) placements in
+    solving order. The technique of a placement is the hardest one used
+    since the previous placement.
+
+    When the techniques get stuck and a solution string is given, the
+    remaining cells are added to the trace as "guess" placements.
+    """
+    state = GradingState(puzzle)
+    score = 0
+    steps = 0
+    hardest = NAKED_SINGLE
+    trace = [] if record_trace else None
+    pending = NAKED_SINGLE  # Hardest technique since the last placement
+
+    while state.valid and state.unsolved:
+        singles = find_naked_single(state)
+        if singles:
+            technique = NAKED_SINGLE
+        else:
+            hidden = find_hidden_single(state)
+            singles = [hidden] if hidden else []
+            technique = HIDDEN_SINGLE
+
+        if singles:
+            for cell, bit in singles:
+                if state.cands[cell] & bit:
+                    state.place(cell, bit)
+                    steps += 1
+                    score += TECHNIQUES[technique][1]
+                    if record_trace:
+                        trace.append((cell, DIGIT_OF_BIT[bit], max(pending, technique)))
+                    pending = NAKED_SINGLE
+            hardest = max(hardest, technique)
+            if state.broken():
+                state.valid = False
+            continue
+
+        for technique, apply in ELIMINATIONS:
+            if apply(state):
+                steps += 1
+                score += TECHNIQUES[technique][1]
+                hardest = max(hardest, technique)
+                pending = max(pending, technique)
+                break
+        else:
+            break
+
+    solved = state.valid and state.unsolved == 0
+    if not solved:
+        hardest = GUESS
+        score += TECHNIQUES[GUESS][1]
+        if record_trace and solution:
+            for cell, digit in enumerate(state.grid):
+                if not digit:
+                    trace.append((cell, int(solution[cell]), GUESS))
+
+    return Grade(score, TECHNIQUES[hardest][0], steps, solved, TECHNIQUES[hardest][2], trace)
+
+
+def process_file(file_path, write=False, max_rows=None):
+    """Grade every puzzle of a shard. Returns a Counter of (difficulty, technique)."""
+    print(f"Grading {file_path.name}...")
+    tally = Counter()
+
+    with open_shard(file_path, newline='') as infile:
+        header = next(csv.reader(infile))
+    puzzle_idx = header.index("puzzle")
+    if write and any(column in header for column in GRADE_COLUMNS):
+        print(f"  {file_path.name} is already graded, skipping...")
+        return tally
+
+    # The shard is opened inside atomic_open so it is closed before it is
+    # replaced (Windows cannot replace an open file)
+    with (atomic_open(file_path) if write else nullcontext()) as outfile, \
+            open_shard(file_path, newline='') as infile:
+        reader = csv.reader(infile)
+        next(reader)
+        rows = itertools.islice(reader, max_rows) if not write else reader
+        writer = csv.writer(outfile) if write else None
+        if write:
+            writer.writerow(header + GRADE_COLUMNS)
+        for row in rows:
+            if len(row) > puzzle_idx and len(row[puzzle_idx]) == 81:
+                result = grade(row[puzzle_idx])
+                tally[(result.difficulty, result.technique)] += 1
+                if write:
+                    writer.writerow(row + [str(result.score), result.difficulty])
+            elif write and row:
+                # Keep rows without an 81-digit puzzle, with blank grade columns
+                writer.writerow(row + [''] * len(GRADE_COLUMNS))
+
+    print(f"  Graded {sum(tally.values()):,} puzzles in {file_path.name}")
+    return tally
+
+
+def benchmark(file_path, count):
+    """Time the grader on the first count puzzles of a shard."""
+    with open_shard(file_path) as infile:
+        reader = csv.reader(infile)
+        puzzle_idx = next(reader).index("puzzle")
+        puzzles = [row[puzzle_idx] for row in itertools.islice(reader, count)]
+
+    start = time.perf_counter()
+    for puzzle in puzzles:
+        grade(puzzle)
+    elapsed = time.perf_counter() - start
+    print(f"Graded {len(puzzles):,} puzzles in {elapsed:.2f}s")
+    print(f"  {len(puzzles) / elapsed:,.0f} puzzles/s per core")
+
+
+@instrumented
+def main():
+    """Grade the shards and print the difficulty distribution."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--write', action='store_true', help="append the grade columns to the shards")
+    parser.add_argument('--max-rows', type=int, help="grade at most this many rows per shard (report only)")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="benchmark the grader on N puzzles")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+
+    if args.benchmark:
+        first_shard = find_shard(INPUT_DIR, 1)
+        if first_shard is None:
+            print(f"Error: sudoku_1.csv not found in {INPUT_DIR}")
+            exit(1)
+        benchmark(first_shard, args.benchmark)
+        return
+
+    process = partial(process_file, write=args.write, max_rows=args.max_rows)
+    tally = sum(map_shards(process, shard_paths(INPUT_DIR), args.workers), Counter())
+
+    print(f"\nGraded {sum(tally.values()):,} puzzles")
+    for difficulty in DIFFICULTIES:
+        print(f"  {difficulty}: {sum(n for (label, _), n in tally.items() if label == difficulty):,}")
+    print("\nHardest technique needed:")
+    for name, _, _ in TECHNIQUES:
+        print(f"  {name}: {sum(n for (_, technique), n in tally.items() if technique == name):,}")
+
+
+if __name__ == "__main__":
+    main()
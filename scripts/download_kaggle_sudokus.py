@@ -1,7 +1,23 @@
 """
-Script to download the Kaggle Sudoku dataset using kagglehub.
+Script to download the Kaggle Sudoku dataset and build the shards from it.
 
-Before running this script:
+The CSV is streamed straight into the shard builder (build_shards.py), so
+the multi-GB dataset is never copied:
+
+- With --archive pointing at a dataset zip, the CSV member is decompressed
+  on the fly into kaggle_sudokus/sudoku_N.csv; sudoku.csv is never written.
+- With --archive pointing at a directory (e.g. a kagglehub cache path), or
+  when downloading with kagglehub, the dataset files are hardlinked into
+  kaggle_sudokus/ (copied only if a hardlink is impossible, e.g. across
+  drives) and the shards are built from the linked sudoku.csv.
+
+The ingest is content-addressed: the CRC-32 and size of the CSV (read from
+the zip directory, or computed once for a plain file and cached by size and
+mtime) are recorded in kaggle_sudokus/ingest_manifest.json together with
+the shard settings (including the SUDOKU_SHARD_CODEC codec, see
+shard_io.py), and a rerun with the same dataset does nothing.
+
+Before downloading (not needed for --archive):
 1. Install kagglehub: pip install kagglehub
 2. Set up Kaggle API credentials:
    - Go to https://www.kaggle.com/settings
@@ -14,30 +30,48 @@ Before running this script:
 
 Run this script from the project root:
     python scripts/download_kaggle_sudokus.py
+    python scripts/download_kaggle_sudokus.py --archive ~/Downloads/archive.zip
+    python scripts/download_kaggle_sudokus.py --archive ~/.cache/kagglehub/datasets/rohanrao/sudoku/versions/2
 """
 
+import argparse
+import io
+import json
 import os
-import sys
 import shutil
+import sys
+import zipfile
+import zlib
 from pathlib import Path
 
-try:
-    import kagglehub
-except ImportError:
-    print("Error: kagglehub is not installed.")
-    print("Please install it with: pip install kagglehub")
-    sys.exit(1)
+from add_difficulty_column import DIFFICULTY_THRESHOLDS
+from build_shards import NEW_COLUMNS, atomic_open, build_shards
+from instrumentation import instrumented
+from shard_io import codec_shard_path, shard_codec, shard_level
+from split_sudoku_csv import remove_stale_shards
 
 # Dataset handle from Kaggle URL: https://www.kaggle.com/datasets/rohanrao/sudoku/data
 DATASET_HANDLE = "rohanrao/sudoku"
+CSV_NAME = "sudoku.csv"
 
 # Target directory (relative to project root)
 PROJECT_ROOT = Path(__file__).parent.parent
 TARGET_DIR = PROJECT_ROOT / "kaggle_sudokus"
+INGEST_FILE = TARGET_DIR / "ingest_manifest.json"
+NUM_FILES = 20
+CRC_BLOCK_SIZE = 1 << 20
 
 
 def download_dataset():
-    """Download the Kaggle Sudoku dataset to the target directory."""
+    """Download the Kaggle Sudoku dataset into the kagglehub cache and return its path."""
+    try:
+        import kagglehub
+    except ImportError:
+        print("Error: kagglehub is not installed.")
+        print("Please install it with: pip install kagglehub")
+        print("Or pass a downloaded dataset with --archive.")
+        sys.exit(1)
+
     # Check for API token
     api_token = os.environ.get("KAGGLE_API_TOKEN")
     if not api_token:
@@ -48,41 +82,10 @@ def download_dataset():
         print("  Linux/Mac: export KAGGLE_API_TOKEN=your_token_here")
         print("\nGet your token from: https://www.kaggle.com/settings")
         sys.exit(1)
-    
+
     print(f"Downloading dataset: {DATASET_HANDLE}")
-    print(f"Target directory: {TARGET_DIR}")
-    
-    # Ensure target directory exists
-    TARGET_DIR.mkdir(parents=True, exist_ok=True)
-    
     try:
-        # Download the dataset
-        # kagglehub downloads to a cache directory, then we'll copy to our target
-        print("Downloading dataset from Kaggle...")
         dataset_path = kagglehub.dataset_download(DATASET_HANDLE)
-        
-        print(f"Dataset downloaded to cache: {dataset_path}")
-        print(f"Copying files to {TARGET_DIR}...")
-        
-        # Copy all files from the downloaded dataset to our target directory
-        if os.path.exists(dataset_path):
-            # Get all files in the dataset directory
-            for root, dirs, files in os.walk(dataset_path):
-                # Calculate relative path
-                rel_path = os.path.relpath(root, dataset_path)
-                target_path = TARGET_DIR / rel_path if rel_path != '.' else TARGET_DIR
-                target_path.mkdir(parents=True, exist_ok=True)
-                
-                # Copy files
-                for file in files:
-                    src_file = os.path.join(root, file)
-                    dst_file = target_path / file
-                    print(f"Copying: {file}")
-                    shutil.copy2(src_file, dst_file)
-        
-        print(f"\n✓ Dataset successfully downloaded to: {TARGET_DIR}")
-        print(f"Total size: {get_directory_size(TARGET_DIR) / (1024**3):.2f} GB")
-        
     except Exception as e:
         print(f"Error downloading dataset: {e}")
         print("\nMake sure you have:")
@@ -92,18 +95,171 @@ def download_dataset():
         print("\nGet your token from: https://www.kaggle.com/settings")
         sys.exit(1)
 
+    print(f"Dataset downloaded to cache: {dataset_path}")
+    return Path(dataset_path)
 
-def get_directory_size(directory):
-    """Calculate total size of directory in bytes."""
-    total = 0
-    for dirpath, dirnames, filenames in os.walk(directory):
-        for filename in filenames:
-            filepath = os.path.join(dirpath, filename)
-            if os.path.exists(filepath):
-                total += os.path.getsize(filepath)
-    return total
 
+def find_csv_member(archive):
+    """Return the ZipInfo of the dataset CSV (sudoku.csv, else the largest .csv)."""
+    members = [info for info in archive.infolist() if info.filename.lower().endswith('.csv')]
+    if not members:
+        raise ValueError(f"no .csv file in {archive.filename}")
+    for info in members:
+        if Path(info.filename).name == CSV_NAME:
+            return info
+    return max(members, key=lambda info: info.file_size)
+
+
+def file_crc32(file_path, previous=None):
+    """Return (crc32, size) of a file, reusing previous if size and mtime match."""
+    stat = file_path.stat()
+    if (previous and previous.get("size") == stat.st_size
+            and previous.get("mtime_ns") == stat.st_mtime_ns):
+        return previous["crc32"], stat.st_size
+
+    print(f"Hashing {file_path.name}...")
+    crc = 0
+    with open(file_path, 'rb') as infile:
+        for block in iter(lambda: infile.read(CRC_BLOCK_SIZE), b''):
+            crc = zlib.crc32(block, crc)
+    return f"{crc:08x}", stat.st_size
+
+
+def link_or_copy(src_file, dst_file):
+    """Hardlink src_file to dst_file, copying only if a link is impossible."""
+    if dst_file.exists():
+        if os.path.samefile(src_file, dst_file):
+            return "kept"
+        dst_file.unlink()
+    try:
+        os.link(src_file, dst_file)
+        return "linked"
+    except OSError:
+        shutil.copy2(src_file, dst_file)
+        return "copied"
+
+
+def link_dataset(dataset_dir, target_dir):
+    """Hardlink every file of an unpacked dataset into target_dir."""
+    for src_file in sorted(dataset_dir.rglob('*')):
+        if src_file.is_file():
+            dst_file = target_dir / src_file.relative_to(dataset_dir)
+            dst_file.parent.mkdir(parents=True, exist_ok=True)
+            print(f"{link_or_copy(src_file, dst_file).capitalize()}: {src_file.name}")
+
+
+def load_ingest_record():
+    """Return the last ingest record, or {} if there is none."""
+    if INGEST_FILE.exists():
+        with open(INGEST_FILE, 'r', encoding='utf-8') as infile:
+            return json.load(infile)
+    return {}
 
-if __name__ == "__main__":
-    download_dataset()
 
+def shards_intact(record, output_dir):
+    """Return True if every shard of the last ingest is still on disk unchanged."""
+    shards = record.get("shards", {})
+    return bool(shards) and all(
+        (output_dir / name).exists() and (output_dir / name).stat().st_size == size
+        for name, size in shards.items()
+    )
+
+
+def ingest(source, output_dir, num_files, force=False):
+    """
+    Build the shards from a dataset zip or directory unless already done.
+
+    Returns the number of rows written to each shard, or None if the shards
+    were already built from the same content with the same settings.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    record = load_ingest_record()
+    # Round-tripped through JSON so it compares equal to the stored copy
+    params = json.loads(json.dumps(
+        {"num_files": num_files, "thresholds": DIFFICULTY_THRESHOLDS, "columns": NEW_COLUMNS,
+         "codec": shard_codec(), "level": shard_level(shard_codec())}))
+
+    if source.is_dir():
+        candidates = sorted(source.rglob(CSV_NAME)) or sorted(source.rglob('*.csv'))
+        if not candidates:
+            raise ValueError(f"no .csv file in {source}")
+        csv_file = candidates[0]
+        crc, size = file_crc32(csv_file, record.get("file"))
+    else:
+        with zipfile.ZipFile(source) as archive:
+            member = find_csv_member(archive)
+        crc, size = f"{member.CRC:08x}", member.file_size
+
+    content_key = f"crc32:{crc}:{size}"
+    if (not force and record.get("content") == content_key and record.get("params") == params
+            and shards_intact(record, output_dir)):
+        print(f"Shards already built from this dataset ({content_key}), nothing to do.")
+        return None
+
+    if source.is_dir():
+        link_dataset(source, output_dir)
+        linked_csv = output_dir / csv_file.relative_to(source)
+        print(f"\nBuilding {num_files} shards from {linked_csv}...")
+        with open(linked_csv, 'r', encoding='utf-8', newline='') as infile:
+            rows_per_shard = build_shards(infile, size, output_dir, num_files)
+        stat = linked_csv.stat()
+        file_record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "crc32": crc}
+    else:
+        with zipfile.ZipFile(source) as archive:
+            print(f"Streaming {member.filename} from {source.name} into {num_files} shards...")
+            with io.TextIOWrapper(archive.open(member), encoding='utf-8', newline='') as infile:
+                rows_per_shard = build_shards(infile, size, output_dir, num_files)
+        file_record = None
+    # Shards from an earlier ingest into more files would be read as data
+    remove_stale_shards(output_dir, num_files)
+
+    shard_names = [codec_shard_path(output_dir, file_num).name for file_num in range(1, num_files + 1)]
+    record = {
+        "source": str(source),
+        "content": content_key,
+        "params": params,
+        "file": file_record,
+        "shards": {name: (output_dir / name).stat().st_size for name in shard_names},
+    }
+    with atomic_open(INGEST_FILE) as outfile:
+        json.dump(record, outfile, indent=2)
+    return rows_per_shard
+
+
+@instrumented
+def main():
+    """Download (or take a local copy of) the dataset and build the shards."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--archive', type=Path,
+                        help="dataset zip or unpacked dataset directory to ingest instead of downloading")
+    parser.add_argument('--num-files', type=int, default=NUM_FILES, help="number of shards to write")
+    parser.add_argument('--force', action='store_true', help="rebuild the shards even if nothing changed")
+    args = parser.parse_args()
+
+    if args.num_files < 1:
+        print("Error: --num-files must be at least 1")
+        sys.exit(1)
+
+    if args.archive is None:
+        source = download_dataset()
+    elif args.archive.exists():
+        source = args.archive
+    else:
+        print(f"Error: {args.archive} not found!")
+        sys.exit(1)
+
+    print(f"Target directory: {TARGET_DIR}")
+    try:
+        rows_per_shard = ingest(source, TARGET_DIR, args.num_files, args.force)
+    except (ValueError, zipfile.BadZipFile) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if rows_per_shard is not None:
+        shard_bytes = sum(load_ingest_record()["shards"].values())
+        print(f"\n✓ Wrote {sum(rows_per_shard):,} rows into {len(rows_per_shard)} shards in: {TARGET_DIR}")
+        print(f"Total shard size: {shard_bytes / (1024**3):.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Script to simulate the idle economy over thousands of synthetic players.
+
+It loads data/levels.json, data/idlers.json and data/abilities.json and
+plays the same rules as the app's stores, for every player at once with
+NumPy arrays (one row per player):
+
+- Solving a sudoku adds 1 to availableSudokus; losing a life takes 1 away.
+- The level is the highest one whose requiredSudokus the balance reaches,
+  and highestLevel (which unlocks idlers and abilities) never goes down.
+- An unlocked idler starts at level 1 for free; going from level L to L+1
+  costs levels[L].upgradeCost.
+- An idler produces sudokusProduced every 1/ratePerMinute minutes, online
+  or offline (the app credits offline time when it is opened again).
+
+Each player has a few fixed daily sessions (--sessions of --session-minutes,
+at random times of day, skipped on some days), a personal solve time around
+--solve-minutes, a chance of losing a life per solve, and an upgrade
+strategy, only acted on while online:
+
+    greedy   buy the cheapest upgrade whenever it is affordable
+    payback  buy the upgrade that pays for itself fastest, if it does so
+             within --payback-hours
+    reserve  like greedy, but never spend below the current level's
+             requiredSudokus, so the level does not drop
+    none     only start idlers, never upgrade them
+
+Time advances in --step minute steps. The report gives, per strategy, the
+days to reach each level (10th/50th/90th percentile), when each idler and
+ability unlocks, and the balance and sudokus earned by solving and by idlers
+at the end of every simulated week. --output writes the full report as
+JSON for comparing two versions of the config files.
+
+Run this script from the project root:
+    py scripts/economy_simulator.py
+    py scripts/economy_simulator.py --players 10000 --days 90 --strategies greedy,payback
+    py scripts/economy_simulator.py --solve-minutes 4 --output kaggle_sudokus/economy.json
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from instrumentation import instrumented
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+LEVELS_FILE = DATA_DIR / "levels.json"
+IDLERS_FILE = DATA_DIR / "idlers.json"
+ABILITIES_FILE = DATA_DIR / "abilities.json"
+
+STRATEGIES = ["greedy", "payback", "reserve", "none"]
+MINUTES_PER_DAY = 24 * 60
+PERCENTILES = [10, 50, 90]
+MAX_UPGRADES_PER_STEP = 64
+
+
+class Economy:
+    """The config files as arrays indexed by [idler, idler level]."""
+
+    def __init__(self, levels_data, idlers_data, abilities_data):
+        requirements = {1: 0}
+        for requirement in levels_data["levelRequirements"]:
+            requirements[requirement["level"]] = requirement["requiredSudokus"]
+        self.levels = np.array(sorted(requirements))
+        self.required = np.array([requirements[level] for level in self.levels])
+        # By level number: its requirement and the next level's (inf at the top)
+        self.required_at = np.zeros(self.levels[-1] + 1)
+        self.next_required = np.full(self.levels[-1] + 1, np.inf)
+        for level, next_level in zip(self.levels, self.levels[1:]):
+            self.required_at[level:next_level] = requirements[level]
+            self.next_required[level:next_level] = requirements[next_level]
+        self.required_at[self.levels[-1]] = requirements[self.levels[-1]]
+
+        self.idlers = idlers_data["idlers"]
+        self.abilities = abilities_data["abilities"]
+        max_level = max(len(idler["levels"]) for idler in self.idlers)
+        shape = (len(self.idlers), max_level + 2)
+        # Level 0 is "not started"; past the last level the cost is infinite
+        self.produced = np.zeros(shape)
+        self.rate = np.zeros(shape)
+        self.cost = np.full(shape, np.inf)
+        self.unlock_level = np.array([idler["unlockLevel"] for idler in self.idlers])
+        for i, idler in enumerate(self.idlers):
+            self.cost[i, 0] = 0
+            for entry in idler["levels"]:
+                self.produced[i, entry["level"]] = entry["sudokusProduced"]
+                self.rate[i, entry["level"]] = entry["ratePerMinute"]
+            for entry in idler["levels"][1:]:
+                # Cost of going from entry["level"] - 1 to entry["level"]
+                self.cost[i, entry["level"] - 1] = entry["upgradeCost"]
+        self.per_minute = self.produced * self.rate
+
+        # Minutes an upgrade from each level takes to pay for itself
+        gain = np.zeros(shape)
+        gain[:, :-1] = self.per_minute[:, 1:] - self.per_minute[:, :-1]
+        self.payback = np.divide(self.cost, gain, out=np.full(shape, np.inf), where=gain > 0)
+        self.payback[:, 0] = np.inf
+        self.upgrade_cost = self.cost.copy()
+        self.upgrade_cost[:, 0] = np.inf
+
+    def level_for(self, balance):
+        """Return the level a balance of available sudokus qualifies for."""
+        return self.levels[np.searchsorted(self.required, balance, side='right') - 1]
+
+
+class Players:
+    """Per-player simulation state, one array row per player."""
+
+    def __init__(self, economy, count, strategies, args, rng):
+        self.count = count
+        self.strategies = strategies
+        self.strategy = np.arange(count) % len(strategies)
+        self.payback_minutes = args.payback_hours * 60
+        self.balance = np.zeros(count)
+        self.highest = np.ones(count, dtype=np.int64)
+        self.solve_progress = np.zeros(count)
+        self.earned_active = np.zeros(count)
+        self.earned_idle = np.zeros(count)
+        self.spent = np.zeros(count)
+        self.idler_level = np.zeros((count, len(economy.idlers)), dtype=np.int64)
+        self.idle_rate = np.zeros(count)
+        self.idle_progress = np.zeros(count)
+        self.reached_at = np.full((count, int(economy.levels[-1]) + 1), np.nan)
+        self.reached_at[:, 1] = 0
+
+        # Solve times vary about 2x either way between players
+        self.solve_minutes = args.solve_minutes * rng.lognormal(0, 0.35, count)
+        self.fail_rate = np.clip(rng.normal(args.fail_rate, args.fail_rate / 2, count), 0, 0.9)
+
+        # Fixed daily sessions at random times of day
+        steps_per_day = MINUTES_PER_DAY // args.step
+        session_steps = max(round(args.session_minutes / args.step), 1)
+        self.schedule = np.zeros((count, steps_per_day), dtype=bool)
+        starts = rng.integers(0, steps_per_day, (count, args.sessions))
+        for offset in range(session_steps):
+            np.put_along_axis(self.schedule, (starts + offset) % steps_per_day, True, axis=1)
+
+        self.payback = self.uses("payback")
+        self.reserve = self.uses("reserve")
+        self.never = self.uses("none")
+
+    def uses(self, name):
+        """Return the mask of players following a strategy."""
+        if name not in self.strategies:
+            return np.zeros(self.count, dtype=bool)
+        return self.strategy == self.strategies.index(name)
+
+
+def buy_upgrades(economy, players, online_rows):
+    """Start unlocked idlers and buy upgrades by each online player's strategy."""
+    idlers = np.arange(len(economy.idlers))[None, :]
+    unlocked = players.highest[online_rows, None] >= economy.unlock_level[None, :]
+    levels = players.idler_level[online_rows]
+    levels[unlocked & (levels == 0)] = 1
+    players.idler_level[online_rows] = levels
+
+    keep = ~players.never[online_rows]
+    rows, unlocked = online_rows[keep], unlocked[keep]
+    payback = players.payback[rows, None]
+    reserve = np.where(players.reserve[rows], economy.required_at[players.highest[rows]], 0)
+
+    # Each round every remaining player buys one upgrade; those who cannot drop out
+    for _ in range(MAX_UPGRADES_PER_STEP):
+        if not len(rows):
+            break
+        level = players.idler_level[rows]
+        cost = economy.upgrade_cost[idlers, level]
+        payback_minutes = economy.payback[idlers, level]
+        # Cheapest first, or fastest payback (within the limit) for the payback strategy
+        score = np.where(payback, np.where(payback_minutes <= players.payback_minutes, payback_minutes, np.inf), cost)
+        score[~unlocked | (cost > (players.balance[rows] - reserve)[:, None])] = np.inf
+        choice = np.argmin(score, axis=1)
+        buying = np.isfinite(score[np.arange(len(rows)), choice])
+        rows, choice = rows[buying], choice[buying]
+        payback, reserve, unlocked = payback[buying], reserve[buying], unlocked[buying]
+
+        price = economy.cost[choice, players.idler_level[rows, choice]]
+        players.balance[rows] -= price
+        players.spent[rows] += price
+        players.idler_level[rows, choice] += 1
+
+    players.idle_rate[online_rows] = economy.per_minute[idlers, players.idler_level[online_rows]].sum(axis=1)
+
+
+def simulate(economy, players, strategies, args, rng):
+    """Advance every player through args.days days. Returns the weekly snapshots."""
+    steps_per_day = players.schedule.shape[1]
+    level_numbers = np.arange(players.reached_at.shape[1])
+    snapshots = []
+
+    for step in range(args.days * steps_per_day):
+        minute = (step + 1) * args.step
+        if step % steps_per_day == 0:
+            playing_today = rng.random(players.count) >= args.skip_rate
+        online = np.nonzero(players.schedule[:, step % steps_per_day] & playing_today)[0]
+
+        # Active play
+        progress = players.solve_progress[online] + args.step / players.solve_minutes[online]
+        solved = np.floor(progress)
+        players.solve_progress[online] = progress - solved
+        lost = rng.binomial(solved.astype(np.int64), players.fail_rate[online])
+        players.balance[online] = np.maximum(players.balance[online] + solved - lost, 0)
+        players.earned_active[online] += solved
+
+        # Idlers produce online and offline alike; part-finished cycles carry over
+        players.idle_progress += args.step * players.idle_rate
+        produced = np.floor(players.idle_progress)
+        players.idle_progress -= produced
+        players.balance += produced
+        players.earned_idle += produced
+
+        buy_upgrades(economy, players, online)
+
+        leveled = np.nonzero(players.balance >= economy.next_required[players.highest])[0]
+        if len(leveled):
+            new_highest = economy.level_for(players.balance[leveled])
+            reached = players.reached_at[leveled]
+            newly = np.isnan(reached) & (level_numbers[None, :] <= new_highest[:, None])
+            reached[newly] = minute / MINUTES_PER_DAY
+            players.reached_at[leveled] = reached
+            players.highest[leveled] = new_highest
+
+        if minute % (7 * MINUTES_PER_DAY) == 0 or step == args.days * steps_per_day - 1:
+            snapshots.append(snapshot(players, strategies, minute / MINUTES_PER_DAY))
+    return snapshots
+
+
+def percentiles(values):
+    """Return {p10, p50, p90} of the finite values, or None for each if there are none."""
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def snapshot(players, strategies, day):
+    """Summarise balances and earnings per strategy at a point in time."""
+    result = {"day": round(day, 2), "strategies": {}}
+    for index, name in enumerate(strategies):
+        rows = players.strategy == index
+        result["strategies"][name] = {
+            "level": percentiles(players.highest[rows].astype(float)),
+            "balance": percentiles(players.balance[rows]),
+            "earned_active": round(float(players.earned_active[rows].mean()), 1),
+            "earned_idle": round(float(players.earned_idle[rows].mean()), 1),
+            "spent": round(float(players.spent[rows].mean()), 1),
+        }
+    return result
+
+
+def level_curves(economy, players, strategies):
+    """Return the days to reach every level, per strategy."""
+    curves = {}
+    for index, name in enumerate(strategies):
+        rows = players.strategy == index
+        curves[name] = {
+            int(level): {**percentiles(players.reached_at[rows, level]),
+                         "reached": round(float(np.mean(~np.isnan(players.reached_at[rows, level]))), 3)}
+            for level in economy.levels
+        }
+    return curves
+
+
+def unlock_times(economy, curves):
+    """Return the median days until each idler and ability unlocks, per strategy."""
+    unlocks = {}
+    for name, curve in curves.items():
+        unlocks[name] = {
+            item["id"]: curve.get(item["unlockLevel"], {}).get("p50")
+            for item in economy.idlers + economy.abilities
+        }
+    return unlocks
+
+
+def print_report(report, strategies):
+    """Print the time-to-level curves, unlock times and weekly balances."""
+    curves = report["levels"]
+    print("\nDays to reach a level (p10 / p50 / p90, share of players who reach it):")
+    print(f"{'level':>6}  " + "  ".join(f"{name:>26}" for name in strategies))
+    for level in curves[strategies[0]]:
+        if level % 5 and level != 2:
+            continue
+        cells = []
+        for name in strategies:
+            entry = curves[name][level]
+            days = "/".join("-" if entry[f"p{p}"] is None else f"{entry[f'p{p}']:.1f}" for p in PERCENTILES)
+            cells.append(f"{days} ({entry['reached']:.0%})")
+        print(f"{level:>6}  " + "  ".join(f"{cell:>26}" for cell in cells))
+
+    print("\nMedian days until unlock:")
+    for item, _ in report["unlocks"][strategies[0]].items():
+        days = [report["unlocks"][name][item] for name in strategies]
+        print(f"  {item:<20} " + "  ".join(f"{name}={'-' if d is None else f'{d:.1f}'}" for name, d in zip(strategies, days)))
+
+    print("\nWeekly balance (median) and mean sudokus earned solving / by idlers / spent:")
+    for entry in report["weeks"]:
+        cells = []
+        for name in strategies:
+            stats = entry["strategies"][name]
+            cells.append(f"{name}: {stats['balance']['p50']:,.0f} "
+                         f"({stats['earned_active']:,.0f}/{stats['earned_idle']:,.0f}/{stats['spent']:,.0f})")
+        print(f"  day {entry['day']:>5.1f}  " + "  ".join(cells))
+
+
+@instrumented
+def main():
+    """Run the economy simulation and report time-to-level curves and balances."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=10000, help="synthetic players (default: 10000)")
+    parser.add_argument('--days', type=int, default=90, help="days to simulate (default: 90)")
+    parser.add_argument('--step', type=int, default=15, help="minutes per simulation step (default: 15)")
+    parser.add_argument('--strategies', default=",".join(STRATEGIES),
+                        help=f"comma-separated upgrade strategies, players are split evenly (default: all of {','.join(STRATEGIES)})")
+    parser.add_argument('--solve-minutes', type=float, default=8.0, help="median minutes per solved sudoku (default: 8)")
+    parser.add_argument('--fail-rate', type=float, default=0.1, help="mean chance of losing a life per solve (default: 0.1)")
+    parser.add_argument('--sessions', type=int, default=3, help="play sessions per day (default: 3)")
+    parser.add_argument('--session-minutes', type=int, default=20, help="minutes per session (default: 20)")
+    parser.add_argument('--skip-rate', type=float, default=0.2, help="chance a player skips a whole day (default: 0.2)")
+    parser.add_argument('--payback-hours', type=float, default=24.0,
+                        help="longest payback the payback strategy accepts (default: 24)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument('--output', type=Path, help="write the full report as JSON")
+    args = parser.parse_args()
+
+    if np is None:
+        print("Error: the simulator needs NumPy (pip install numpy)")
+        exit(1)
+    strategies = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown or not strategies:
+        print(f"Error: unknown strategies {unknown}; choose from {', '.join(STRATEGIES)}")
+        exit(1)
+    if MINUTES_PER_DAY % args.step:
+        print("Error: --step must divide a day (1440 minutes)")
+        exit(1)
+    for config_file in (LEVELS_FILE, IDLERS_FILE, ABILITIES_FILE):
+        if not config_file.exists():
+            print(f"Error: {config_file} not found!")
+            exit(1)
+
+    configs = []
+    for config_file in (LEVELS_FILE, IDLERS_FILE, ABILITIES_FILE):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            configs.append(json.load(f))
+    economy = Economy(*configs)
+    rng = np.random.default_rng(args.seed)
+    players = Players(economy, args.players, strategies, args, rng)
+
+    print(f"Simulating {args.players:,} players for {args.days} days in {args.step}-minute steps...")
+    start = time.perf_counter()
+    weeks = simulate(economy, players, strategies, args, rng)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {args.players * args.days:,} player-days in {elapsed:.2f}s")
+
+    curves = level_curves(economy, players, strategies)
+    report = {
+        "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "levels": curves,
+        "unlocks": unlock_times(economy, curves),
+        "weeks": weeks,
+    }
+    print_report(report, strategies)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
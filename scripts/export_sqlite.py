@@ -0,0 +1,247 @@
+"""
+Script to bulk-load the puzzle corpus into a SQLite database.
+
+The shards (or, with --bundles, the data/boards/boards{Difficulty}.json
+bundles) are loaded into one table, using the app's camelCase naming:
+
+    CREATE TABLE boards (
+        Id INTEGER PRIMARY KEY,       -- 1-based, in shard order
+        puzzle TEXT NOT NULL,         -- 81 digits, 0 = empty
+        solution TEXT NOT NULL,
+        emptyCount INTEGER NOT NULL,
+        difficulty TEXT NOT NULL,     -- 'easy', 'medium', 'hard', 'advanced'
+        difficultyRank INTEGER NOT NULL  -- 1..N within its difficulty
+    )
+
+The load uses chunked executemany inside one transaction per shard, with
+WAL and synchronous=OFF, and builds the indexes afterwards:
+
+    idx_boards_difficulty_rank   (difficulty, difficultyRank)  unique
+    idx_boards_difficulty_empty  (difficulty, emptyCount)
+
+difficultyRank is what makes a random board of a difficulty cheap to pick:
+choose a random rank between 1 and the difficulty's count, then
+
+    SELECT * FROM boards WHERE difficulty = ? AND difficultyRank = ?
+
+is a single index lookup, where ORDER BY RANDOM() has to scan every board
+of that difficulty. --benchmark times both next to LIMIT 1 OFFSET ?.
+
+The database is built in a temporary file and renamed into place. At the
+end it is switched back to journal_mode=DELETE so it is a single
+self-contained file that can be shipped with the app.
+
+Run this script from the project root:
+    py scripts/export_sqlite.py
+    py scripts/export_sqlite.py --bundles --output data/boards/boards.db
+    py scripts/export_sqlite.py --benchmark 2000
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+from add_difficulty_column import get_difficulty
+from combine_boards import grid_to_digits, load_bundles
+from extract_boards_from_csv import DIFFICULTIES
+from instrumentation import instrumented, span
+from shard_io import open_shard
+from shard_pool import shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+BOARDS_DIR = PROJECT_ROOT / "data" / "boards"
+OUTPUT_FILE = INPUT_DIR / "boards.db"
+CHUNK_ROWS = 50000
+
+CREATE_TABLE = """
+    CREATE TABLE boards (
+        Id INTEGER PRIMARY KEY,
+        puzzle TEXT NOT NULL,
+        solution TEXT NOT NULL,
+        emptyCount INTEGER NOT NULL,
+        difficulty TEXT NOT NULL,
+        difficultyRank INTEGER NOT NULL
+    )
+"""
+CREATE_INDEXES = [
+    "CREATE UNIQUE INDEX idx_boards_difficulty_rank ON boards (difficulty, difficultyRank)",
+    "CREATE INDEX idx_boards_difficulty_empty ON boards (difficulty, emptyCount)",
+]
+INSERT_BOARD = "INSERT INTO boards VALUES (?, ?, ?, ?, ?, ?)"
+
+RANDOM_QUERIES = {
+    "rank lookup": "SELECT * FROM boards WHERE difficulty = ? AND difficultyRank = ?",
+    "limit offset": "SELECT * FROM boards WHERE difficulty = ? LIMIT 1 OFFSET ?",
+    "order by random": "SELECT * FROM boards WHERE difficulty = ? ORDER BY RANDOM() LIMIT 1",
+}
+
+
+def shard_rows(file_path):
+    """Yield (puzzle, solution, empty count, difficulty) from a shard."""
+    with open_shard(file_path) as infile:
+        reader = csv.reader(infile)
+        header = next(reader)
+        puzzle_idx = header.index("puzzle")
+        solution_idx = header.index("solution")
+        empty_idx = header.index("empty cell count") if "empty cell count" in header else None
+        difficulty_idx = header.index("Difficulty") if "Difficulty" in header else None
+
+        for row in reader:
+            if len(row) < 2:
+                continue
+            puzzle = row[puzzle_idx]
+            empty_count = int(row[empty_idx]) if empty_idx is not None else puzzle.count('0')
+            difficulty = row[difficulty_idx] if difficulty_idx is not None else get_difficulty(empty_count)
+            yield puzzle, row[solution_idx], empty_count, difficulty.lower()
+
+
+def bundle_sources(boards_dir):
+    """Return [(name, rows)] for the board bundles, keeping their Ids."""
+    rows = []
+    for board in load_bundles(boards_dir):
+        puzzle = grid_to_digits(board["puzzle"])
+        rows.append((board["Id"], puzzle, grid_to_digits(board["solution"]),
+                     puzzle.count('0'), board["difficulty"]))
+    return [("bundles", rows)]
+
+
+def shard_sources(paths):
+    """Yield (name, rows) per shard, with Ids numbered on across the shards."""
+    ids = itertools.count(1)
+    for file_path in paths:
+        yield file_path.name, ((next(ids),) + row for row in shard_rows(file_path))
+
+
+def connect_for_bulk_load(db_file):
+    """Open a new database tuned for one big write."""
+    connection = sqlite3.connect(db_file, isolation_level=None)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    connection.execute("PRAGMA cache_size = -262144")  # 256 MB
+    connection.execute(CREATE_TABLE)
+    return connection
+
+
+def load_rows(connection, name, rows, ranks):
+    """Insert (Id, puzzle, solution, empty, difficulty) rows in chunks. Returns the row count."""
+    loaded = 0
+    rows = iter(rows)
+    with span("export_sqlite.load", shard=name) as load_span:
+        connection.execute("BEGIN")
+        while True:
+            chunk = list(itertools.islice(rows, CHUNK_ROWS))
+            if not chunk:
+                break
+            records = []
+            for row in chunk:
+                ranks[row[4]] += 1
+                records.append(row + (ranks[row[4]],))
+            connection.executemany(INSERT_BOARD, records)
+            loaded += len(records)
+        connection.execute("COMMIT")
+        load_span.rows = loaded
+    print(f"  Loaded {loaded:,} boards from {name}")
+    return loaded
+
+
+def export(sources, output_file):
+    """Load (name, rows) sources into a new database at output_file. Returns counts per difficulty."""
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    for path in (tmp_file, Path(f"{tmp_file}-wal"), Path(f"{tmp_file}-shm")):
+        if path.exists():
+            path.unlink()
+
+    ranks = Counter()
+    connection = connect_for_bulk_load(tmp_file)
+    try:
+        start = time.perf_counter()
+        total = sum(load_rows(connection, name, rows, ranks) for name, rows in sources)
+        load_seconds = time.perf_counter() - start
+
+        print("Building indexes...")
+        start = time.perf_counter()
+        for statement in CREATE_INDEXES:
+            connection.execute(statement)
+        connection.execute("ANALYZE")
+        index_seconds = time.perf_counter() - start
+
+        # Fold the WAL back in so the database is a single file
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        connection.close()
+    os.replace(tmp_file, output_file)
+
+    print(f"\nLoaded {total:,} boards in {load_seconds:.2f}s ({total / max(load_seconds, 1e-9):,.0f} rows/s), "
+          f"indexes in {index_seconds:.2f}s")
+    for difficulty in DIFFICULTIES:
+        print(f"  {difficulty}: {ranks[difficulty.lower()]:,}")
+    print(f"Database: {output_file} ({output_file.stat().st_size / (1024**2):,.1f} MB)")
+    return ranks
+
+
+def benchmark(db_file, queries):
+    """Time random-board-by-difficulty lookups with each query strategy."""
+    connection = sqlite3.connect(db_file)
+    counts = dict(connection.execute(
+        "SELECT difficulty, MAX(difficultyRank) FROM boards GROUP BY difficulty").fetchall())
+    rng = random.Random(0)
+    print(f"\nRandom board by difficulty, {queries:,} queries per strategy:")
+
+    for strategy, sql in RANDOM_QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(queries):
+            difficulty = rng.choice(list(counts))
+            if strategy == "rank lookup":
+                params = (difficulty, rng.randint(1, counts[difficulty]))
+            elif strategy == "limit offset":
+                params = (difficulty, rng.randrange(counts[difficulty]))
+            else:
+                params = (difficulty,)
+            if connection.execute(sql, params).fetchone() is None:
+                raise RuntimeError(f"{strategy} returned no board for {params}")
+        elapsed = time.perf_counter() - start
+        print(f"  {strategy:<16} {elapsed / queries * 1e6:>12,.1f} us/query")
+    connection.close()
+
+
+@instrumented
+def main():
+    """Export the shards or bundles to SQLite and optionally benchmark queries."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bundles', action='store_true', help="export the boards{Difficulty}.json bundles instead of the shards")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help="database file to write")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="time N random-board queries per strategy")
+    parser.add_argument('--benchmark-only', action='store_true', help="benchmark an existing database without exporting")
+    args = parser.parse_args()
+
+    if not args.benchmark_only:
+        if args.bundles:
+            sources = bundle_sources(BOARDS_DIR)
+        else:
+            if not INPUT_DIR.exists():
+                print(f"Error: {INPUT_DIR} not found!")
+                exit(1)
+            sources = shard_sources(shard_paths(INPUT_DIR))
+        print(f"Exporting to {args.output}...")
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        export(sources, args.output)
+
+    if args.benchmark or args.benchmark_only:
+        if not args.output.exists():
+            print(f"Error: {args.output} not found!")
+            exit(1)
+        benchmark(args.output, args.benchmark or 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,43 @@ and saves them as board1.json through board40.json in the data/boards folder.
 
 Run this script from the project root:
     py scripts/extract_boards_from_csv.py
+    py scripts/extract_boards_from_csv.py --workers 8 --seed 42
+    py scripts/extract_boards_from_csv.py --use-index
+    py scripts/extract_boards_from_csv.py --varied
+
+Puzzles are picked by streaming reservoir sampling, so memory stays
+proportional to the number of boards requested, not the dataset size.
+The same --seed always gives the same boards, whatever the worker count.
+
+With --use-index the shard offset indexes (see shard_index.py) are used to
+pick the puzzles, so only the selected rows are read from the shards.
+
+With --varied, VARIED_OVERSAMPLE times as many candidates are sampled and
+a candidate is skipped when it is a near duplicate (same clues or same
+blank layout, see puzzle_similarity.py) of a puzzle already selected, in
+any difficulty. The board set is still reproducible with --seed.
 """
 
+import argparse
 import csv
+import heapq
 import json
 import random
+from functools import partial
 from pathlib import Path
 
+from instrumentation import instrumented
+from puzzle_similarity import LSHIndex, signature
+from shard_index import read_header, sample_rows
+from shard_io import open_shard
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "boards"
-NUM_FILES = 20
 PUZZLES_PER_DIFFICULTY = 10
+VARIED_OVERSAMPLE = 5
 
 DIFFICULTIES = ["Easy", "Medium", "Hard", "Advanced"]
 
@@ -40,63 +64,148 @@ def convert_difficulty(difficulty):
     return difficulty.lower()
 
 
-def collect_puzzles():
-    """Collect puzzles from all CSV files, grouped by difficulty."""
-    puzzles_by_difficulty = {
-        "Easy": [],
-        "Medium": [],
-        "Hard": [],
-        "Advanced": []
+def collect_file(file_path, seed=0, k=PUZZLES_PER_DIFFICULTY):
+    """
+    Reservoir-sample up to k puzzles per difficulty from one CSV file.
+    
+    Every matching row gets a random key and only the k rows with the
+    smallest keys are kept, so memory stays O(k) however big the file is.
+    Because the keys are uniform, merging the per-file reservoirs by taking
+    the k smallest keys overall is the same as sampling all files at once.
+    
+    Returns {difficulty: (rows seen, [(key, puzzle, solution), ...])}.
+    """
+    # Seeded per file so the result does not depend on the worker count
+    rng = random.Random(f"{seed}:{file_path.name}")
+    reservoirs = {difficulty: [] for difficulty in DIFFICULTIES}
+    seen = {difficulty: 0 for difficulty in DIFFICULTIES}
+    
+    print(f"Reading {file_path.name}...")
+    with open_shard(file_path) as infile:
+        reader = csv.reader(infile)
+        header = next(reader)
+        
+        # Find column indices
+        try:
+            puzzle_idx = header.index("puzzle")
+            solution_idx = header.index("solution")
+            difficulty_idx = header.index("Difficulty")
+        except ValueError as e:
+            print(f"  Error: Required column not found in {file_path.name}: {e}")
+            return {difficulty: (0, []) for difficulty in DIFFICULTIES}
+        
+        # Sample puzzles
+        for row in reader:
+            if len(row) > max(puzzle_idx, solution_idx, difficulty_idx):
+                difficulty = row[difficulty_idx]
+                reservoir = reservoirs.get(difficulty)
+                if reservoir is None:
+                    continue
+                seen[difficulty] += 1
+                
+                # Max-heap on the key, so the largest kept key is evicted first
+                key = rng.random()
+                if len(reservoir) < k:
+                    heapq.heappush(reservoir, (-key, row[puzzle_idx], row[solution_idx]))
+                elif key < -reservoir[0][0]:
+                    heapq.heapreplace(reservoir, (-key, row[puzzle_idx], row[solution_idx]))
+        
+        print(f"  Scanned {sum(seen.values()):,} puzzles in {file_path.name}")
+    
+    return {
+        difficulty: (seen[difficulty], sorted((-neg_key, puzzle, solution)
+                                              for neg_key, puzzle, solution in reservoirs[difficulty]))
+        for difficulty in DIFFICULTIES
     }
+
+
+def collect_puzzles(workers=1, seed=0, k=PUZZLES_PER_DIFFICULTY):
+    """Sample k puzzles per difficulty from all CSV files."""
+    seen = {difficulty: 0 for difficulty in DIFFICULTIES}
+    candidates = {difficulty: [] for difficulty in DIFFICULTIES}
     
     print("Collecting puzzles from CSV files...")
     
-    for file_num in range(1, NUM_FILES + 1):
-        file_path = INPUT_DIR / f"sudoku_{file_num}.csv"
-        if not file_path.exists():
-            print(f"Warning: {file_path.name} not found, skipping...")
-            continue
-        
-        print(f"Reading {file_path.name}...")
-        with open(file_path, 'r', encoding='utf-8') as infile:
-            reader = csv.reader(infile)
-            header = next(reader)
-            
-            # Find column indices
-            try:
-                puzzle_idx = header.index("puzzle")
-                solution_idx = header.index("solution")
-                difficulty_idx = header.index("Difficulty")
-            except ValueError as e:
-                print(f"  Error: Required column not found in {file_path.name}: {e}")
-                continue
-            
-            # Read puzzles
-            count = 0
-            for row in reader:
-                if len(row) > max(puzzle_idx, solution_idx, difficulty_idx):
-                    difficulty = row[difficulty_idx]
-                    if difficulty in puzzles_by_difficulty:
-                        puzzle_str = row[puzzle_idx]
-                        solution_str = row[solution_idx]
-                        
-                        puzzles_by_difficulty[difficulty].append({
-                            "puzzle": puzzle_str,
-                            "solution": solution_str,
-                            "difficulty": difficulty
-                        })
-                        count += 1
-            
-            print(f"  Collected {count:,} puzzles")
+    collect = partial(collect_file, seed=seed, k=k)
+    for shard_sample in map_shards(collect, shard_paths(INPUT_DIR), workers):
+        for difficulty in DIFFICULTIES:
+            shard_seen, shard_reservoir = shard_sample[difficulty]
+            seen[difficulty] += shard_seen
+            candidates[difficulty].extend(shard_reservoir)
+    
+    # Merge the per-file reservoirs: the k smallest keys overall win
+    puzzles_by_difficulty = {}
+    for difficulty in DIFFICULTIES:
+        selected = heapq.nsmallest(k, candidates[difficulty])
+        puzzles_by_difficulty[difficulty] = [
+            {"puzzle": puzzle, "solution": solution, "difficulty": difficulty}
+            for _, puzzle, solution in selected
+        ]
     
     # Print summary
     print("\nCollected puzzles by difficulty:")
     for diff in DIFFICULTIES:
-        print(f"  {diff}: {len(puzzles_by_difficulty[diff]):,}")
+        print(f"  {diff}: {seen[diff]:,}")
+    
+    return puzzles_by_difficulty
+
+
+def collect_puzzles_from_index(seed=0, k=PUZZLES_PER_DIFFICULTY):
+    """Pick the puzzles for each difficulty through the shard offset indexes."""
+    puzzles_by_difficulty = {}
+    paths = shard_paths(INPUT_DIR)
+    if not paths:
+        return {difficulty: [] for difficulty in DIFFICULTIES}
+    
+    # All shards share the same column layout
+    header = read_header(paths[0])
+    puzzle_idx = header.index("puzzle")
+    solution_idx = header.index("solution")
+    rng = random.Random(seed)
+    
+    print("Sampling puzzles through the shard indexes...")
+    
+    for difficulty in DIFFICULTIES:
+        rows = sample_rows(paths, "Difficulty", difficulty, k, rng)
+        # sample_rows returns the rows in shard order; shuffle them so
+        # select_varied does not favor the low-numbered shards
+        rng.shuffle(rows)
+        puzzles_by_difficulty[difficulty] = [
+            {"puzzle": row[puzzle_idx], "solution": row[solution_idx], "difficulty": difficulty}
+            for row in rows
+        ]
+        print(f"  {difficulty}: {len(rows)} puzzles")
     
     return puzzles_by_difficulty
 
 
+def select_varied(puzzles_by_difficulty):
+    """
+    Keep up to PUZZLES_PER_DIFFICULTY puzzles per difficulty, skipping near duplicates.
+    
+    Candidates are taken in their sampled order, and one LSH index is shared
+    by all difficulties, so no two selected boards look alike.
+    """
+    index = LSHIndex()
+    varied = {}
+    print("\nSkipping near-duplicate candidates...")
+    for difficulty in DIFFICULTIES:
+        selected = []
+        skipped = 0
+        for puzzle_data in puzzles_by_difficulty[difficulty]:
+            if len(selected) == PUZZLES_PER_DIFFICULTY:
+                break
+            sig = signature(puzzle_data["puzzle"])
+            if index.near_duplicate(sig) is not None:
+                skipped += 1
+                continue
+            index.add(sig)
+            selected.append(puzzle_data)
+        varied[difficulty] = selected
+        print(f"  {difficulty}: kept {len(selected)}, skipped {skipped} near duplicates")
+    return varied
+
+
 def extract_and_save_boards(puzzles_by_difficulty):
     """Extract puzzles and save them as JSON files."""
     print(f"\nExtracting {PUZZLES_PER_DIFFICULTY} puzzles per difficulty...")
@@ -110,10 +219,9 @@ def extract_and_save_boards(puzzles_by_difficulty):
         
         if len(available) < PUZZLES_PER_DIFFICULTY:
             print(f"Warning: Only {len(available)} {difficulty} puzzles available, using all of them")
-            selected = available
-        else:
-            # Randomly select puzzles
-            selected = random.sample(available, PUZZLES_PER_DIFFICULTY)
+        
+        # The collectors already picked a random sample, in a seed-stable order
+        selected = available[:PUZZLES_PER_DIFFICULTY]
         
         print(f"  {difficulty}: Selected {len(selected)} puzzles")
         
@@ -140,18 +248,36 @@ def extract_and_save_boards(puzzles_by_difficulty):
     print(f"Output directory: {OUTPUT_DIR}")
 
 
-def main():
+@instrumented
+def main(workers=1, use_index=False, seed=None, varied=False):
     """Main function."""
     if not INPUT_DIR.exists():
         print(f"Error: {INPUT_DIR} not found!")
         exit(1)
     
-    # Collect puzzles from all CSV files
-    puzzles_by_difficulty = collect_puzzles()
+    if seed is None:
+        seed = random.randrange(2**32)
+    print(f"Using seed {seed} (pass --seed {seed} to reproduce this board set)")
+    
+    # Collect puzzles from all CSV files, with spare candidates to skip near duplicates
+    k = PUZZLES_PER_DIFFICULTY * (VARIED_OVERSAMPLE if varied else 1)
+    if use_index:
+        puzzles_by_difficulty = collect_puzzles_from_index(seed, k)
+    else:
+        puzzles_by_difficulty = collect_puzzles(workers, seed, k)
+    if varied:
+        puzzles_by_difficulty = select_varied(puzzles_by_difficulty)
     
     # Extract and save boards
     extract_and_save_boards(puzzles_by_difficulty)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--use-index', action='store_true', help="pick puzzles through the shard offset indexes")
+    parser.add_argument('--seed', type=int, help="random seed for a reproducible board set")
+    parser.add_argument('--varied', action='store_true', help="skip puzzles too similar to ones already selected")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+    
+    main(args.workers, args.use_index, args.seed, args.varied)
@@ -0,0 +1,213 @@
+"""
+Script to generate fresh Sudoku puzzles offline, without the Kaggle dataset.
+
+Each puzzle starts from a random full grid: the three diagonal boxes are
+filled with random permutations (they never constrain each other) and the
+solver completes the rest. Clues are then removed in random order, keeping
+only removals after which the puzzle still has a unique solution, until the
+blank count reaches a target drawn from the requested difficulty band.
+
+Work is split into chunks that run on a process pool. Every chunk has its
+own seed derived from --seed, so the output is identical for any worker
+count. Puzzles are written in the usual shard format
+(puzzle,solution,empty cell count,Difficulty).
+
+Run this script from the project root:
+    py scripts/generate_sudokus.py --easy 1000 --hard 500 --workers 8
+    py scripts/generate_sudokus.py --advanced 200000 --workers 0 --seed 7
+    py scripts/generate_sudokus.py --blanks 52 --count 500
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from add_difficulty_column import get_difficulty
+from build_shards import NEW_COLUMNS, atomic_open
+from extract_boards_from_csv import DIFFICULTIES
+from instrumentation import instrumented
+from shard_io import new_shard_path
+from shard_pool import add_workers_argument, resolve_workers
+from sudoku_solver import solve
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_DIR = PROJECT_ROOT / "kaggle_sudokus" / "generated"
+NUM_FILES = 20
+CHUNK_SIZE = 250
+
+# Blank counts to aim for in each difficulty band (inclusive), matching get_difficulty.
+# Advanced stops at 58 because unique puzzles with more blanks are rare and slow to find.
+BLANK_RANGES = {
+    "Easy": (18, 24),
+    "Medium": (25, 34),
+    "Hard": (35, 49),
+    "Advanced": (50, 58),
+}
+MAX_ATTEMPTS = 50
+
+
+def random_full_grid(rng):
+    """Return a random complete, valid grid as an 81-digit string."""
+    grid = ['0'] * 81
+    for box in range(3):
+        digits = rng.sample('123456789', 9)
+        for k, digit in enumerate(digits):
+            grid[(box * 3 + k // 3) * 9 + box * 3 + k % 3] = digit
+    return solve(''.join(grid), limit=1)[1]
+
+
+def make_puzzle(solution, target_blanks, rng):
+    """
+    Remove clues from a solution while the puzzle stays uniquely solvable.
+
+    Returns the puzzle string, or None if target_blanks was not reached.
+    """
+    puzzle = list(solution)
+    blanks = 0
+    cells = list(range(81))
+    rng.shuffle(cells)
+    for cell in cells:
+        if blanks == target_blanks:
+            break
+        digit = puzzle[cell]
+        puzzle[cell] = '0'
+        if solve(''.join(puzzle), limit=2)[0] == 1:
+            blanks += 1
+        else:
+            puzzle[cell] = digit
+    if blanks < target_blanks:
+        return None
+    return ''.join(puzzle)
+
+
+def generate_puzzle(difficulty, rng, blank_range=None):
+    """Return (puzzle, solution) with a blank count inside the difficulty's band."""
+    low, high = blank_range or BLANK_RANGES[difficulty]
+    for _ in range(MAX_ATTEMPTS):
+        solution = random_full_grid(rng)
+        puzzle = make_puzzle(solution, rng.randint(low, high), rng)
+        if puzzle is not None:
+            return puzzle, solution
+    raise RuntimeError(f"could not generate a {difficulty} puzzle in {MAX_ATTEMPTS} attempts")
+
+
+def generate_chunk(task):
+    """Generate one chunk of rows. task is (difficulty, count, seed, blank range)."""
+    difficulty, count, seed, blank_range = task
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        puzzle, solution = generate_puzzle(difficulty, rng, blank_range)
+        empty_count = puzzle.count('0')
+        rows.append([puzzle, solution, str(empty_count), get_difficulty(empty_count)])
+    return rows
+
+
+def plan_tasks(counts, seed, blank_range=None):
+    """Split the requested counts into seeded chunks, interleaving difficulties."""
+    per_difficulty = []
+    for difficulty in DIFFICULTIES:
+        remaining = counts.get(difficulty, 0)
+        chunks = []
+        chunk_num = 0
+        while remaining > 0:
+            size = min(CHUNK_SIZE, remaining)
+            chunks.append((difficulty, size, f"{seed}:{difficulty}:{chunk_num}", blank_range))
+            remaining -= size
+            chunk_num += 1
+        per_difficulty.append(chunks)
+    # Round-robin so every shard gets a mix of difficulties
+    return [task
+            for group in itertools.zip_longest(*per_difficulty)
+            for task in group if task is not None]
+
+
+def generate(counts, output_dir, num_files, workers=1, seed=0, blank_range=None):
+    """
+    Generate the requested puzzles into num_files shards. Returns rows per shard.
+
+    blank_range, if given, replaces the default (low, high) blank band of
+    every difficulty.
+    """
+    total = sum(counts.values())
+    rows_per_file = math.ceil(total / num_files)
+    tasks = plan_tasks(counts, seed, blank_range)
+    workers = min(resolve_workers(workers), max(len(tasks), 1))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Generating {total:,} puzzles into {num_files} files with {workers} workers...")
+    for difficulty in DIFFICULTIES:
+        if counts.get(difficulty):
+            print(f"  {difficulty}: {counts[difficulty]:,}")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    results = executor.map(generate_chunk, tasks) if executor else map(generate_chunk, tasks)
+    rows_written = []
+    try:
+        # Chunks arrive in task order, so the shards are deterministic
+        pending = []
+        for file_num in range(1, num_files + 1):
+            output_file = new_shard_path(output_dir, file_num)
+            written = 0
+            with atomic_open(output_file) as outfile:
+                writer = csv.writer(outfile)
+                writer.writerow(["puzzle", "solution"] + NEW_COLUMNS)
+                while written < rows_per_file:
+                    if not pending:
+                        pending = next(results, None)
+                        if pending is None:
+                            pending = []
+                            break
+                    take = pending[:rows_per_file - written]
+                    pending = pending[len(take):]
+                    writer.writerows(take)
+                    written += len(take)
+            print(f"  Wrote {written:,} rows to {output_file.name}")
+            rows_written.append(written)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    print(f"\nSuccessfully generated {sum(rows_written):,} puzzles")
+    print(f"Output directory: {output_dir}")
+    return rows_written
+
+
+@instrumented
+def main():
+    """Parse the requested counts and generate the shards."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    for difficulty in DIFFICULTIES:
+        parser.add_argument(f'--{difficulty.lower()}', type=int, default=0,
+                            help=f"number of {difficulty} puzzles to generate")
+    parser.add_argument('--blanks', type=int, help="generate --count puzzles with exactly this many blanks")
+    parser.add_argument('--count', type=int, default=0, help="number of puzzles for --blanks")
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR, help="directory for the shards")
+    parser.add_argument('--num-files', type=int, default=NUM_FILES, help="number of shards to write")
+    parser.add_argument('--seed', type=int, default=0, help="base seed for reproducible output")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    blank_range = None
+    if args.blanks is not None:
+        if not 0 <= args.blanks <= 64:
+            print("Error: --blanks must be between 0 and 64")
+            exit(1)
+        counts = {get_difficulty(args.blanks): args.count}
+        blank_range = (args.blanks, args.blanks)
+    else:
+        counts = {difficulty: getattr(args, difficulty.lower()) for difficulty in DIFFICULTIES}
+    if not any(counts.values()):
+        print("Error: ask for at least one puzzle, e.g. --easy 100 or --blanks 52 --count 100")
+        exit(1)
+
+    generate(counts, args.output_dir, args.num_files, args.workers, args.seed, blank_range)
+
+
+if __name__ == "__main__":
+    main()
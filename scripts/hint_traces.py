@@ -0,0 +1,66 @@
+"""
+Precomputed logical hint traces for the boards the pipeline emits.
+
+A trace is the ordered list of placements difficulty_grader.grade makes
+while solving a board the way a person would: (cell, digit, technique),
+where the technique is the hardest one needed since the previous
+placement. Cells logic cannot reach are appended as "guess" placements
+from the solution, so a trace always fills every empty cell.
+
+Each step is packed into 2 bytes (big-endian):
+
+    bits 15-11  technique code (index into difficulty_grader.TECHNIQUES)
+    bits 10-4   cell, 0-80 in row-major order
+    bits  3-0   digit, 1-9
+
+and the bytes are base64 encoded, so a board with 55 blanks costs about
+150 characters. The app decodes them in src/game/sudoku/hintTrace.js.
+
+This module is imported by the other scripts and is not run directly.
+"""
+
+import base64
+from concurrent.futures import ProcessPoolExecutor
+
+from difficulty_grader import TECHNIQUES, grade
+from shard_pool import resolve_workers
+
+TRACE_CHUNK = 64
+
+
+def encode_trace(trace):
+    """Pack [(cell, digit, technique code)] into a base64 string."""
+    packed = bytearray()
+    for cell, digit, technique in trace:
+        packed += ((technique << 11) | (cell << 4) | digit).to_bytes(2, 'big')
+    return base64.b64encode(bytes(packed)).decode('ascii')
+
+
+def decode_trace(text):
+    """Unpack a base64 trace back into [(cell, digit, technique code)]."""
+    packed = base64.b64decode(text)
+    steps = []
+    for i in range(0, len(packed), 2):
+        value = int.from_bytes(packed[i:i + 2], 'big')
+        steps.append(((value >> 4) & 0x7F, value & 0xF, value >> 11))
+    return steps
+
+
+def board_hints(pair):
+    """Return the encoded trace for a (puzzle, solution) pair of 81-digit strings."""
+    puzzle, solution = pair
+    return encode_trace(grade(puzzle, solution, record_trace=True).trace)
+
+
+def trace_boards(pairs, workers=1):
+    """Return the encoded traces for [(puzzle, solution)], in order."""
+    workers = min(resolve_workers(workers), max(len(pairs) // TRACE_CHUNK, 1))
+    if workers <= 1:
+        return [board_hints(pair) for pair in pairs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(board_hints, pairs, chunksize=TRACE_CHUNK))
+
+
+def technique_name(code):
+    """Return the name of a technique code."""
+    return TECHNIQUES[code][0]
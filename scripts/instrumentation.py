@@ -0,0 +1,313 @@
+"""
+Shared timing, throughput, memory and progress instrumentation for the scripts.
+
+Every script records timing spans: one for the whole run (@instrumented on
+main) and one per shard (map_shards and build_shards). A span measures wall
+time, rows and rows/s, bytes read and written, and peak memory. Finished
+spans are appended as one JSON object per line to the event log:
+
+    {"event": "span", "name": "add_empty_cell_count", "shard": "sudoku_7.csv",
+     "parent": "add_empty_cell_count", "pid": 4242, "start": 1760000000.0,
+     "seconds": 2.31, "rows": 450000, "rows_per_s": 194805.2,
+     "bytes_read": 74250049, "bytes_written": 75150049, "peak_rss_mb": 61.2}
+
+Everything is switched on through environment variables, so process-pool
+workers inherit the settings without extra arguments:
+
+    SUDOKU_EVENT_LOG=path     append span events to this JSONL file
+    SUDOKU_TRACEMALLOC=1      also record the tracemalloc peak (slower)
+    SUDOKU_PROFILE=name       run spans with this name under cProfile and
+                              save the .prof next to the event log
+    SUDOKU_PROGRESS=0         turn the live progress line off
+
+Peak RSS comes from the resource module and is only available on
+Linux/macOS. The live progress line (with an ETA from byte totals) is
+written to stderr when it is a terminal.
+
+Running this module summarises an event log per stage and lists the
+slowest shards.
+
+Run this script from the project root:
+    SUDOKU_EVENT_LOG=kaggle_sudokus/events.jsonl py scripts/add_difficulty_column.py --workers 8
+    py scripts/instrumentation.py kaggle_sudokus/events.jsonl
+"""
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+EVENT_LOG_VAR = "SUDOKU_EVENT_LOG"
+TRACEMALLOC_VAR = "SUDOKU_TRACEMALLOC"
+PROFILE_VAR = "SUDOKU_PROFILE"
+PROGRESS_VAR = "SUDOKU_PROGRESS"
+
+PROGRESS_INTERVAL = 0.5
+SLOWEST_SHARDS = 5
+
+_open_spans = []
+
+
+class Span:
+    """Counters a running span fills in; see span()."""
+
+    def __init__(self, name, shard=None):
+        self.name = name
+        self.shard = shard
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.tracemalloc_peak = 0
+
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / (1024**2) if sys.platform == 'darwin' else peak / 1024
+
+
+def fold_tracemalloc_peak():
+    """
+    Fold the tracemalloc peak since its last reset into every open span.
+
+    Called before each reset_peak(), so a nested span resetting the peak
+    does not lose the enclosing spans' peaks.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for open_span in _open_spans:
+        open_span.tracemalloc_peak = max(open_span.tracemalloc_peak, peak)
+
+
+def write_event(event):
+    """Append one event to the event log, if one is configured."""
+    log_file = os.environ.get(EVENT_LOG_VAR)
+    if not log_file:
+        return
+    # A single short write per line keeps lines from different workers whole
+    with open(log_file, 'a', encoding='utf-8') as outfile:
+        outfile.write(json.dumps(event) + "\n")
+
+
+def profile_path(name, shard):
+    """Return where the cProfile output of a span is saved."""
+    log_file = os.environ.get(EVENT_LOG_VAR)
+    directory = Path(log_file).parent if log_file else Path.cwd()
+    suffix = Path(shard).stem if shard else str(os.getpid())
+    return directory / f"profile_{name}_{suffix}.prof"
+
+
+@contextmanager
+def span(name, shard=None, parent=None):
+    """
+    Time a block and log it as a span event.
+
+    Yields a Span whose rows, bytes_read and bytes_written the block can
+    fill in. parent defaults to the innermost open span of this process.
+    """
+    current = Span(name, shard)
+    if parent is None and _open_spans:
+        parent = _open_spans[-1].name
+    if os.environ.get(TRACEMALLOC_VAR) == "1" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if tracemalloc.is_tracing():
+        fold_tracemalloc_peak()
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile() if os.environ.get(PROFILE_VAR) == name else None
+
+    _open_spans.append(current)
+    started = time.time()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield current
+    finally:
+        if profiler:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        if tracemalloc.is_tracing():
+            fold_tracemalloc_peak()
+        _open_spans.pop()
+
+        event = {
+            "event": "span",
+            "name": name,
+            "shard": shard,
+            "parent": parent,
+            "pid": os.getpid(),
+            "start": round(started, 3),
+            "seconds": round(seconds, 4),
+            "rows": current.rows,
+            "rows_per_s": round(current.rows / seconds, 1) if seconds > 0 else None,
+            "bytes_read": current.bytes_read,
+            "bytes_written": current.bytes_written,
+            "peak_rss_mb": round(peak_rss_mb(), 1) if resource else None,
+        }
+        if tracemalloc.is_tracing():
+            event["tracemalloc_peak_mb"] = round(current.tracemalloc_peak / (1024**2), 1)
+        if profiler:
+            output_file = profile_path(name, shard)
+            profiler.dump_stats(output_file)
+            event["profile"] = str(output_file)
+        write_event(event)
+
+
+def instrumented(func):
+    """Decorator that runs a script's main function inside a span."""
+    name = Path(func.__code__.co_filename).stem
+    if func.__name__ != 'main':
+        name = f"{name}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def stage_name(func):
+    """Return 'script.function' for a function or a functools.partial of one."""
+    while isinstance(func, functools.partial):
+        func = func.func
+    return f"{Path(func.__code__.co_filename).stem}.{func.__name__}"
+
+
+def current_span_name():
+    """Return the name of the innermost open span, or None."""
+    return _open_spans[-1].name if _open_spans else None
+
+
+def item_path(item):
+    """Return the shard file of a map_shards item (a path or a task tuple), or None."""
+    if isinstance(item, tuple) and item:
+        item = item[0]
+    return item if isinstance(item, Path) else None
+
+
+def shard_call(func, name, parent, item):
+    """
+    Call func(item) inside a span for that shard.
+
+    An int result is taken as the row count. A shard rewritten in place
+    counts its new size as bytes written.
+    """
+    path = item_path(item)
+    with span(name, shard=path.name if path else str(item), parent=parent) as current:
+        before = path.stat() if path and path.exists() else None
+        if before:
+            current.bytes_read = before.st_size
+        result = func(item)
+        if isinstance(result, int) and not isinstance(result, bool):
+            current.rows = result
+        if before and path.exists():
+            after = path.stat()
+            if after.st_mtime_ns != before.st_mtime_ns:
+                current.bytes_written = after.st_size
+    return result
+
+
+class Progress:
+    """A live progress line with throughput and ETA, written to stderr."""
+
+    def __init__(self, label, total, unit="bytes"):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last_draw = 0.0
+        self.enabled = sys.stderr.isatty() and os.environ.get(PROGRESS_VAR) != "0"
+
+    def update(self, amount):
+        """Add amount finished units and redraw at most every PROGRESS_INTERVAL."""
+        self.done += amount
+        now = time.perf_counter()
+        if self.enabled and (now - self.last_draw >= PROGRESS_INTERVAL or self.done >= self.total):
+            self.last_draw = now
+            self.draw(now - self.start)
+
+    def draw(self, elapsed):
+        fraction = self.done / self.total if self.total else 1.0
+        rate = self.done / elapsed if elapsed > 0 else 0
+        eta = (self.total - self.done) / rate if rate > 0 else 0
+        if self.unit == "bytes":
+            speed = f"{rate / (1024**2):,.1f} MB/s"
+        else:
+            speed = f"{rate:,.1f} {self.unit}/s"
+        sys.stderr.write(f"\r{self.label}: {fraction:6.1%} {speed} "
+                         f"elapsed {format_seconds(elapsed)} ETA {format_seconds(eta)}  ")
+        sys.stderr.flush()
+
+    def close(self):
+        """End the progress line."""
+        if self.enabled:
+            self.draw(time.perf_counter() - self.start)
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+
+def format_seconds(seconds):
+    """Format a duration as H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def read_events(log_file):
+    """Return the span events of an event log."""
+    with open(log_file, 'r', encoding='utf-8') as infile:
+        return [event for event in map(json.loads, infile) if event.get("event") == "span"]
+
+
+def summarize(events):
+    """Print totals per stage and the slowest shards."""
+    stages = {}
+    for event in events:
+        if event["shard"] is None:
+            stages.setdefault(event["name"], []).append(event)
+
+    print(f"{'stage':<28} {'runs':>5} {'seconds':>10} {'rows':>12} {'rows/s':>12} {'peak RSS':>10}")
+    for name, runs in stages.items():
+        seconds = sum(run["seconds"] for run in runs)
+        shard_rows = sum(event["rows"] for event in events if event["parent"] == name and event["shard"])
+        rows = sum(run["rows"] for run in runs) or shard_rows
+        peaks = [event["peak_rss_mb"] for event in events
+                 if (event["name"] == name or event["parent"] == name) and event["peak_rss_mb"] is not None]
+        peak = f"{max(peaks):,.1f} MB" if peaks else "n/a"
+        print(f"{name:<28} {len(runs):>5} {seconds:>10.2f} {rows:>12,} {rows / seconds if seconds else 0:>12,.0f} {peak:>10}")
+
+    shards = sorted((event for event in events if event["shard"]), key=lambda event: event["seconds"], reverse=True)
+    if shards:
+        print("\nSlowest shards:")
+        for event in shards[:SLOWEST_SHARDS]:
+            print(f"  {event['name']:<28} {event['shard']:<16} {event['seconds']:>8.2f}s "
+                  f"{event['rows_per_s'] or 0:>12,.0f} rows/s")
+
+
+def main():
+    """Summarise an event log."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('log_file', type=Path, help="event log written via SUDOKU_EVENT_LOG")
+    args = parser.parse_args()
+
+    if not args.log_file.exists():
+        print(f"Error: {args.log_file} not found!")
+        exit(1)
+    summarize(read_events(args.log_file))
+
+
+if __name__ == "__main__":
+    main()
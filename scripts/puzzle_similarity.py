@@ -0,0 +1,463 @@
+"""
+Near-duplicate detection for puzzles with MinHash and locality-sensitive hashing.
+
+Two puzzles can feel like the same board without being equal: most of the
+same clues in the same cells, or the same layout of blanks. Each puzzle
+gets two MinHash signatures of NUM_HASHES values:
+
+    clues   over its (cell, digit) givens
+    mask    over its given cells, the complement of the blank mask
+
+The mask is hashed by its given cells because puzzles are mostly blank:
+two unrelated puzzles share most of their blanks but few of their givens,
+so the given cells tell layouts apart far better.
+
+The share of equal values between two signatures estimates the Jaccard
+similarity of the sets. A puzzle is a near duplicate of another when its
+clue similarity reaches CLUE_THRESHOLD or its mask similarity reaches
+MASK_THRESHOLD.
+
+To find candidates without comparing every pair, each signature is cut
+into bands (CLUE_BANDS of the clue signature, MASK_BANDS of the mask
+signature) and every band is hashed to a 64-bit bucket key. Puzzles that
+share a bucket key are candidates, and only those are compared. A pair at
+similarity s shares a band of r values with probability s^r, so longer
+mask bands keep apart the unrelated layouts, which already share about a
+third of their given cells, while pairs at a threshold are still found
+most of the time.
+
+LSHIndex keeps the buckets in memory, for checking a few thousand chosen
+boards (extract_boards_from_csv.py --varied). For the whole corpus, this
+script writes a sudoku_N.lsh bucket file next to every shard:
+
+    line 1   JSON header with the shard size and mtime it was built from,
+             the row count, the entry count and the hash parameters
+    rest     bucket keys, sorted, then the byte offset of each entry's row,
+             both unsigned 64-bit little-endian
+
+A lookup is a binary search per band in each bucket file, so its cost
+grows with log(rows) plus the number of real candidates, not with the
+corpus size. Like the shard indexes, bucket files are rebuilt when their
+shard changes. Building uses NumPy when it is installed, and a slower
+pure-Python path otherwise.
+
+Run this script from the project root:
+    py scripts/puzzle_similarity.py --workers 8          (build missing/stale bucket files)
+    py scripts/puzzle_similarity.py --query 0043002090050090010700600430060020871900074000050...
+    py scripts/puzzle_similarity.py --sample 1000
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from build_shards import atomic_open
+from instrumentation import instrumented
+from shard_index import read_header, read_rows
+from shard_io import open_shard, sibling_path
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+
+BUCKETS_VERSION = 1
+HASH_SEED = 20240611
+NUM_HASHES = 64
+CLUE_BANDS, CLUE_ROWS = 16, 4
+MASK_BANDS, MASK_ROWS = 6, 10
+CLUE_THRESHOLD = 0.5
+MASK_THRESHOLD = 0.85
+CHUNK_ROWS = 4096
+MASK64 = (1 << 64) - 1
+
+# Token universes: a given (cell, digit) is cell * 9 + digit - 1, a given cell is its cell
+CLUE_TOKENS = 81 * 9
+MASK_TOKENS = 81
+
+
+def _rank_tables():
+    """One random rank per token and hash function (a permutation of each universe)."""
+    rng = random.Random(HASH_SEED)
+    tables = []
+    for size in (CLUE_TOKENS, MASK_TOKENS):
+        ranks = []
+        for _ in range(NUM_HASHES):
+            permutation = list(range(size))
+            rng.shuffle(permutation)
+            ranks.append(permutation)
+        tables.append(ranks)
+    return tables
+
+
+CLUE_RANKS, MASK_RANKS = _rank_tables()
+
+
+def puzzle_tokens(puzzle):
+    """Return (clue tokens, given cells) of an 81-character puzzle string."""
+    givens = [cell for cell, char in enumerate(puzzle) if char != '0']
+    return [cell * 9 + int(puzzle[cell]) - 1 for cell in givens], givens
+
+
+def _minhash(tokens, ranks, empty):
+    if not tokens:
+        return [empty] * NUM_HASHES
+    return [min(table[token] for token in tokens) for table in ranks]
+
+
+def signature(puzzle):
+    """Return the clue and mask MinHash signatures of a puzzle as one tuple."""
+    clues, givens = puzzle_tokens(puzzle)
+    return tuple(_minhash(clues, CLUE_RANKS, CLUE_TOKENS) + _minhash(givens, MASK_RANKS, MASK_TOKENS))
+
+
+def similarity(sig_a, sig_b):
+    """Return the estimated (clue, mask) Jaccard similarities of two signatures."""
+    clue = sum(a == b for a, b in zip(sig_a[:NUM_HASHES], sig_b[:NUM_HASHES]))
+    mask = sum(a == b for a, b in zip(sig_a[NUM_HASHES:], sig_b[NUM_HASHES:]))
+    return clue / NUM_HASHES, mask / NUM_HASHES
+
+
+def is_similar(similarities):
+    """Return True if a (clue, mask) similarity pair makes a near duplicate."""
+    clue, mask = similarities
+    return clue >= CLUE_THRESHOLD or mask >= MASK_THRESHOLD
+
+
+def _band_slices():
+    return ([(b * CLUE_ROWS, (b + 1) * CLUE_ROWS) for b in range(CLUE_BANDS)]
+            + [(NUM_HASHES + b * MASK_ROWS, NUM_HASHES + (b + 1) * MASK_ROWS) for b in range(MASK_BANDS)])
+
+
+BAND_SLICES = _band_slices()
+
+
+def _mix64(value):
+    """splitmix64 finalizer, so bucket keys spread over the whole 64-bit range."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def band_keys(sig):
+    """Return the 64-bit bucket key of every band of a signature."""
+    keys = []
+    for band, (start, end) in enumerate(BAND_SLICES):
+        value = band
+        for hashed in sig[start:end]:
+            value = (value * 1000003 + hashed + 1) & MASK64
+        keys.append(_mix64(value))
+    return keys
+
+
+def signatures_numpy(puzzles):
+    """Vectorized signature for a list of puzzle strings. Returns a (n, 2 * NUM_HASHES) array."""
+    # A sentinel token ranked after everything stands in for the cells a set does not contain
+    clue_ranks = np.full((NUM_HASHES, CLUE_TOKENS + 1), CLUE_TOKENS, dtype=np.int16)
+    clue_ranks[:, :CLUE_TOKENS] = CLUE_RANKS
+    mask_ranks = np.full((NUM_HASHES, MASK_TOKENS + 1), MASK_TOKENS, dtype=np.int16)
+    mask_ranks[:, :MASK_TOKENS] = MASK_RANKS
+
+    digits = np.frombuffer(''.join(puzzles).encode('ascii'), dtype=np.uint8).reshape(len(puzzles), 81) - ord('0')
+    cells = np.arange(81)
+    clue_tokens = np.where(digits > 0, cells * 9 + digits.astype(np.int64) - 1, CLUE_TOKENS)
+    mask_tokens = np.where(digits > 0, cells, MASK_TOKENS)
+
+    result = np.empty((len(puzzles), 2 * NUM_HASHES), dtype=np.int16)
+    for start in range(0, len(puzzles), CHUNK_ROWS):
+        end = start + CHUNK_ROWS
+        result[start:end, :NUM_HASHES] = clue_ranks[:, clue_tokens[start:end]].min(axis=2).T
+        result[start:end, NUM_HASHES:] = mask_ranks[:, mask_tokens[start:end]].min(axis=2).T
+    return result
+
+
+def band_keys_numpy(sigs):
+    """Vectorized band_keys for a (n, 2 * NUM_HASHES) signature array. Returns (n, bands) uint64."""
+    sigs = sigs.astype(np.uint64)
+    keys = np.empty((len(sigs), len(BAND_SLICES)), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for band, (start, end) in enumerate(BAND_SLICES):
+            value = np.full(len(sigs), band, dtype=np.uint64)
+            for column in range(start, end):
+                value = value * np.uint64(1000003) + sigs[:, column] + np.uint64(1)
+            value = (value ^ (value >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            value = (value ^ (value >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            keys[:, band] = value ^ (value >> np.uint64(31))
+    return keys
+
+
+class LSHIndex:
+    """In-memory LSH buckets over a growing set of signatures."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.signatures = []
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, sig):
+        """Add a signature and return its position in the index."""
+        position = len(self.signatures)
+        self.signatures.append(sig)
+        for key in band_keys(sig):
+            self.buckets.setdefault(key, []).append(position)
+        return position
+
+    def candidates(self, sig):
+        """Return the positions sharing at least one bucket with sig."""
+        found = set()
+        for key in band_keys(sig):
+            found.update(self.buckets.get(key, ()))
+        return found
+
+    def near_duplicate(self, sig):
+        """Return (position, (clue, mask)) of the first near duplicate of sig, or None."""
+        for position in sorted(self.candidates(sig)):
+            similarities = similarity(sig, self.signatures[position])
+            if is_similar(similarities):
+                return position, similarities
+        return None
+
+
+def buckets_path(shard_path):
+    """Return the bucket file path for a shard."""
+    return sibling_path(shard_path, '.lsh')
+
+
+def _hash_params():
+    return {"seed": HASH_SEED, "hashes": NUM_HASHES,
+            "clue_bands": [CLUE_BANDS, CLUE_ROWS], "mask_bands": [MASK_BANDS, MASK_ROWS]}
+
+
+def _to_little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _shard_puzzles(shard_path):
+    """Yield (byte offset, puzzle) for every row of a shard."""
+    with open_shard(shard_path, 'rb') as infile:
+        header = infile.readline().decode('utf-8').rstrip('\r\n').split(',')
+        puzzle_idx = header.index("puzzle")
+        offset = infile.tell()
+        for line in infile:
+            values = line.split(b',')
+            if len(values) > puzzle_idx and len(values[puzzle_idx]) == 81:
+                yield offset, values[puzzle_idx].decode('ascii')
+            offset += len(line)
+
+
+def sorted_entries(shard_path):
+    """
+    Hash every puzzle of a shard. Returns (keys bytes, offsets bytes, entries, rows).
+
+    There is one entry per band of every puzzle: its bucket key and the byte
+    offset of the puzzle's row, sorted by key and stored little-endian.
+    """
+    rows = list(_shard_puzzles(shard_path))
+    if np is not None and rows:
+        offsets = np.repeat(np.array([offset for offset, _ in rows], dtype=np.uint64), len(BAND_SLICES))
+        keys = band_keys_numpy(signatures_numpy([puzzle for _, puzzle in rows])).ravel()
+        order = np.argsort(keys, kind='stable')
+        return keys[order].astype('<u8').tobytes(), offsets[order].astype('<u8').tobytes(), len(keys), len(rows)
+
+    entries = sorted((key, offset) for offset, puzzle in rows for key in band_keys(signature(puzzle)))
+    keys = _to_little_endian(array('Q', [key for key, _ in entries]))
+    offsets = _to_little_endian(array('Q', [offset for _, offset in entries]))
+    return keys.tobytes(), offsets.tobytes(), len(entries), len(rows)
+
+
+def build_buckets(shard_path):
+    """Hash every puzzle of a shard into its bucket file. Returns the row count."""
+    print(f"Hashing {shard_path.name}...")
+    stat = shard_path.stat()
+    key_bytes, offset_bytes, entries, rows = sorted_entries(shard_path)
+    header = {
+        "version": BUCKETS_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": rows,
+        "entries": entries,
+        "params": _hash_params(),
+    }
+    with atomic_open(buckets_path(shard_path), 'wb') as outfile:
+        outfile.write(json.dumps(header).encode('utf-8') + b'\n')
+        outfile.write(key_bytes)
+        outfile.write(offset_bytes)
+    print(f"  Hashed {rows:,} puzzles of {shard_path.name}")
+    return rows
+
+
+def read_buckets_header(shard_path):
+    """Return the bucket file header of a shard, or None if it is missing or stale."""
+    path = buckets_path(shard_path)
+    if not path.exists():
+        return None
+    with open(path, 'rb') as infile:
+        header = json.loads(infile.readline())
+    stat = shard_path.stat()
+    if (header.get("version") != BUCKETS_VERSION
+            or header.get("params") != _hash_params()
+            or header["size"] != stat.st_size
+            or header["mtime_ns"] != stat.st_mtime_ns):
+        return None
+    return header
+
+
+def ensure_buckets(shard_path):
+    """Build the bucket file of a shard if it is missing or stale. Returns its row count."""
+    header = read_buckets_header(shard_path)
+    if header is None:
+        return build_buckets(shard_path)
+    return header["rows"]
+
+
+class ShardBuckets:
+    """Binary-search lookups in one shard's bucket file, through mmap."""
+
+    def __init__(self, shard_path):
+        self.shard_path = shard_path
+        self.file = open(buckets_path(shard_path), 'rb')
+        header_line = self.file.readline()
+        base = len(header_line)
+        count = json.loads(header_line)["entries"]
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        self.keys = view[base:base + count * 8].cast('Q')
+        self.offsets = view[base + count * 8:base + count * 16].cast('Q')
+        if sys.byteorder == 'big':
+            # The file is little-endian; fall back to swapped copies in memory
+            self.keys = _to_little_endian(array('Q', self.keys))
+            self.offsets = _to_little_endian(array('Q', self.offsets))
+
+    def lookup(self, key):
+        """Return the row offsets of the entries with a bucket key."""
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_right(self.keys, key, start)
+        return [self.offsets[i] for i in range(start, end)]
+
+    def close(self):
+        if isinstance(self.keys, memoryview):
+            self.keys.release()
+            self.offsets.release()
+        self.mmap.close()
+        self.file.close()
+
+
+def find_similar(puzzle, shards):
+    """
+    Return the near duplicates of a puzzle across the shards.
+
+    Returns ([(shard name, row, (clue, mask))], candidates checked). The
+    puzzle itself is left out.
+    """
+    sig = signature(puzzle)
+    keys = band_keys(sig)
+    matches = []
+    checked = 0
+    for buckets in shards:
+        offsets = set()
+        for key in keys:
+            offsets.update(buckets.lookup(key))
+        if not offsets:
+            continue
+        header = read_header(buckets.shard_path)
+        puzzle_idx = header.index("puzzle")
+        for row in read_rows(buckets.shard_path, offsets):
+            checked += 1
+            if row[puzzle_idx] == puzzle:
+                continue
+            similarities = similarity(sig, signature(row[puzzle_idx]))
+            if is_similar(similarities):
+                matches.append((buckets.shard_path.name, row, similarities))
+    return matches, checked
+
+
+def random_puzzles(shards, count, rng):
+    """Pick count random puzzles through the row offsets in the bucket files."""
+    # Every row has one entry per band, so a random entry is a uniformly random row
+    weights = [len(buckets.offsets) for buckets in shards]
+    puzzles = []
+    for _ in range(count):
+        buckets = rng.choices(shards, weights=weights)[0]
+        offset = buckets.offsets[rng.randrange(len(buckets.offsets))]
+        puzzle_idx = read_header(buckets.shard_path).index("puzzle")
+        puzzles.append(read_rows(buckets.shard_path, [offset])[0][puzzle_idx])
+    return puzzles
+
+
+def print_matches(puzzle, matches, checked):
+    print(f"{puzzle}: {checked} candidates, {len(matches)} near duplicates")
+    for name, row, (clue, mask) in matches:
+        print(f"  {name}: {row[0]}  clues {clue:.2f}  mask {mask:.2f}")
+
+
+@instrumented
+def main():
+    """Build the bucket files, or query them with --query / --sample."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--query', metavar='PUZZLE', help="list the near duplicates of an 81-digit puzzle")
+    parser.add_argument('--sample', type=int, metavar='N',
+                        help="query N random puzzles and report candidates, matches and lookup time")
+    parser.add_argument('--seed', type=int, default=0, help="seed for --sample (default: 0)")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+    paths = shard_paths(INPUT_DIR)
+    if not paths:
+        print(f"Error: no shards found in {INPUT_DIR}")
+        exit(1)
+    if np is None:
+        print("NumPy not installed, hashing with the pure-Python path")
+
+    stale = [path for path in paths if read_buckets_header(path) is None]
+    if stale:
+        rows = sum(map_shards(build_buckets, stale, args.workers))
+        print(f"Built {len(stale)} bucket files ({rows:,} puzzles)")
+    elif not (args.query or args.sample):
+        print("All bucket files are up to date")
+
+    if not (args.query or args.sample):
+        return
+    shards = [ShardBuckets(path) for path in paths]
+    try:
+        if args.query:
+            if len(args.query) != 81 or not args.query.isdigit():
+                print("Error: --query needs an 81-digit puzzle string")
+                exit(1)
+            print_matches(args.query, *find_similar(args.query, shards))
+        if args.sample:
+            puzzles = random_puzzles(shards, args.sample, random.Random(args.seed))
+            start = time.perf_counter()
+            results = [find_similar(puzzle, shards) for puzzle in puzzles]
+            elapsed = time.perf_counter() - start
+            with_matches = sum(1 for matches, _ in results if matches)
+            candidates = sum(checked for _, checked in results)
+            total_rows = sum(read_buckets_header(path)["rows"] for path in paths)
+            print(f"Queried {len(puzzles):,} puzzles against {total_rows:,}: "
+                  f"{candidates / max(len(puzzles), 1):.1f} candidates and "
+                  f"{elapsed / max(len(puzzles), 1) * 1000:.2f} ms per query, "
+                  f"{with_matches:,} ({with_matches / max(len(puzzles), 1):.1%}) have near duplicates")
+    finally:
+        for buckets in shards:
+            buckets.close()
+
+
+if __name__ == "__main__":
+    main()
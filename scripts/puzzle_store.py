@@ -0,0 +1,265 @@
+"""
+Packed binary puzzle store that sits next to the sudoku_N.csv shards.
+
+Each sudoku_N.csv can be converted to a sudoku_N.sdkp file with the layout:
+
+    header   16 bytes  magic b"SDKP", version (u16), record size (u16),
+                       record count (u32), 4 reserved bytes
+    records  84 bytes each
+             41 bytes  puzzle, one digit per 4 bits (high nibble first,
+                       the last low nibble is padding)
+             41 bytes  solution, same packing
+              1 byte   difficulty (index into DIFFICULTIES, 255 = unknown)
+              1 byte   empty cell count
+
+All integers are little-endian. Because the records have a fixed size,
+PuzzleStore memory-maps the file and reads puzzle N with one slice instead
+of parsing the CSV up to row N.
+
+Run this script from the project root:
+    py scripts/puzzle_store.py                 (convert every shard to .sdkp)
+    py scripts/puzzle_store.py --to-csv        (convert every .sdkp back to .csv)
+    py scripts/puzzle_store.py --benchmark     (compare size and read latency)
+"""
+
+import argparse
+import csv
+import itertools
+import mmap
+import os
+import random
+import struct
+import time
+from pathlib import Path
+
+from add_difficulty_column import get_difficulty
+from add_empty_cell_count import count_zeros
+from build_shards import atomic_open
+from extract_boards_from_csv import DIFFICULTIES, string_to_grid
+from instrumentation import instrumented
+from shard_io import find_shard, new_shard_path, open_shard, shard_number, sibling_path
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+
+MAGIC = b"SDKP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI4x")
+GRID_BYTES = 41
+RECORD_SIZE = 2 * GRID_BYTES + 2
+UNKNOWN_DIFFICULTY = 255
+
+CSV_HEADER = ["puzzle", "solution", "empty cell count", "Difficulty"]
+
+
+def pack_grid(grid_string):
+    """Pack an 81-digit string into 41 bytes, two digits per byte."""
+    # A string of digits is already valid hex, one nibble per digit
+    return bytes.fromhex(grid_string + '0')
+
+
+def unpack_grid(data):
+    """Unpack 41 bytes back into an 81-digit string."""
+    return data.hex()[:81]
+
+
+def difficulty_code(difficulty):
+    """Map a difficulty name to its one-byte code."""
+    try:
+        return DIFFICULTIES.index(difficulty)
+    except ValueError:
+        return UNKNOWN_DIFFICULTY
+
+
+def difficulty_name(code):
+    """Map a one-byte difficulty code back to its name."""
+    if code < len(DIFFICULTIES):
+        return DIFFICULTIES[code]
+    return "Unknown"
+
+
+def pack_record(puzzle, solution, empty_count, difficulty):
+    """Pack one puzzle/solution pair into a fixed-size record."""
+    return (pack_grid(puzzle) + pack_grid(solution)
+            + bytes((difficulty_code(difficulty), empty_count)))
+
+
+class PuzzleStore:
+    """Read-only, memory-mapped view of a .sdkp file."""
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self._file = open(self.file_path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{self.file_path.name} is not a version {VERSION} puzzle store")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the memory map and the file handle."""
+        self._mm.close()
+        self._file.close()
+
+    def _offset(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(f"record {index} out of range (0-{self.count - 1})")
+        return HEADER.size + index * RECORD_SIZE
+
+    def puzzle(self, index):
+        """Return puzzle N as a 9x9 grid, like string_to_grid."""
+        offset = self._offset(index)
+        return string_to_grid(unpack_grid(self._mm[offset:offset + GRID_BYTES]))
+
+    def solution(self, index):
+        """Return the solution of puzzle N as a 9x9 grid."""
+        offset = self._offset(index) + GRID_BYTES
+        return string_to_grid(unpack_grid(self._mm[offset:offset + GRID_BYTES]))
+
+    def record(self, index):
+        """Return (puzzle, solution, empty cell count, difficulty) as CSV values."""
+        offset = self._offset(index)
+        data = self._mm[offset:offset + RECORD_SIZE]
+        return (
+            unpack_grid(data[:GRID_BYTES]),
+            unpack_grid(data[GRID_BYTES:2 * GRID_BYTES]),
+            data[-1],
+            difficulty_name(data[-2]),
+        )
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.record(index)
+
+
+def csv_to_store(csv_path, store_path=None):
+    """Convert a sudoku_N.csv shard to a .sdkp store. Returns the record count."""
+    store_path = store_path or sibling_path(csv_path, '.sdkp')
+    print(f"Converting {csv_path.name} -> {store_path.name}...")
+
+    count = 0
+    with open_shard(csv_path) as infile, atomic_open(store_path, 'wb') as outfile:
+        reader = csv.reader(infile)
+        header = next(reader)
+        puzzle_idx = header.index("puzzle")
+        solution_idx = header.index("solution")
+        empty_idx = header.index("empty cell count") if "empty cell count" in header else None
+        difficulty_idx = header.index("Difficulty") if "Difficulty" in header else None
+
+        # Placeholder header, patched with the real count at the end
+        outfile.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0))
+        for row in reader:
+            if len(row) < 2:
+                continue
+            puzzle = row[puzzle_idx]
+            empty_count = int(row[empty_idx]) if empty_idx is not None else count_zeros(puzzle)
+            difficulty = row[difficulty_idx] if difficulty_idx is not None else get_difficulty(empty_count)
+            outfile.write(pack_record(puzzle, row[solution_idx], empty_count, difficulty))
+            count += 1
+
+        outfile.seek(0)
+        outfile.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, count))
+
+    print(f"  Stored {count:,} puzzles in {store_path.name}")
+    return count
+
+
+def store_to_csv(store_path, csv_path=None):
+    """Convert a .sdkp store back to the sudoku_N.csv layout. Returns the record count."""
+    csv_path = csv_path or new_shard_path(store_path.parent, shard_number(store_path))
+    print(f"Converting {store_path.name} -> {csv_path.name}...")
+
+    with PuzzleStore(store_path) as store, atomic_open(csv_path) as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(CSV_HEADER)
+        for puzzle, solution, empty_count, difficulty in store:
+            writer.writerow([puzzle, solution, str(empty_count), difficulty])
+        count = len(store)
+
+    print(f"  Wrote {count:,} rows to {csv_path.name}")
+    return count
+
+
+def store_paths(input_dir):
+    """Return the existing sudoku_N.sdkp paths, by shard number."""
+    return sorted(input_dir.glob("sudoku_*.sdkp"), key=shard_number)
+
+
+def benchmark(csv_path, reads=10000, csv_reads=20, seed=0):
+    """Compare file size and random-read latency of a CSV shard and its store."""
+    store_path = sibling_path(csv_path, '.sdkp')
+    if not store_path.exists():
+        csv_to_store(csv_path, store_path)
+
+    csv_size = os.path.getsize(csv_path)
+    store_size = os.path.getsize(store_path)
+    rng = random.Random(seed)
+
+    with PuzzleStore(store_path) as store:
+        count = len(store)
+        indices = [rng.randrange(count) for _ in range(reads)]
+        start = time.perf_counter()
+        for index in indices:
+            store.puzzle(index)
+        store_latency = (time.perf_counter() - start) / reads
+
+    # The CSV has to be scanned up to the requested row on every read
+    indices = [rng.randrange(count) for _ in range(csv_reads)]
+    start = time.perf_counter()
+    for index in indices:
+        with open_shard(csv_path) as infile:
+            reader = csv.reader(infile)
+            next(reader)
+            row = next(itertools.islice(reader, index, None))
+            string_to_grid(row[0])
+    csv_latency = (time.perf_counter() - start) / csv_reads
+
+    print(f"\nBenchmark for {csv_path.name} ({count:,} puzzles)")
+    print(f"  CSV size:    {csv_size:>14,} bytes ({csv_size / count:.1f} bytes/puzzle)")
+    print(f"  Store size:  {store_size:>14,} bytes ({store_size / count:.1f} bytes/puzzle)")
+    print(f"  CSV random read:   {csv_latency * 1e6:>12,.1f} us")
+    print(f"  Store random read: {store_latency * 1e6:>12,.1f} us")
+
+
+@instrumented
+def main():
+    """Convert shards between CSV and the packed store, or benchmark them."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--to-csv', action='store_true', help="convert .sdkp stores back to CSV")
+    parser.add_argument('--benchmark', action='store_true', help="benchmark sudoku_1 as CSV vs store")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+
+    if args.benchmark:
+        first_shard = find_shard(INPUT_DIR, 1)
+        if first_shard is None:
+            print(f"Error: sudoku_1.csv not found in {INPUT_DIR}")
+            exit(1)
+        benchmark(first_shard)
+    elif args.to_csv:
+        counts = map_shards(store_to_csv, store_paths(INPUT_DIR), args.workers)
+        print(f"\nSuccessfully converted {sum(counts):,} puzzles back to CSV")
+    else:
+        counts = map_shards(csv_to_store, shard_paths(INPUT_DIR), args.workers)
+        print(f"\nSuccessfully stored {sum(counts):,} puzzles")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,9 @@ const formatGrid = grid => {
   return `[\n${rows}\n    ]`;
 };
 
-const output = `[\n${boards.map(board => `  {\n    "Id": ${board.Id},\n    "puzzle": ${formatGrid(board.puzzle)},\n    "solution": ${formatGrid(board.solution)},\n    "difficulty": "${board.difficulty}"\n  }`).join(',\n')}\n]\n`;
+const formatHints = board => (board.hints === undefined ? '' : `,\n    "hints": ${JSON.stringify(board.hints)}`);
+
+const output = `[\n${boards.map(board => `  {\n    "Id": ${board.Id},\n    "puzzle": ${formatGrid(board.puzzle)},\n    "solution": ${formatGrid(board.solution)},\n    "difficulty": "${board.difficulty}"${formatHints(board)}\n  }`).join(',\n')}\n]\n`;
 
 fs.writeFileSync(boardsPath, output);
 
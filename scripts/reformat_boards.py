@@ -8,6 +8,8 @@ Run this script from the project root:
 import json
 from pathlib import Path
 
+from instrumentation import instrumented
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 BOARDS_DIR = PROJECT_ROOT / "data" / "boards"
@@ -43,10 +45,15 @@ def reformat_board_file(file_path):
                 outfile.write(f'    {row_str}\n')
         
         outfile.write('  ],\n')
-        outfile.write(f'  "difficulty": {json.dumps(data["difficulty"])}\n')
+        if 'hints' in data:
+            outfile.write(f'  "difficulty": {json.dumps(data["difficulty"])},\n')
+            outfile.write(f'  "hints": {json.dumps(data["hints"])}\n')
+        else:
+            outfile.write(f'  "difficulty": {json.dumps(data["difficulty"])}\n')
         outfile.write('}')
 
 
+@instrumented
 def main():
     """Reformat all board JSON files."""
     if not BOARDS_DIR.exists():
@@ -1,17 +1,26 @@
 """
 Script to remove duplicate "empty cell count" columns from all split Sudoku CSV files.
 
+Only needed for shards produced before add_empty_cell_count.py learned to skip
+shards that already have the column. Shards built by build_shards.py never
+contain duplicates.
+
 Run this script from the project root:
     py scripts/remove_duplicate_columns.py
+    py scripts/remove_duplicate_columns.py --workers 8
 """
 
+import argparse
 import csv
 from pathlib import Path
 
+from instrumentation import instrumented
+from shard_io import open_shard
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
-NUM_FILES = 20
 COLUMN_NAME = "empty cell count"
 
 
@@ -45,7 +54,7 @@ def process_file(file_path):
     
     # Read all rows
     rows = []
-    with open(file_path, 'r', encoding='utf-8') as infile:
+    with open_shard(file_path) as infile:
         reader = csv.reader(infile)
         header = next(reader)
         rows.append(header)
@@ -55,8 +64,8 @@ def process_file(file_path):
         if duplicate_count > 0:
             print(f"  Found {duplicate_count + 1} '{COLUMN_NAME}' columns, removing {duplicate_count} duplicate(s)...")
         else:
-            print(f"  No duplicates found, skipping...")
-            return
+            print("  No duplicates found, skipping...")
+            return 0
         
         # Read all data rows
         for row in reader:
@@ -66,33 +75,35 @@ def process_file(file_path):
     new_header, new_rows = remove_duplicate_columns(rows[0], rows[1:])
     
     # Write back to the same file
-    with open(file_path, 'w', encoding='utf-8', newline='') as outfile:
+    with open_shard(file_path, 'w', newline='') as outfile:
         writer = csv.writer(outfile)
         writer.writerow(new_header)
         writer.writerows(new_rows)
     
     print(f"  Completed {file_path.name}")
+    return duplicate_count
 
 
-def main():
-    """Process all 20 CSV files."""
-    print(f"Removing duplicate '{COLUMN_NAME}' columns from {NUM_FILES} CSV files...")
+@instrumented
+def main(workers=1):
+    """Process every CSV shard."""
+    paths = shard_paths(INPUT_DIR)
+    print(f"Removing duplicate '{COLUMN_NAME}' columns from {len(paths)} CSV files...")
     print(f"Directory: {INPUT_DIR}\n")
     
-    for file_num in range(1, NUM_FILES + 1):
-        file_path = INPUT_DIR / f"sudoku_{file_num}.csv"
-        if file_path.exists():
-            process_file(file_path)
-        else:
-            print(f"Warning: {file_path.name} not found, skipping...")
+    removed_per_shard = map_shards(process_file, paths, workers)
     
-    print(f"\nSuccessfully processed all files")
+    print(f"\nSuccessfully processed all files ({sum(removed_per_shard)} duplicate column(s) removed)")
     print(f"Output directory: {INPUT_DIR}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_workers_argument(parser)
+    args = parser.parse_args()
+    
     if not INPUT_DIR.exists():
         print(f"Error: {INPUT_DIR} not found!")
         exit(1)
     
-    main()
+    main(args.workers)
@@ -0,0 +1,241 @@
+"""
+Incremental, resumable runner for the board data pipeline.
+
+Stages, in order:
+    shards    kaggle_sudokus/sudoku.csv -> sudoku_N.csv   (build_shards.py)
+    extract   sudoku_N.csv -> data/boards/boardN.json      (extract_boards_from_csv.py)
+    combine   boardN.json -> data/boards/boards.json       (combine_boards.py)
+
+kaggle_sudokus/pipeline_manifest.json records, for each stage, a fingerprint
+of its parameters and of the content hashes of its inputs, plus the content
+hashes of the files it wrote. A stage is skipped when its fingerprint still
+matches and its outputs are unchanged on disk, so a rerun only costs the
+work whose inputs actually changed. Each fingerprint includes the hashes of
+the previous stage's outputs, so changing a get_difficulty threshold or
+PUZZLES_PER_DIFFICULTY reruns that stage and everything after it.
+
+The shards stage saves the manifest after every shard, together with the
+source offset where the next shard starts, so a rerun after a crash resumes
+from the first unfinished shard.
+
+Content hashes are cached in the manifest by file size and mtime, so
+unchanged files are not read again just to be hashed.
+
+The shard codec and level (SUDOKU_SHARD_CODEC / SUDOKU_SHARD_LEVEL, see
+shard_io.py) are part of the shards fingerprint, so switching codecs
+rebuilds the shards.
+
+Run this script from the project root:
+    py scripts/run_pipeline.py
+    py scripts/run_pipeline.py --workers 8 --seed 42
+    py scripts/run_pipeline.py --force extract
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import combine_boards
+import extract_boards_from_csv
+from add_difficulty_column import DIFFICULTY_THRESHOLDS
+from build_shards import NEW_COLUMNS, atomic_open, build_shards_from_file
+from instrumentation import instrumented, span
+from shard_io import codec_shard_path, shard_codec, shard_level
+from shard_pool import add_workers_argument
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+SOURCE_FILE = INPUT_DIR / "sudoku.csv"
+BOARDS_DIR = PROJECT_ROOT / "data" / "boards"
+MANIFEST_FILE = INPUT_DIR / "pipeline_manifest.json"
+NUM_FILES = 20
+
+MANIFEST_VERSION = 1
+STAGES = ["shards", "extract", "combine"]
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def fingerprint(stage, params, input_hashes):
+    """Hash a stage's name, parameters and input content hashes together."""
+    payload = json.dumps([stage, params, input_hashes], sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Manifest:
+    """The pipeline manifest plus a content-hash cache keyed by size and mtime."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {"version": MANIFEST_VERSION, "hashes": {}, "stages": {}}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as infile:
+                data = json.load(infile)
+            if data.get("version") == MANIFEST_VERSION:
+                self.data = data
+
+    def save(self):
+        """Write the manifest atomically."""
+        with atomic_open(self.path) as outfile:
+            json.dump(self.data, outfile, indent=2)
+
+    @staticmethod
+    def key(path):
+        """Return the manifest key of a path, relative to the project root."""
+        return Path(path).relative_to(PROJECT_ROOT).as_posix()
+
+    def file_hash(self, path):
+        """Return the content hash of a file, re-reading it only if it changed."""
+        stat = path.stat()
+        cached = self.data["hashes"].get(self.key(path))
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["hash"]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as infile:
+            for block in iter(lambda: infile.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        self.data["hashes"][self.key(path)] = {
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()
+        }
+        return digest.hexdigest()
+
+    def stage(self, name):
+        """Return the record of a stage (empty if it never ran)."""
+        return self.data["stages"].get(name, {})
+
+    def reset_stage(self, name, stage_fingerprint):
+        """Start a fresh record for a stage."""
+        record = {"fingerprint": stage_fingerprint, "complete": False, "outputs": {}}
+        self.data["stages"][name] = record
+        return record
+
+    def output_intact(self, key, expected_hash):
+        """Return True if a recorded output still exists with the same content."""
+        path = PROJECT_ROOT / key
+        return path.exists() and self.file_hash(path) == expected_hash
+
+    def outputs_intact(self, record):
+        """Return True if every recorded output of a stage is unchanged."""
+        return all(self.output_intact(key, expected) for key, expected in record["outputs"].items())
+
+
+def shard_key(file_num):
+    """Return the manifest key of shard file_num."""
+    return Manifest.key(codec_shard_path(INPUT_DIR, file_num))
+
+
+def run_shards_stage(manifest, force):
+    """Build the shards, resuming after the last finished shard when possible."""
+    params = {"num_files": NUM_FILES, "thresholds": DIFFICULTY_THRESHOLDS, "columns": NEW_COLUMNS,
+              "codec": shard_codec(), "level": shard_level(shard_codec())}
+    stage_fingerprint = fingerprint("shards", params, {"source": manifest.file_hash(SOURCE_FILE)})
+    record = manifest.stage("shards")
+
+    done = 0
+    if not force and record.get("fingerprint") == stage_fingerprint:
+        if record["complete"] and manifest.outputs_intact(record):
+            print("shards: up to date, skipping")
+            return record
+        # Resume after the leading run of finished shards that are still intact
+        while (str(done + 1) in record["shards"]
+               and manifest.output_intact(shard_key(done + 1), record["outputs"].get(shard_key(done + 1)))):
+            done += 1
+        record["complete"] = False
+        record["shards"] = {str(num): record["shards"][str(num)] for num in range(1, done + 1)}
+        record["outputs"] = {shard_key(num): record["outputs"][shard_key(num)] for num in range(1, done + 1)}
+        if done:
+            print(f"shards: resuming after sudoku_{done}.csv")
+    else:
+        record = manifest.reset_stage("shards", stage_fingerprint)
+        record["shards"] = {}
+
+    def on_shard_done(file_num, rows, end_offset):
+        record["outputs"][shard_key(file_num)] = manifest.file_hash(codec_shard_path(INPUT_DIR, file_num))
+        record["shards"][str(file_num)] = {"rows": rows, "end_offset": end_offset}
+        manifest.save()
+
+    start_offset = record["shards"][str(done)]["end_offset"] if done else None
+    if done < NUM_FILES:
+        with span("run_pipeline.shards"):
+            build_shards_from_file(SOURCE_FILE, INPUT_DIR, NUM_FILES, done + 1, start_offset, on_shard_done)
+    record["complete"] = True
+    manifest.save()
+    return record
+
+
+def run_stage(manifest, name, params, input_hashes, run, force):
+    """Run a whole-stage step unless its fingerprint and outputs are unchanged."""
+    stage_fingerprint = fingerprint(name, params, input_hashes)
+    record = manifest.stage(name)
+    if (not force and record.get("fingerprint") == stage_fingerprint
+            and record.get("complete") and manifest.outputs_intact(record)):
+        print(f"{name}: up to date, skipping")
+        return record
+
+    print(f"{name}: running")
+    record = manifest.reset_stage(name, stage_fingerprint)
+    manifest.save()
+    with span(f"run_pipeline.{name}"):
+        output_files = run()
+    for output_file in output_files:
+        record["outputs"][Manifest.key(output_file)] = manifest.file_hash(output_file)
+    record["complete"] = True
+    manifest.save()
+    return record
+
+
+def run_extract(workers, seed):
+    """Replace the numbered board files with a fresh extraction."""
+    for board_file in combine_boards.find_board_files(BOARDS_DIR):
+        board_file.unlink()
+    puzzles_by_difficulty = extract_boards_from_csv.collect_puzzles(workers, seed)
+    extract_boards_from_csv.extract_and_save_boards(puzzles_by_difficulty)
+    return combine_boards.find_board_files(BOARDS_DIR)
+
+
+def run_combine():
+    """Combine the numbered board files into boards.json."""
+    combine_boards.combine()
+    return [BOARDS_DIR / 'boards.json']
+
+
+@instrumented
+def main():
+    """Run every stage whose inputs changed since the last run."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0, help="board extraction seed (default: 0)")
+    parser.add_argument('--force', choices=STAGES, help="rerun this stage and everything after it")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not SOURCE_FILE.exists():
+        print(f"Error: {SOURCE_FILE} not found!")
+        print("Make sure you've downloaded the dataset first.")
+        exit(1)
+
+    forced = STAGES.index(args.force) if args.force else len(STAGES)
+    manifest = Manifest(MANIFEST_FILE)
+
+    try:
+        shards = run_shards_stage(manifest, force=forced <= 0)
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    extract_params = {
+        "per_difficulty": extract_boards_from_csv.PUZZLES_PER_DIFFICULTY,
+        "difficulties": extract_boards_from_csv.DIFFICULTIES,
+        "seed": args.seed,
+    }
+    extract = run_stage(manifest, "extract", extract_params, shards["outputs"],
+                        lambda: run_extract(args.workers, args.seed), force=forced <= 1)
+
+    run_stage(manifest, "combine", {}, extract["outputs"], run_combine, force=forced <= 2)
+
+    print(f"\nPipeline complete. Manifest: {MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    main()
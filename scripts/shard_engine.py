@@ -0,0 +1,277 @@
+"""
+Vectorized shard engine for empty counts, difficulty and consistency checks.
+
+Shards are read in large chunks. With NumPy installed each chunk becomes two
+uint8 arrays of shape (rows, 81) and everything is computed with whole-array
+operations:
+- empty cell count, as one reduction over the puzzle array
+- difficulty, with the same thresholds as get_difficulty
+- every given matches its solution cell
+- every solution row, column and box is a permutation of 1-9
+
+Without NumPy (or with --engine python) the same results come from a plain
+Python loop, so the script works everywhere, just more slowly.
+
+By default the script audits the shards and reports mismatches against their
+existing columns. With --write, shards without the "empty cell count" and
+"Difficulty" columns get them appended.
+
+Run this script from the project root:
+    py scripts/shard_engine.py
+    py scripts/shard_engine.py --workers 8 --engine numpy
+    py scripts/shard_engine.py --write
+"""
+
+import argparse
+import csv
+import itertools
+import time
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from add_difficulty_column import DIFFICULTY_THRESHOLDS
+from build_shards import NEW_COLUMNS, atomic_open
+from extract_boards_from_csv import DIFFICULTIES
+from instrumentation import instrumented
+from shard_io import open_shard
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+CHUNK_ROWS = 1 << 16
+
+# Difficulty thresholds in ascending order, for np.searchsorted
+ASCENDING_MINIMUMS = [minimum for minimum, _ in reversed(DIFFICULTY_THRESHOLDS)]
+ASCENDING_NAMES = ["Easy"] + [difficulty for _, difficulty in reversed(DIFFICULTY_THRESHOLDS)]
+ALL_DIGITS = 0x1FF
+
+# Cell indices of every row, column and box, for the pure-Python checks
+UNITS = (
+    [[r * 9 + c for c in range(9)] for r in range(9)]
+    + [[r * 9 + c for r in range(9)] for c in range(9)]
+    + [[(br + r) * 9 + bc + c for r in range(3) for c in range(3)]
+       for br in (0, 3, 6) for bc in (0, 3, 6)]
+)
+
+
+def numpy_available():
+    """Return True if the NumPy engine can be used."""
+    return np is not None
+
+
+def analyze_chunk_numpy(puzzles, solutions):
+    """
+    Analyze a chunk of 81-byte puzzle and solution strings with NumPy.
+
+    Returns (empty counts, difficulty names, given mismatch flags,
+    invalid solution flags), one entry per row.
+    """
+    rows = len(puzzles)
+    puzzle_grid = np.frombuffer(b''.join(puzzles), dtype=np.uint8).reshape(rows, 81) - ord('0')
+    solution_grid = np.frombuffer(b''.join(solutions), dtype=np.uint8).reshape(rows, 81) - ord('0')
+
+    empty_counts = np.count_nonzero(puzzle_grid == 0, axis=1)
+    difficulty_codes = np.searchsorted(ASCENDING_MINIMUMS, empty_counts, side='right')
+
+    given_mismatch = np.any((puzzle_grid != 0) & (puzzle_grid != solution_grid), axis=1)
+
+    # Each unit is a permutation of 1-9 exactly when its digit bits OR to 0x1FF
+    in_range = np.all((solution_grid >= 1) & (solution_grid <= 9), axis=1)
+    bits = np.left_shift(np.uint16(1), np.clip(solution_grid, 1, 9).astype(np.uint16) - 1)
+    by_row = bits.reshape(rows, 9, 9)
+    by_box = bits.reshape(rows, 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(rows, 9, 9)
+    units_ok = (
+        np.all(np.bitwise_or.reduce(by_row, axis=2) == ALL_DIGITS, axis=1)
+        & np.all(np.bitwise_or.reduce(by_row, axis=1) == ALL_DIGITS, axis=1)
+        & np.all(np.bitwise_or.reduce(by_box, axis=2) == ALL_DIGITS, axis=1)
+    )
+    invalid_solution = ~(in_range & units_ok)
+
+    difficulties = [ASCENDING_NAMES[code] for code in difficulty_codes.tolist()]
+    return empty_counts.tolist(), difficulties, given_mismatch.tolist(), invalid_solution.tolist()
+
+
+def solution_is_valid(solution):
+    """Return True if every row, column and box of the solution is 1-9 once."""
+    if len(solution) != 81 or not solution.isdigit() or b'0' in solution:
+        return False
+    for unit in UNITS:
+        mask = 0
+        for cell in unit:
+            mask |= 1 << (solution[cell] - 49)  # ord('1') == 49
+        if mask != ALL_DIGITS:
+            return False
+    return True
+
+
+def analyze_chunk_python(puzzles, solutions):
+    """Pure-Python fallback for analyze_chunk_numpy with identical results."""
+    empty_counts = []
+    difficulties = []
+    given_mismatch = []
+    invalid_solution = []
+    for puzzle, solution in zip(puzzles, solutions):
+        empty_count = puzzle.count(b'0')
+        empty_counts.append(empty_count)
+        code = sum(1 for minimum in ASCENDING_MINIMUMS if empty_count >= minimum)
+        difficulties.append(ASCENDING_NAMES[code])
+        given_mismatch.append(any(p != 48 and p != s for p, s in zip(puzzle, solution)))
+        invalid_solution.append(not solution_is_valid(solution))
+    return empty_counts, difficulties, given_mismatch, invalid_solution
+
+
+def get_analyzer(engine):
+    """Return the chunk analyzer for --engine auto, numpy or python."""
+    if engine == 'numpy' or (engine == 'auto' and numpy_available()):
+        if not numpy_available():
+            raise RuntimeError("NumPy is not installed; use --engine python")
+        return analyze_chunk_numpy
+    return analyze_chunk_python
+
+
+def read_chunks(infile, puzzle_idx, solution_idx, chunk_rows):
+    """
+    Yield (lines, rows, puzzles, solutions) chunks from a binary shard file.
+
+    rows are the indices into lines of the rows with an 81-character puzzle
+    and solution; the other lines cannot be analyzed.
+    """
+    width = max(puzzle_idx, solution_idx)
+    while True:
+        lines = list(itertools.islice(infile, chunk_rows))
+        if not lines:
+            return
+        rows = []
+        puzzles = []
+        solutions = []
+        for row, line in enumerate(lines):
+            values = line.rstrip(b'\r\n').split(b',')
+            if len(values) > width and len(values[puzzle_idx]) == 81 and len(values[solution_idx]) == 81:
+                rows.append(row)
+                puzzles.append(values[puzzle_idx])
+                solutions.append(values[solution_idx])
+        yield lines, rows, puzzles, solutions
+
+
+def process_file(file_path, engine='auto', write=False, chunk_rows=CHUNK_ROWS):
+    """Analyze one shard, optionally appending the computed columns. Returns its stats."""
+    analyze = get_analyzer(engine)
+    stats = {
+        "rows": 0,
+        "unreadable": 0,
+        "seconds": 0.0,
+        "difficulties": {difficulty: 0 for difficulty in DIFFICULTIES},
+        "given_mismatch": 0,
+        "invalid_solution": 0,
+        "count_mismatch": 0,
+        "difficulty_mismatch": 0,
+    }
+    print(f"Processing {file_path.name}...")
+    start = time.perf_counter()
+
+    with open_shard(file_path, 'rb') as infile:
+        header_line = infile.readline()
+    header = next(csv.reader([header_line.decode('utf-8')]))
+    puzzle_idx = header.index("puzzle")
+    solution_idx = header.index("solution")
+    empty_idx = header.index("empty cell count") if "empty cell count" in header else None
+    difficulty_idx = header.index("Difficulty") if "Difficulty" in header else None
+
+    if write and any(column in header for column in NEW_COLUMNS):
+        print(f"  {file_path.name} already has its columns, auditing only...")
+        write = False
+
+    # The shard is opened inside atomic_open so it is closed before it is
+    # replaced (Windows cannot replace an open file)
+    with (atomic_open(file_path, 'wb') if write else nullcontext()) as outfile, \
+            open_shard(file_path, 'rb') as infile:
+        infile.readline()
+        if write:
+            outfile.write(header_line.rstrip(b'\r\n') + b',' + ','.join(NEW_COLUMNS).encode() + b'\r\n')
+
+        for lines, rows, puzzles, solutions in read_chunks(infile, puzzle_idx, solution_idx, chunk_rows):
+            empty_counts, difficulties, given_mismatch, invalid_solution = analyze(puzzles, solutions)
+            stats["rows"] += len(rows)
+            stats["unreadable"] += sum(1 for line in lines if line.strip()) - len(rows)
+            stats["given_mismatch"] += sum(given_mismatch)
+            stats["invalid_solution"] += sum(invalid_solution)
+            for difficulty in difficulties:
+                if difficulty in stats["difficulties"]:
+                    stats["difficulties"][difficulty] += 1
+
+            if empty_idx is not None or difficulty_idx is not None:
+                for row, empty_count, difficulty in zip(rows, empty_counts, difficulties):
+                    values = lines[row].rstrip(b'\r\n').split(b',')
+                    # Compared as bytes, so blank, missing or non-numeric values count as mismatches
+                    if empty_idx is not None:
+                        stored = values[empty_idx].strip() if len(values) > empty_idx else b''
+                        if stored != b'%d' % empty_count:
+                            stats["count_mismatch"] += 1
+                    if difficulty_idx is not None:
+                        stored = values[difficulty_idx] if len(values) > difficulty_idx else b''
+                        if stored != difficulty.encode('ascii'):
+                            stats["difficulty_mismatch"] += 1
+
+            if write:
+                # Rows that cannot be analyzed are kept, with blank computed columns
+                computed = [b','] * len(lines)
+                for row, empty_count, difficulty in zip(rows, empty_counts, difficulties):
+                    computed[row] = b'%d,%s' % (empty_count, difficulty.encode('ascii'))
+                outfile.writelines(
+                    b'%s,%s\r\n' % (line.rstrip(b'\r\n'), values) if line.strip() else line
+                    for line, values in zip(lines, computed)
+                )
+
+    stats["seconds"] = time.perf_counter() - start
+    rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"  {stats['rows']:,} rows in {stats['seconds']:.2f}s ({rate:,.0f} rows/s)")
+    return stats
+
+
+@instrumented
+def main():
+    """Run the engine over every shard and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--engine', choices=['auto', 'numpy', 'python'], default='auto',
+                        help="computation engine (default: numpy when installed)")
+    parser.add_argument('--write', action='store_true',
+                        help="append the computed columns to shards that lack them")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="rows per chunk")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+    try:
+        get_analyzer(args.engine)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    print(f"Using the {'numpy' if get_analyzer(args.engine) is analyze_chunk_numpy else 'python'} engine\n")
+    process = partial(process_file, engine=args.engine, write=args.write, chunk_rows=args.chunk_rows)
+    results = map_shards(process, shard_paths(INPUT_DIR), args.workers)
+
+    totals = {key: sum(stats[key] for stats in results)
+              for key in ("rows", "unreadable", "given_mismatch", "invalid_solution", "count_mismatch", "difficulty_mismatch")}
+    print(f"\nProcessed {totals['rows']:,} rows")
+    if totals["unreadable"]:
+        print(f"Rows without an 81-digit puzzle and solution (not analyzed): {totals['unreadable']:,}")
+    for difficulty in DIFFICULTIES:
+        print(f"  {difficulty}: {sum(stats['difficulties'][difficulty] for stats in results):,}")
+    print(f"Givens not matching their solution: {totals['given_mismatch']:,}")
+    print(f"Invalid solutions: {totals['invalid_solution']:,}")
+    print(f"Stored empty cell counts that differ: {totals['count_mismatch']:,}")
+    print(f"Stored difficulties that differ: {totals['difficulty_mismatch']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Offset index over the sudoku_N.csv shards.
+
+For each shard a sudoku_N.idx file maps every "Difficulty" value and every
+"empty cell count" value to the byte offsets of the matching rows, so
+extraction, sampling and ad-hoc lookups can seek straight to the rows they
+need instead of re-reading whole shards.
+
+Index layout:
+    line 1   JSON header with the shard size and mtime the index was built
+             from, the row count, and for each column value the
+             [start, count] slice of the offsets block that holds its rows
+    rest     offsets block, unsigned 64-bit little-endian integers
+
+An index is rebuilt automatically when its shard's size or mtime changes.
+For compressed shards (see shard_io.py) the offsets are positions in the
+decompressed rows; reading them decompresses the shard up to the last
+requested row, so lookups still work but no longer skip the reading.
+
+Run this script from the project root:
+    py scripts/shard_index.py                          (build missing/stale indexes)
+    py scripts/shard_index.py --empty 52 --limit 500   (print puzzles with 52 blanks)
+    py scripts/shard_index.py --difficulty Hard --limit 10 --output hard.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from build_shards import atomic_open
+from instrumentation import instrumented
+from shard_io import open_shard, sibling_path
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+
+INDEX_VERSION = 1
+INDEXED_COLUMNS = ["Difficulty", "empty cell count"]
+
+
+def index_path(shard_path):
+    """Return the index file path for a shard."""
+    return sibling_path(shard_path, '.idx')
+
+
+def _to_little_endian(offsets):
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets
+
+
+def build_index(shard_path):
+    """Scan a shard once and write its offset index. Returns the header."""
+    print(f"Indexing {shard_path.name}...")
+    stat = shard_path.stat()
+    offsets_by_column = {column: {} for column in INDEXED_COLUMNS}
+
+    rows = 0
+    with open_shard(shard_path, 'rb') as infile:
+        header = next(csv.reader([infile.readline().decode('utf-8')]))
+        try:
+            column_indices = {column: header.index(column) for column in INDEXED_COLUMNS}
+        except ValueError as e:
+            raise ValueError(f"required column not found in {shard_path.name}: {e}")
+        width = max(column_indices.values())
+
+        offset = infile.tell()
+        for line in infile:
+            # Shard values are plain digits and words, so no CSV quoting to handle
+            values = line.rstrip(b'\r\n').split(b',')
+            if len(values) > width:
+                for column, idx in column_indices.items():
+                    key = values[idx].decode('ascii')
+                    offsets = offsets_by_column[column].get(key)
+                    if offsets is None:
+                        offsets = offsets_by_column[column][key] = array('Q')
+                    offsets.append(offset)
+                rows += 1
+            offset += len(line)
+
+    index_header = {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": rows,
+    }
+    blocks = []
+    start = 0
+    for column in INDEXED_COLUMNS:
+        index_header[column] = {}
+        for key in sorted(offsets_by_column[column], key=_sort_key):
+            offsets = offsets_by_column[column][key]
+            index_header[column][key] = [start, len(offsets)]
+            blocks.append(offsets)
+            start += len(offsets)
+
+    with atomic_open(index_path(shard_path), 'wb') as outfile:
+        outfile.write(json.dumps(index_header).encode('utf-8') + b'\n')
+        for offsets in blocks:
+            outfile.write(_to_little_endian(offsets).tobytes())
+
+    print(f"  Indexed {rows:,} rows of {shard_path.name}")
+    return index_header
+
+
+def _sort_key(key):
+    return (0, int(key), key) if key.isdigit() else (1, 0, key)
+
+
+def read_index_header(shard_path):
+    """Return the index header of a shard, or None if it is missing or stale."""
+    path = index_path(shard_path)
+    if not path.exists():
+        return None
+    with open(path, 'rb') as infile:
+        index_header = json.loads(infile.readline())
+    stat = shard_path.stat()
+    if (index_header.get("version") != INDEX_VERSION
+            or index_header["size"] != stat.st_size
+            or index_header["mtime_ns"] != stat.st_mtime_ns):
+        return None
+    return index_header
+
+
+def load_index_header(shard_path):
+    """Return an up-to-date index header, rebuilding the index when needed."""
+    index_header = read_index_header(shard_path)
+    if index_header is None:
+        index_header = build_index(shard_path)
+    return index_header
+
+
+def ensure_index(shard_path):
+    """Build the index of a shard if it is missing or stale. Returns its row count."""
+    return load_index_header(shard_path)["rows"]
+
+
+def count_matches(index_header, column, key):
+    """Return how many rows of a shard have the given column value."""
+    return index_header[column].get(str(key), [0, 0])[1]
+
+
+def read_offsets(shard_path, column, key, index_header=None):
+    """Return the byte offsets of the rows whose column equals key."""
+    index_header = index_header or load_index_header(shard_path)
+    start, count = index_header[column].get(str(key), [0, 0])
+    offsets = array('Q')
+    with open(index_path(shard_path), 'rb') as infile:
+        infile.readline()
+        infile.seek(start * offsets.itemsize, os.SEEK_CUR)
+        offsets.frombytes(infile.read(count * offsets.itemsize))
+    return _to_little_endian(offsets)
+
+
+def read_offsets_at(shard_path, column, key, positions, index_header):
+    """Return only the offsets at the given positions within a column value's rows."""
+    start = index_header[column][str(key)][0]
+    offsets = array('Q')
+    with open(index_path(shard_path), 'rb') as infile:
+        base = len(infile.readline())
+        for position in positions:
+            infile.seek(base + (start + position) * offsets.itemsize)
+            offsets.frombytes(infile.read(offsets.itemsize))
+    return _to_little_endian(offsets)
+
+
+def read_rows(shard_path, offsets):
+    """Read the CSV rows at the given byte offsets, in offset order."""
+    rows = []
+    with open_shard(shard_path, 'rb') as infile:
+        for offset in sorted(offsets):
+            infile.seek(offset)
+            rows.append(next(csv.reader([infile.readline().decode('utf-8')])))
+    return rows
+
+
+def read_header(shard_path):
+    """Return the CSV header row of a shard."""
+    with open_shard(shard_path) as infile:
+        return next(csv.reader(infile))
+
+
+def lookup(paths, column, key, limit=None):
+    """Yield the rows of all shards whose column equals key, up to limit rows."""
+    remaining = limit
+    for shard_path in paths:
+        if remaining is not None and remaining <= 0:
+            return
+        offsets = read_offsets(shard_path, column, key)
+        if remaining is not None:
+            offsets = offsets[:remaining]
+            remaining -= len(offsets)
+        yield from read_rows(shard_path, offsets)
+
+
+def sample_rows(paths, column, key, k, rng):
+    """
+    Pick k random rows whose column equals key, uniformly across all shards.
+
+    Only the index headers and the selected rows are read, so the cost does
+    not depend on how many rows match.
+    """
+    headers = [load_index_header(shard_path) for shard_path in paths]
+    counts = [count_matches(index_header, column, key) for index_header in headers]
+    total = sum(counts)
+    positions = sorted(rng.sample(range(total), min(k, total)))
+
+    rows = []
+    base = 0
+    for shard_path, index_header, count in zip(paths, headers, counts):
+        chosen = [pos - base for pos in positions if base <= pos < base + count]
+        if chosen:
+            offsets = read_offsets_at(shard_path, column, key, chosen, index_header)
+            rows.extend(read_rows(shard_path, offsets))
+        base += count
+    return rows
+
+
+@instrumented
+def main():
+    """Build the shard indexes and optionally look rows up through them."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--difficulty', help="print puzzles with this Difficulty value")
+    parser.add_argument('--empty', type=int, help="print puzzles with this many empty cells")
+    parser.add_argument('--limit', type=int, help="maximum number of puzzles to print")
+    parser.add_argument('--output', type=Path, help="write matching rows to this CSV file instead")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+
+    paths = shard_paths(INPUT_DIR)
+    if not paths:
+        print(f"Error: no shards found in {INPUT_DIR}")
+        exit(1)
+    rows = map_shards(ensure_index, paths, args.workers)
+    print(f"\nIndexes up to date for {len(paths)} shards ({sum(rows):,} rows)")
+
+    if args.difficulty is None and args.empty is None:
+        return
+    if args.difficulty is not None and args.empty is not None:
+        print("Error: use either --difficulty or --empty, not both")
+        exit(1)
+
+    if args.difficulty is not None:
+        column, key = "Difficulty", args.difficulty
+    else:
+        column, key = "empty cell count", args.empty
+    matches = lookup(paths, column, key, args.limit)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(read_header(paths[0]))
+            written = 0
+            for row in matches:
+                writer.writerow(row)
+                written += 1
+        print(f"Wrote {written:,} rows to {args.output}")
+    else:
+        for row in matches:
+            print(','.join(row))
+
+
+if __name__ == "__main__":
+    main()
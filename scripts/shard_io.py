@@ -0,0 +1,164 @@
+"""
+Shared I/O for the sudoku_N.csv shards, plain or compressed.
+
+A shard can be stored as sudoku_N.csv, sudoku_N.csv.gz or sudoku_N.csv.xz.
+The data is only digits, commas and a few difficulty names, so even the
+fastest levels shrink a shard to under half its size, and stages that are
+bound by disk I/O read and write that much less. Every script finds its shards through
+shard_paths()/find_shard() and opens them with open_shard(), which picks
+the codec from the file name, so the scripts work the same on any mix of
+plain and compressed shards. Writes through build_shards.atomic_open are
+compressed the same way.
+
+Compressed streams are read and written through BLOCK_SIZE buffers, so the
+codec is called once per block rather than once per line. Seeking in a
+compressed shard (the offset indexes in shard_index.py) works on the
+uncompressed byte offsets, but is emulated by decompressing forward, so it
+pays off only for sorted offsets, which is how read_rows reads them.
+
+Scripts that create shards from scratch write them with the codec in the
+environment, so process-pool workers and pipeline subprocesses inherit it:
+
+    SUDOKU_SHARD_CODEC=csv|gz|xz  codec for new shards (default: csv)
+    SUDOKU_SHARD_LEVEL=N          gzip level 1-9 / xz preset 0-9
+                                  (default: DEFAULT_LEVELS)
+
+If one shard number exists in several codecs, the newest file wins.
+benchmark_pipeline.py --codecs compares codecs and levels end to end.
+
+This module is imported by the other scripts and is not run directly.
+"""
+
+import gzip
+import io
+import lzma
+import os
+import re
+
+SHARD_CODEC_VAR = "SUDOKU_SHARD_CODEC"
+SHARD_LEVEL_VAR = "SUDOKU_SHARD_LEVEL"
+
+# Codec name -> file suffix after .csv
+CODECS = {"csv": "", "gz": ".gz", "xz": ".xz"}
+# Higher levels save a few percent more for several times the CPU
+DEFAULT_LEVELS = {"gz": 1, "xz": 0}
+LEVEL_RANGES = {"gz": range(1, 10), "xz": range(0, 10)}
+BLOCK_SIZE = 1 << 20
+
+SHARD_NAME = re.compile(r"^sudoku_(\d+)\.csv(\.gz|\.xz)?$")
+SHARD_FILE_NAME = re.compile(r"^sudoku_(\d+)\.")
+
+
+def shard_codec():
+    """Return the codec for new shards, from SUDOKU_SHARD_CODEC."""
+    codec = os.environ.get(SHARD_CODEC_VAR, "csv") or "csv"
+    if codec not in CODECS:
+        raise ValueError(f"{SHARD_CODEC_VAR} must be one of {', '.join(CODECS)}, not {codec!r}")
+    return codec
+
+
+def shard_level(codec):
+    """Return the compression level for a codec, from SUDOKU_SHARD_LEVEL."""
+    return parse_level(codec, os.environ.get(SHARD_LEVEL_VAR))
+
+
+def parse_level(codec, level):
+    """Validate a level string for a codec; empty means its default level."""
+    if codec == "csv":
+        return None
+    if not level:
+        return DEFAULT_LEVELS[codec]
+    if not level.isdigit() or int(level) not in LEVEL_RANGES[codec]:
+        levels = LEVEL_RANGES[codec]
+        raise ValueError(f"{SHARD_LEVEL_VAR} for {codec} must be {levels.start}-{levels.stop - 1}, not {level!r}")
+    return int(level)
+
+
+def codec_of(file_path):
+    """Return the codec of a file from its name ("csv" for anything not compressed)."""
+    name = str(file_path)
+    for codec, suffix in CODECS.items():
+        if suffix and name.endswith(suffix):
+            return codec
+    return "csv"
+
+
+def shard_number(file_path):
+    """Return N for a shard or one of its files (sudoku_N.csv.gz, sudoku_N.idx, ...)."""
+    match = SHARD_FILE_NAME.match(file_path.name)
+    if not match:
+        raise ValueError(f"{file_path.name} is not a shard file name")
+    return int(match.group(1))
+
+
+def sibling_path(shard_path, suffix):
+    """Return the path of a file that belongs to a shard, e.g. its .idx index."""
+    return shard_path.with_name(f"sudoku_{shard_number(shard_path)}{suffix}")
+
+
+def shard_candidates(input_dir, file_num):
+    """Return the paths shard file_num could be stored at, one per codec."""
+    return [input_dir / f"sudoku_{file_num}.csv{suffix}" for suffix in CODECS.values()]
+
+
+def find_shard(input_dir, file_num):
+    """Return the path of shard file_num in any codec (the newest if several), or None."""
+    existing = [path for path in shard_candidates(input_dir, file_num) if path.exists()]
+    if not existing:
+        return None
+    return max(existing, key=lambda path: path.stat().st_mtime_ns)
+
+
+def codec_shard_path(output_dir, file_num, codec=None):
+    """Return the path of shard file_num in a codec (default: the configured one)."""
+    return output_dir / f"sudoku_{file_num}.csv{CODECS[codec or shard_codec()]}"
+
+
+def new_shard_path(output_dir, file_num, codec=None):
+    """
+    Return the path to write shard file_num to with the configured codec.
+
+    Copies of the shard in other codecs are removed, since the new file
+    replaces them.
+    """
+    file_path = codec_shard_path(output_dir, file_num, codec)
+    for path in shard_candidates(output_dir, file_num):
+        if path != file_path and path.exists():
+            path.unlink()
+    return file_path
+
+
+def find_shard_files(input_dir):
+    """Return every shard file in a directory, in any codec, by shard number."""
+    paths = [path for path in input_dir.glob("sudoku_*.csv*") if SHARD_NAME.match(path.name)]
+    return sorted(paths, key=shard_number)
+
+
+def open_shard(file_path, mode='r', newline=None, codec=None, level=None):
+    """
+    Open a shard like open(), decompressing or compressing by its name.
+
+    Text modes use UTF-8. codec overrides the name (for temp files), and
+    level the SUDOKU_SHARD_LEVEL setting when writing.
+    """
+    codec = codec or codec_of(file_path)
+    binary = 'b' in mode
+    raw_mode = mode.replace('t', '').replace('b', '') + 'b'
+
+    if codec == "csv":
+        if binary:
+            return open(file_path, mode, buffering=BLOCK_SIZE)
+        return open(file_path, mode, buffering=BLOCK_SIZE, encoding='utf-8', newline=newline)
+
+    writing = raw_mode != 'rb'
+    if writing:
+        level = shard_level(codec) if level is None else level
+    if codec == "gz":
+        # mtime=0 keeps the bytes reproducible, for the pipeline's content hashes
+        stream = gzip.GzipFile(file_path, raw_mode, compresslevel=level if writing else 9, mtime=0)
+    else:
+        stream = lzma.LZMAFile(file_path, raw_mode, preset=level if writing else None)
+    stream = io.BufferedWriter(stream, BLOCK_SIZE) if writing else io.BufferedReader(stream, BLOCK_SIZE)
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8', newline=newline)
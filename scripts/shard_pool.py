@@ -0,0 +1,88 @@
+"""
+Shared helpers for running a function over the split sudoku_N.csv files.
+
+The shards are independent of each other, so scripts that walk them accept
+--workers N to fan the shards out to a process pool. Results are always
+returned in shard order, whatever order the workers finish in, so the
+aggregated output is the same as a single-core run.
+
+This module is imported by the other scripts and is not run directly.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from instrumentation import Progress, current_span_name, item_path, shard_call, stage_name
+from shard_io import find_shard, find_shard_files, shard_number
+
+
+def add_workers_argument(parser):
+    """Add the shared --workers option to an argparse parser."""
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="number of shards to process in parallel (0 = one per CPU core, default: 1)"
+    )
+
+
+def resolve_workers(workers):
+    """Turn a --workers value into a process count."""
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def shard_paths(input_dir):
+    """
+    Return the paths of every shard in input_dir (in any codec), in shard order.
+
+    The shards are found on disk rather than counted, so the stages follow
+    whatever --num-files the shards were split into. Gaps in the numbering
+    are reported as missing shards.
+    """
+    file_nums = sorted({shard_number(path) for path in find_shard_files(input_dir)})
+    present = set(file_nums)
+    for file_num in range(1, (file_nums[-1] if file_nums else 0) + 1):
+        if file_num not in present:
+            print(f"Warning: sudoku_{file_num}.csv not found, skipping...")
+    return [find_shard(input_dir, file_num) for file_num in file_nums]
+
+
+def map_shards(func, paths, workers=1):
+    """
+    Call func on every shard path and return the results in shard order.
+
+    func must be a module-level function so it can be sent to the worker
+    processes. With a single worker everything runs in this process. Each
+    call is recorded as an instrumentation span, and a progress line
+    tracks the shards (by size, when they are files) as they finish.
+    """
+    paths = list(paths)
+    workers = min(resolve_workers(workers), len(paths))
+    call = partial(shard_call, func, stage_name(func), current_span_name())
+    files = [item_path(path) for path in paths]
+    if all(file_path and file_path.exists() for file_path in files):
+        sizes = [file_path.stat().st_size for file_path in files]
+        progress = Progress(stage_name(func), sum(sizes))
+    else:
+        sizes = [1] * len(paths)
+        progress = Progress(stage_name(func), len(paths), unit="items")
+
+    if workers <= 1:
+        results = map(call, paths)
+        executor = None
+    else:
+        print(f"Processing {len(paths)} shards with {workers} workers...")
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(call, paths)
+
+    try:
+        collected = []
+        for result, size in zip(results, sizes):
+            collected.append(result)
+            progress.update(size)
+        return collected
+    finally:
+        progress.close()
+        if executor:
+            executor.shutdown()
@@ -0,0 +1,393 @@
+"""
+Script to sort the whole dataset by difficulty into range-partitioned shards.
+
+The shards are in download order, so finding "the next 1,000 hardest
+puzzles" means scanning all of them. This script reorders the dataset with
+an external merge sort, so memory stays bounded however big it is:
+
+1. Every shard is read in runs of --run-rows rows. Each run is sorted in
+   memory and spilled to a temp file in sort_work/ (shards in parallel
+   with --workers).
+2. The runs are k-way merged with heapq.merge, at most MERGE_FANIN at a
+   time (more runs are first merged in passes), and streamed into
+   --num-files output shards of equal row counts in kaggle_sudokus/sorted/.
+3. sorted/ranges.json records the key interval every output shard covers:
+
+    {"version": 1, "key": ["Difficulty", "empty cell count"], "rows": 9000000,
+     "sources": {"sudoku_1.csv": [size, mtime_ns], ...},
+     "shards": [{"file": "sudoku_1.csv", "rows": 450000,
+                 "first": ["Easy", 18], "last": ["Easy", 24]}, ...]}
+
+The default key is (Difficulty from Easy to Advanced, empty cell count).
+--by COLUMN sorts by any numeric column instead, e.g. "technique score"
+from difficulty_grader.py --write. Rows with equal keys keep their original
+order. Output shards use the SUDOKU_SHARD_CODEC codec (see shard_io.py).
+
+With the ranges, a query only opens the shards whose interval overlaps it
+and reads them sequentially: --query prints the rows between two keys
+(written Hard:45, or just Hard for a whole difficulty, or a number with
+--by), --top N prints the N highest-keyed rows.
+
+Run this script from the project root:
+    py scripts/sort_shards.py --workers 8
+    py scripts/sort_shards.py --by "technique score" --run-rows 200000
+    py scripts/sort_shards.py --query Hard:45 Hard:50
+    py scripts/sort_shards.py --top 1000 --output hardest.csv
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import shutil
+from collections import deque
+from functools import partial
+from pathlib import Path
+
+from build_shards import atomic_open
+from extract_boards_from_csv import DIFFICULTIES
+from instrumentation import instrumented
+from shard_io import new_shard_path, open_shard, shard_number
+from shard_pool import add_workers_argument, map_shards, shard_paths
+from split_sudoku_csv import remove_stale_shards
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+OUTPUT_DIR = INPUT_DIR / "sorted"
+WORK_DIR = INPUT_DIR / "sort_work"
+RANGES_FILE = "ranges.json"
+NUM_FILES = 20
+
+RANGES_VERSION = 1
+DEFAULT_KEY = ["Difficulty", "empty cell count"]
+RUN_ROWS = 500000
+MERGE_FANIN = 64
+
+DIFFICULTY_RANK = {difficulty: rank for rank, difficulty in enumerate(DIFFICULTIES)}
+
+
+def _number(text):
+    return int(text) if text.lstrip('-').isdigit() else float(text)
+
+
+def sort_value(column, text):
+    """Turn a column value into something that sorts in the intended order."""
+    if column == "Difficulty":
+        return DIFFICULTY_RANK.get(text, len(DIFFICULTIES))
+    return _number(text)
+
+
+def display_value(column, value):
+    """Turn a sort value back into the column value, for ranges.json and output."""
+    if column == "Difficulty":
+        return DIFFICULTIES[value] if value < len(DIFFICULTIES) else "?"
+    return value
+
+
+def make_key(header, columns):
+    """
+    Return key(line) for raw shard lines with this CSV header.
+
+    Shard values are plain digits and words, so lines are split on commas
+    without CSV quoting.
+    """
+    try:
+        indices = [header.index(column) for column in columns]
+    except ValueError as e:
+        raise ValueError(f"sort column not found in the shards: {e}")
+
+    def key(line):
+        values = line.rstrip(b'\r\n').split(b',')
+        return tuple(sort_value(column, values[idx].decode('ascii')) for column, idx in zip(columns, indices))
+
+    return key
+
+
+def parse_bound(text, columns):
+    """Parse a --query bound like Hard:45 into a (possibly partial) sort key."""
+    parts = text.split(':')
+    if len(parts) > len(columns):
+        raise ValueError(f"{text!r} has more parts than the key {columns}")
+    bound = []
+    for column, part in zip(columns, parts):
+        if column == "Difficulty":
+            if part not in DIFFICULTY_RANK:
+                raise ValueError(f"unknown difficulty {part!r} (use {', '.join(DIFFICULTIES)})")
+            bound.append(DIFFICULTY_RANK[part])
+        else:
+            try:
+                bound.append(_number(part))
+            except ValueError:
+                raise ValueError(f"{part!r} is not a number for {column!r}")
+    return tuple(bound)
+
+
+def _spill(lines, key, run_path):
+    lines.sort(key=key)
+    with open(run_path, 'wb') as outfile:
+        outfile.writelines(lines)
+    lines.clear()
+    return run_path
+
+
+def sort_runs(shard_path, columns, work_dir, run_rows=RUN_ROWS):
+    """Cut a shard into sorted runs in work_dir. Returns (header line, [run paths], rows)."""
+    print(f"Sorting runs of {shard_path.name}...")
+    shard_num = shard_number(shard_path)
+    runs = []
+    rows = 0
+    with open_shard(shard_path, 'rb') as infile:
+        header_line = infile.readline()
+        header = next(csv.reader([header_line.decode('utf-8')]))
+        key = make_key(header, columns)
+        width = max(header.index(column) for column in columns)
+
+        lines = []
+        for line in infile:
+            if line.count(b',') < width:
+                continue
+            if not line.endswith(b'\n'):
+                line += b'\r\n'
+            lines.append(line)
+            rows += 1
+            if len(lines) == run_rows:
+                runs.append(_spill(lines, key, work_dir / f"shard_{shard_num:03d}_run_{len(runs):04d}.run"))
+        if lines:
+            runs.append(_spill(lines, key, work_dir / f"shard_{shard_num:03d}_run_{len(runs):04d}.run"))
+
+    print(f"  {rows:,} rows of {shard_path.name} in {len(runs)} runs")
+    return header_line, runs, rows
+
+
+def merged_lines(run_paths, key):
+    """Yield the lines of sorted run files in merged order (stable across runs)."""
+    files = [open(path, 'rb') for path in run_paths]
+    try:
+        yield from heapq.merge(*files, key=key)
+    finally:
+        for infile in files:
+            infile.close()
+
+
+def merge_passes(run_paths, key, work_dir, fanin=MERGE_FANIN):
+    """Merge runs in groups of fanin until at most fanin remain. Returns the run paths."""
+    merge_pass = 0
+    while len(run_paths) > fanin:
+        merge_pass += 1
+        print(f"Merge pass {merge_pass}: {len(run_paths)} runs...")
+        merged = []
+        # Contiguous groups keep equal keys in their original order
+        for group_num, start in enumerate(range(0, len(run_paths), fanin)):
+            group = run_paths[start:start + fanin]
+            merged_path = work_dir / f"pass_{merge_pass:02d}_run_{group_num:04d}.run"
+            with open(merged_path, 'wb') as outfile:
+                outfile.writelines(merged_lines(group, key))
+            for path in group:
+                path.unlink()
+            merged.append(merged_path)
+        run_paths = merged
+    return run_paths
+
+
+def write_sorted_shards(run_paths, key, columns, header_line, output_dir, num_files, total_rows):
+    """Merge the runs into output shards of equal row counts. Returns the ranges entries."""
+    rows_per_file = max(math.ceil(total_rows / num_files), 1)
+    lines = merged_lines(run_paths, key)
+    shards = []
+    for file_num in range(1, math.ceil(total_rows / rows_per_file) + 1):
+        output_file = new_shard_path(output_dir, file_num)
+        first = last = None
+        rows = 0
+        with atomic_open(output_file, 'wb') as outfile:
+            outfile.write(header_line)
+            for line in itertools.islice(lines, rows_per_file):
+                if first is None:
+                    first = line
+                last = line
+                outfile.write(line)
+                rows += 1
+        shards.append({
+            "file": output_file.name,
+            "rows": rows,
+            "first": [display_value(column, value) for column, value in zip(columns, key(first))],
+            "last": [display_value(column, value) for column, value in zip(columns, key(last))],
+        })
+        print(f"  Wrote {rows:,} rows to {output_file.name} "
+              f"({':'.join(map(str, shards[-1]['first']))} .. {':'.join(map(str, shards[-1]['last']))})")
+    lines.close()
+    return shards
+
+
+def sort_dataset(paths, columns, output_dir, num_files, run_rows, workers=1):
+    """Sort the shards at paths into output_dir and write ranges.json. Returns the ranges."""
+    if WORK_DIR.exists():
+        shutil.rmtree(WORK_DIR)
+    WORK_DIR.mkdir(parents=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        sort = partial(sort_runs, columns=columns, work_dir=WORK_DIR, run_rows=run_rows)
+        results = map_shards(sort, paths, workers)
+        headers = {header_line.rstrip(b'\r\n') for header_line, _, _ in results}
+        if len(headers) != 1:
+            raise ValueError("the shards do not share one header")
+        header_line = results[0][0]
+        run_paths = [path for _, runs, _ in results for path in runs]
+        total_rows = sum(rows for _, _, rows in results)
+        key = make_key(next(csv.reader([header_line.decode('utf-8')])), columns)
+
+        print(f"\nMerging {len(run_paths)} runs ({total_rows:,} rows)...")
+        run_paths = merge_passes(run_paths, key, WORK_DIR)
+        shards = write_sorted_shards(run_paths, key, columns, header_line, output_dir, num_files, total_rows)
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+    remove_stale_shards(output_dir, len(shards))
+
+    ranges = {
+        "version": RANGES_VERSION,
+        "key": columns,
+        "rows": total_rows,
+        "sources": {path.name: [path.stat().st_size, path.stat().st_mtime_ns] for path in paths},
+        "shards": shards,
+    }
+    with atomic_open(output_dir / RANGES_FILE) as outfile:
+        json.dump(ranges, outfile, indent=2)
+    return ranges
+
+
+def load_ranges(output_dir):
+    """Return ranges.json of a sorted directory, warning if its sources changed."""
+    with open(output_dir / RANGES_FILE, 'r', encoding='utf-8') as infile:
+        ranges = json.load(infile)
+    if ranges.get("version") != RANGES_VERSION:
+        raise ValueError(f"{RANGES_FILE} has an unknown version, sort again")
+    for name, (size, mtime_ns) in ranges["sources"].items():
+        path = INPUT_DIR / name
+        if not path.exists() or path.stat().st_size != size or path.stat().st_mtime_ns != mtime_ns:
+            print(f"Warning: {name} changed since the sort, the sorted shards may be stale")
+            break
+    return ranges
+
+
+def shard_key(entry, bound_name, columns):
+    """Return the sort key of a ranges entry's first or last row."""
+    return tuple(sort_value(column, str(value)) for column, value in zip(columns, entry[bound_name]))
+
+
+def range_rows(output_dir, ranges, low, high):
+    """Yield the rows with low <= key <= high (compared on the bounds' length), in order."""
+    columns = ranges["key"]
+    for entry in ranges["shards"]:
+        if shard_key(entry, "last", columns)[:len(low)] < low:
+            continue
+        if shard_key(entry, "first", columns)[:len(high)] > high:
+            return
+        with open_shard(output_dir / entry["file"], 'rb') as infile:
+            header = next(csv.reader([infile.readline().decode('utf-8')]))
+            key = make_key(header, columns)
+            for line in infile:
+                line_key = key(line)
+                if line_key[:len(high)] > high:
+                    return
+                if line_key[:len(low)] >= low:
+                    yield line
+
+
+def top_rows(output_dir, ranges, count):
+    """Return the count highest-keyed rows, in sorted order, reading only the last shards."""
+    if count == 0:
+        return []
+    needed = []
+    rows = 0
+    for entry in reversed(ranges["shards"]):
+        needed.append(entry)
+        rows += entry["rows"]
+        if rows >= count:
+            break
+    top = deque(maxlen=count)
+    for entry in reversed(needed):
+        with open_shard(output_dir / entry["file"], 'rb') as infile:
+            infile.readline()
+            top.extend(infile)
+    return list(top)
+
+
+def read_sorted_header(output_dir, ranges):
+    """Return the CSV header row of the sorted shards."""
+    with open_shard(output_dir / ranges["shards"][0]["file"]) as infile:
+        return next(csv.reader(infile))
+
+
+@instrumented
+def main():
+    """Sort the shards into range-partitioned shards, or query the sorted shards."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--by', metavar='COLUMN', help="sort by this numeric column instead of difficulty")
+    parser.add_argument('--num-files', type=int, default=NUM_FILES,
+                        help=f"number of sorted shards to write (default: {NUM_FILES})")
+    parser.add_argument('--run-rows', type=int, default=RUN_ROWS,
+                        help=f"rows sorted in memory per run (default: {RUN_ROWS:,})")
+    parser.add_argument('--query', nargs=2, metavar=('LOW', 'HIGH'),
+                        help="print the sorted rows with keys between LOW and HIGH, e.g. Hard:45 Hard:50")
+    parser.add_argument('--top', type=int, metavar='N', help="print the N highest-keyed sorted rows")
+    parser.add_argument('--output', type=Path, help="write the --query/--top rows to this CSV file instead")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if not INPUT_DIR.exists():
+        print(f"Error: {INPUT_DIR} not found!")
+        exit(1)
+
+    if args.top is not None and args.top < 0:
+        print("Error: --top must be at least 0")
+        exit(1)
+    if args.query is not None or args.top is not None:
+        if not (OUTPUT_DIR / RANGES_FILE).exists():
+            print(f"Error: {OUTPUT_DIR / RANGES_FILE} not found, run the sort first")
+            exit(1)
+        try:
+            ranges = load_ranges(OUTPUT_DIR)
+            if args.query:
+                low, high = (parse_bound(bound, ranges["key"]) for bound in args.query)
+                lines = range_rows(OUTPUT_DIR, ranges, low, high)
+            else:
+                lines = top_rows(OUTPUT_DIR, ranges, args.top)
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
+        if args.output:
+            with atomic_open(args.output, 'wb') as outfile:
+                outfile.write(','.join(read_sorted_header(OUTPUT_DIR, ranges)).encode('utf-8') + b'\r\n')
+                written = 0
+                for line in lines:
+                    outfile.write(line)
+                    written += 1
+            print(f"Wrote {written:,} rows to {args.output}")
+        else:
+            for line in lines:
+                print(line.decode('utf-8').rstrip('\r\n'))
+        return
+
+    if args.run_rows < 1 or args.num_files < 1:
+        print("Error: --run-rows and --num-files must be at least 1")
+        exit(1)
+    paths = shard_paths(INPUT_DIR)
+    if not paths:
+        print(f"Error: no shards found in {INPUT_DIR}")
+        exit(1)
+
+    columns = [args.by] if args.by else DEFAULT_KEY
+    print(f"Sorting {len(paths)} shards by {', '.join(columns)}...")
+    try:
+        ranges = sort_dataset(paths, columns, OUTPUT_DIR, args.num_files, args.run_rows, args.workers)
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit(1)
+    print(f"\nSorted {ranges['rows']:,} rows into {len(ranges['shards'])} shards")
+    print(f"Ranges: {OUTPUT_DIR / RANGES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
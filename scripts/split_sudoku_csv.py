@@ -1,19 +1,40 @@
 """
-Script to split sudoku.csv into 20 equal-sized CSV files.
+Script to split sudoku.csv into equal-sized CSV files (20 by default).
+
+By default the split is by byte ranges: the file size gives the cut
+points, each cut is moved forward to the next newline, and worker
+processes copy their ranges into sudoku_N.csv with large block copies.
+The source is never counted or parsed, and rows are written exactly as
+they appear in it. Since every row of the dataset has the same length,
+the shards still come out with (almost) equal row counts; --by-lines
+keeps the original exact line-count split.
+
+--num-files sets the shard count (0 = one per CPU core). The other
+scripts find the shards on disk (shard_pool.shard_paths), so they follow
+any count.
 
 Run this script from the project root:
     py scripts/split_sudoku_csv.py
+    py scripts/split_sudoku_csv.py --num-files 0 --workers 0
+    py scripts/split_sudoku_csv.py --by-lines
 """
 
+import argparse
 import csv
 import os
 from pathlib import Path
 
+from build_shards import atomic_open
+from instrumentation import instrumented
+from shard_io import find_shard, new_shard_path, open_shard, shard_candidates
+from shard_pool import add_workers_argument, map_shards, resolve_workers
+
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 INPUT_FILE = PROJECT_ROOT / "kaggle_sudokus" / "sudoku.csv"
 OUTPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
 NUM_FILES = 20
+BLOCK_SIZE = 8 * 1024 * 1024
 
 
 def count_lines(filepath):
@@ -49,14 +70,14 @@ def split_csv(input_file, output_dir, num_files):
         # Process each output file
         current_line = 0
         for file_num in range(1, num_files + 1):
-            output_file = output_dir / f"sudoku_{file_num}.csv"
+            output_file = new_shard_path(output_dir, file_num)
             print(f"Creating {output_file.name}...")
             
             # Calculate how many lines this file should have
             # Distribute remainder across first few files
             lines_for_this_file = lines_per_file + (1 if file_num <= remainder else 0)
             
-            with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+            with open_shard(output_file, 'w', newline='') as outfile:
                 writer = csv.writer(outfile)
                 # Write header
                 writer.writerow(header)
@@ -78,11 +99,104 @@ def split_csv(input_file, output_dir, num_files):
     print(f"Output directory: {output_dir}")
 
 
-if __name__ == "__main__":
+def find_cut_points(input_file, num_files):
+    """
+    Return (header, offsets) for splitting input_file into num_files byte ranges.
+
+    Shard N gets the bytes offsets[N-1]..offsets[N]. Every offset is the
+    start of a line, found by seeking to an even share of the file and
+    skipping to the next newline.
+    """
+    total_bytes = os.path.getsize(input_file)
+    with open(input_file, 'rb') as infile:
+        header = infile.readline()
+        data_start = infile.tell()
+        offsets = [data_start]
+        for file_num in range(1, num_files):
+            target = data_start + (total_bytes - data_start) * file_num // num_files
+            # Seeking one byte back means a cut landing on a line start stays there
+            infile.seek(max(target - 1, offsets[-1]))
+            infile.readline()
+            offsets.append(max(infile.tell(), offsets[-1]))
+        offsets.append(total_bytes)
+    return header, offsets
+
+
+def copy_range(task):
+    """Write the header and the input bytes start..end to output_file. Returns the row count."""
+    output_file, input_file, header, start, end = task
+    rows = 0
+    last = b"\n"
+    with open(input_file, 'rb') as infile, atomic_open(output_file, 'wb') as outfile:
+        outfile.write(header)
+        infile.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = infile.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            outfile.write(block)
+            rows += block.count(b"\n")
+            last = block[-1:]
+            remaining -= len(block)
+    if last != b"\n":
+        rows += 1
+    return rows
+
+
+def split_by_ranges(input_file, output_dir, num_files, workers=1):
+    """Split input_file into num_files shards by byte range, copying them in parallel."""
+    print(f"Splitting {input_file} into {num_files} files by byte range...")
+    header, offsets = find_cut_points(input_file, num_files)
+    tasks = [
+        (new_shard_path(output_dir, file_num), input_file, header,
+         offsets[file_num - 1], offsets[file_num])
+        for file_num in range(1, num_files + 1)
+    ]
+
+    rows = map_shards(copy_range, tasks, workers)
+    for task, count in zip(tasks, rows):
+        print(f"  Wrote {count:,} lines to {task[0].name}")
+
+    print(f"\nSuccessfully split CSV into {num_files} files ({sum(rows):,} lines)")
+    print(f"Output directory: {output_dir}")
+
+
+def remove_stale_shards(output_dir, num_files):
+    """Delete sudoku_N.csv files (in any codec) left over from a split into more shards."""
+    file_num = num_files + 1
+    while find_shard(output_dir, file_num):
+        for path in shard_candidates(output_dir, file_num):
+            if path.exists():
+                path.unlink()
+                print(f"Removed stale {path.name}")
+        file_num += 1
+
+
+@instrumented
+def main():
+    """Split the dataset CSV into shards."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--num-files', type=int, default=NUM_FILES,
+                        help=f"number of shards to write (0 = one per CPU core, default: {NUM_FILES})")
+    parser.add_argument('--by-lines', action='store_true',
+                        help="count lines first and split into exactly equal row counts (single core)")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
     if not INPUT_FILE.exists():
         print(f"Error: {INPUT_FILE} not found!")
         print("Make sure you've downloaded the dataset first.")
         exit(1)
-    
+
+    num_files = resolve_workers(args.num_files)
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    split_csv(INPUT_FILE, OUTPUT_DIR, NUM_FILES)
+    if args.by_lines:
+        split_csv(INPUT_FILE, OUTPUT_DIR, num_files)
+    else:
+        split_by_ranges(INPUT_FILE, OUTPUT_DIR, num_files, args.workers)
+    remove_stale_shards(OUTPUT_DIR, num_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Bitmask Sudoku solver with uniqueness checking, for auditing the dataset.
+
+The solver keeps a 9-bit mask of used digits for every row, column and box,
+always branches on the empty cell with the fewest candidates, and stops as
+soon as it finds a second solution. That is enough to tell whether a puzzle
+has exactly one solution and whether it is the stored one.
+
+The audit runs over the CSV shards or the data/boards/boards*.json bundles
+and reports every puzzle that is:
+- invalid      its givens already break a Sudoku rule
+- unsolvable   it has no solution
+- not unique   it has more than one solution
+- mismatched   its only solution differs from the stored solution
+
+Run this script from the project root:
+    py scripts/sudoku_solver.py --workers 8            (audit the CSV shards)
+    py scripts/sudoku_solver.py --bundles              (audit data/boards/boards*.json)
+    py scripts/sudoku_solver.py --benchmark 2000       (solver throughput)
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import time
+from functools import partial
+from pathlib import Path
+
+from instrumentation import instrumented
+from shard_io import find_shard, open_shard
+from shard_pool import add_workers_argument, map_shards, shard_paths
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+INPUT_DIR = PROJECT_ROOT / "kaggle_sudokus"
+BOARDS_DIR = PROJECT_ROOT / "data" / "boards"
+
+ALL_DIGITS = 0x1FF
+ROW_OF = [i // 9 for i in range(81)]
+COL_OF = [i % 9 for i in range(81)]
+BOX_OF = [(i // 27) * 3 + (i % 9) // 3 for i in range(81)]
+POPCOUNT = [bin(mask).count('1') for mask in range(512)]
+DIGIT_OF_BIT = {1 << d: d + 1 for d in range(9)}
+
+STATUSES = ["ok", "invalid", "unsolvable", "not unique", "mismatched"]
+
+
+def parse_grid(puzzle):
+    """Turn an 81-character puzzle string into a list of digits (0 = empty)."""
+    return [ord(char) - 48 if '1' <= char <= '9' else 0 for char in puzzle]
+
+
+def grid_to_string(grid):
+    """Turn a 9x9 grid (like the board JSON files use) into an 81-digit string."""
+    return ''.join(str(value) for row in grid for value in row)
+
+
+def solve(puzzle, limit=2):
+    """
+    Search for up to limit solutions of an 81-character puzzle string.
+
+    Returns (solutions found, first solution string). The count is -1 when
+    the givens already conflict with each other.
+    """
+    grid = parse_grid(puzzle)
+    rows = [0] * 9
+    cols = [0] * 9
+    boxes = [0] * 9
+    for i, digit in enumerate(grid):
+        if digit:
+            bit = 1 << (digit - 1)
+            r, c, b = ROW_OF[i], COL_OF[i], BOX_OF[i]
+            if (rows[r] | cols[c] | boxes[b]) & bit:
+                return -1, None
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+
+    empties = [i for i, digit in enumerate(grid) if not digit]
+    found = 0
+    first = None
+
+    def search(remaining):
+        nonlocal found, first
+        if remaining == 0:
+            found += 1
+            if first is None:
+                first = ''.join(map(str, grid))
+            return found >= limit
+
+        # Most constrained cell first
+        best_k = 0
+        best_count = 10
+        best_candidates = 0
+        for k in range(remaining):
+            i = empties[k]
+            candidates = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+            count = POPCOUNT[candidates]
+            if count < best_count:
+                best_k, best_count, best_candidates = k, count, candidates
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return False
+
+        # Move the chosen cell out of the still-empty part of the list
+        last = remaining - 1
+        empties[best_k], empties[last] = empties[last], empties[best_k]
+        i = empties[last]
+        r, c, b = ROW_OF[i], COL_OF[i], BOX_OF[i]
+
+        candidates = best_candidates
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+            grid[i] = DIGIT_OF_BIT[bit]
+            if search(last):
+                return True
+            rows[r] ^= bit
+            cols[c] ^= bit
+            boxes[b] ^= bit
+        grid[i] = 0
+        return False
+
+    search(len(empties))
+    return found, first
+
+
+def has_unique_solution(puzzle):
+    """Return True if the puzzle has exactly one solution."""
+    return solve(puzzle, limit=2)[0] == 1
+
+
+def audit_puzzle(puzzle, solution):
+    """Return the audit status of one puzzle and its stored solution."""
+    found, first = solve(puzzle, limit=2)
+    if found < 0:
+        return "invalid"
+    if found == 0:
+        return "unsolvable"
+    if found > 1:
+        return "not unique"
+    if first != solution:
+        return "mismatched"
+    return "ok"
+
+
+def audit_rows(rows):
+    """Audit (label, puzzle, solution) rows. Returns (status counts, problems)."""
+    counts = {status: 0 for status in STATUSES}
+    problems = []
+    for label, puzzle, solution in rows:
+        status = audit_puzzle(puzzle, solution)
+        counts[status] += 1
+        if status != "ok":
+            problems.append({"puzzle": label, "status": status})
+    return counts, problems
+
+
+def shard_rows(file_path, max_rows=None):
+    """Yield (label, puzzle, solution) for the rows of a CSV shard."""
+    with open_shard(file_path) as infile:
+        reader = csv.reader(infile)
+        header = next(reader)
+        puzzle_idx = header.index("puzzle")
+        solution_idx = header.index("solution")
+        for row_num, row in enumerate(itertools.islice(reader, max_rows), start=1):
+            if len(row) > max(puzzle_idx, solution_idx):
+                yield f"{file_path.name}:{row_num}", row[puzzle_idx], row[solution_idx]
+
+
+def bundle_rows(file_path):
+    """Yield (label, puzzle, solution) for the boards of a JSON bundle."""
+    with open(file_path, 'r', encoding='utf-8') as infile:
+        boards = json.load(infile)
+    for board in boards:
+        yield (f"{file_path.name}:Id {board['Id']}",
+               grid_to_string(board["puzzle"]), grid_to_string(board["solution"]))
+
+
+def audit_shard(file_path, max_rows=None):
+    """Audit one CSV shard. Returns (status counts, problems)."""
+    print(f"Auditing {file_path.name}...")
+    counts, problems = audit_rows(shard_rows(file_path, max_rows))
+    print(f"  {sum(counts.values()):,} puzzles, {len(problems):,} problems in {file_path.name}")
+    return counts, problems
+
+
+def audit_bundle(file_path):
+    """Audit one boards*.json bundle. Returns (status counts, problems)."""
+    print(f"Auditing {file_path.name}...")
+    return audit_rows(bundle_rows(file_path))
+
+
+def benchmark(rows):
+    """Time the solver over (label, puzzle, solution) rows and print puzzles/s."""
+    puzzles = [puzzle for _, puzzle, _ in rows]
+    start = time.perf_counter()
+    for puzzle in puzzles:
+        solve(puzzle, limit=2)
+    elapsed = time.perf_counter() - start
+    print(f"Solved {len(puzzles):,} puzzles (with uniqueness check) in {elapsed:.2f}s")
+    print(f"  {len(puzzles) / elapsed:,.0f} puzzles/s, {elapsed / len(puzzles) * 1e3:.3f} ms/puzzle")
+
+
+@instrumented
+def main():
+    """Audit the dataset or benchmark the solver."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bundles', action='store_true', help="audit data/boards/boards*.json instead of the shards")
+    parser.add_argument('--max-rows', type=int, help="audit at most this many rows per shard")
+    parser.add_argument('--report', type=Path, help="write the full audit report to this JSON file")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="benchmark the solver on N puzzles")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        if args.bundles:
+            rows = [row for path in sorted(BOARDS_DIR.glob("boards*.json")) for row in bundle_rows(path)]
+        else:
+            first_shard = find_shard(INPUT_DIR, 1)
+            if first_shard is None:
+                print(f"Error: sudoku_1.csv not found in {INPUT_DIR}")
+                exit(1)
+            rows = list(shard_rows(first_shard, args.benchmark))
+        benchmark(rows[:args.benchmark])
+        return
+
+    if args.bundles:
+        paths = sorted(BOARDS_DIR.glob("boards*.json"))
+        results = map_shards(audit_bundle, paths, args.workers)
+    else:
+        if not INPUT_DIR.exists():
+            print(f"Error: {INPUT_DIR} not found!")
+            exit(1)
+        audit = partial(audit_shard, max_rows=args.max_rows)
+        results = map_shards(audit, shard_paths(INPUT_DIR), args.workers)
+
+    totals = {status: sum(counts[status] for counts, _ in results) for status in STATUSES}
+    problems = [problem for _, shard_problems in results for problem in shard_problems]
+
+    print(f"\nAudited {sum(totals.values()):,} puzzles")
+    for status in STATUSES:
+        print(f"  {status}: {totals[status]:,}")
+    for problem in problems[:20]:
+        print(f"  {problem['puzzle']}: {problem['status']}")
+    if len(problems) > 20:
+        print(f"  ... and {len(problems) - 20:,} more")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as outfile:
+            json.dump({"totals": totals, "problems": problems}, outfile, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
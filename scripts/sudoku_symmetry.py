@@ -0,0 +1,277 @@
+"""
+Sudoku symmetry helpers: applying transforms and computing canonical forms.
+
+A Sudoku stays the same puzzle under digit relabelling, permuting the rows
+inside a band, permuting the bands, the same two for columns and stacks,
+and transposition. canonical_form picks one fixed representative of every
+such class, so two puzzles are the same up to symmetry exactly when their
+canonical forms are equal.
+
+The representative is the lexicographically smallest relabelled string over
+the transforms that sort rows, bands, columns and stacks by invariants that
+symmetries cannot change (how many givens a line has and how they spread
+over the other direction). Only lines with equal invariants have to be
+tried in every order, which keeps the search to a handful of candidates for
+typical puzzles instead of the full 3.3 million element group.
+
+The same group also turns one board into many: random_transform(seed)
+picks a symmetry from a seed, and transform_board applies it to a puzzle
+and its solution, so a base board plus a seed is a new valid board. The
+choice is fixed by this spec, so the app (src/game/sudoku/transform.js)
+rebuilds exactly the same board from the same pair:
+
+1. The seed drives mulberry32 (state and output are uint32):
+       state = state + 0x6D2B79F5
+       t = (t ^ t >> 15) * (t | 1)        with t = state
+       t = t ^ (t + (t ^ t >> 7) * (t | 61))
+       next = t ^ t >> 14
+   randint(n) is (next * n) >> 32, and shuffle(items) is Fisher-Yates,
+   swapping items[i] with items[randint(i + 1)] for i from len - 1 down to 1.
+2. In this order: digits = shuffle([1..9]); bands = shuffle([0, 1, 2]);
+   three rows-in-band orders, shuffle([0, 1, 2]) each; stacks and three
+   columns-in-stack orders the same way; transpose = randint(2) == 1.
+3. Output row i*3+k is source row bands[i]*3 + rows[i][k] (columns
+   likewise), then the grid is transposed if chosen, then every digit d
+   becomes digits[d - 1]; 0 stays 0.
+
+expand_batch does the same for whole arrays of boards and seeds with
+NumPy, for expanding a base set into millions of variants.
+
+This module is imported by the other scripts and is not run directly.
+"""
+
+import hashlib
+from collections import namedtuple
+from itertools import chain, permutations, product
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIGITS = '123456789'
+MASK32 = 0xFFFFFFFF
+MULBERRY_INCREMENT = 0x6D2B79F5
+
+# digits: '0' followed by what 1-9 become; row_order and col_order: source
+# line for each output line; transpose: swap rows and columns afterwards
+Transform = namedtuple("Transform", ["digits", "row_order", "col_order", "transpose"])
+
+
+def transpose(grid):
+    """Return an 81-character grid string with rows and columns swapped."""
+    return ''.join(grid[c * 9 + r] for r in range(9) for c in range(9))
+
+
+def relabel(grid):
+    """Renumber the digits of a grid string in order of first appearance."""
+    order = ''.join(dict.fromkeys(grid.replace('0', '')))
+    return grid.translate(str.maketrans(order, DIGITS[:len(order)]))
+
+
+def permute(grid, row_order, col_order):
+    """Return the grid with rows and columns taken in the given orders."""
+    indices = [r * 9 + c for r in row_order for c in col_order]
+    return ''.join(itemgetter(*indices)(grid))
+
+
+def _tied_orders(items, key):
+    """All orderings of items sorted by key (descending) that only permute ties."""
+    groups = []
+    for item in sorted(items, key=key, reverse=True):
+        if groups and key(groups[-1][0]) == key(item):
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+    return [list(chain.from_iterable(combo))
+            for combo in product(*(permutations(group) for group in groups))]
+
+
+def _line_orders(line_keys):
+    """All row (or column) orders that sort bands and lines by their keys."""
+    band_keys = [tuple(sorted(line_keys[b * 3:b * 3 + 3], reverse=True)) for b in range(3)]
+    within = [_tied_orders(range(b * 3, b * 3 + 3), line_keys.__getitem__) for b in range(3)]
+    orders = []
+    for bands in _tied_orders(range(3), band_keys.__getitem__):
+        for parts in product(*(within[b] for b in bands)):
+            orders.append(list(chain.from_iterable(parts)))
+    return orders
+
+
+def _line_keys(grid):
+    """Symmetry-invariant keys for every row and every column of a grid."""
+    given = [char != '0' for char in grid]
+    row_split = [[sum(given[r * 9 + s * 3:r * 9 + s * 3 + 3]) for s in range(3)] for r in range(9)]
+    col_split = [[sum(given[(b * 3 + k) * 9 + c] for k in range(3)) for b in range(3)] for c in range(9)]
+    row_base = [(sum(split), tuple(sorted(split))) for split in row_split]
+    col_base = [(sum(split), tuple(sorted(split))) for split in col_split]
+
+    # One refinement round: which kinds of columns a row's givens sit in, and vice versa
+    row_keys = [(row_base[r], tuple(sorted(col_base[c] for c in range(9) if given[r * 9 + c])))
+                for r in range(9)]
+    col_keys = [(col_base[c], tuple(sorted(row_base[r] for r in range(9) if given[r * 9 + c])))
+                for c in range(9)]
+    return row_keys, col_keys
+
+
+def candidate_count(puzzle):
+    """Return how many transforms canonical_form has to compare for a puzzle."""
+    total = 0
+    for grid in (puzzle, transpose(puzzle)):
+        row_keys, col_keys = _line_keys(grid)
+        total += len(_line_orders(row_keys)) * len(_line_orders(col_keys))
+    return total
+
+
+def canonical_form(puzzle):
+    """Return the canonical 81-character form of a puzzle string."""
+    best = None
+    for grid in (puzzle, transpose(puzzle)):
+        row_keys, col_keys = _line_keys(grid)
+        col_orders = _line_orders(col_keys)
+        for row_order in _line_orders(row_keys):
+            for col_order in col_orders:
+                candidate = relabel(permute(grid, row_order, col_order))
+                if best is None or candidate < best:
+                    best = candidate
+    return best
+
+
+def canonical_key(puzzle):
+    """Return a 32-character hex hash of the puzzle's canonical form."""
+    return hashlib.blake2b(canonical_form(puzzle).encode('ascii'), digest_size=16).hexdigest()
+
+
+class Mulberry32:
+    """The mulberry32 generator, bit for bit the same as the JavaScript one."""
+
+    def __init__(self, seed):
+        self.state = seed & MASK32
+
+    def next(self):
+        """Return the next uint32."""
+        self.state = (self.state + MULBERRY_INCREMENT) & MASK32
+        t = self.state
+        t = ((t ^ (t >> 15)) * (t | 1)) & MASK32
+        t ^= (t + ((t ^ (t >> 7)) * (t | 61))) & MASK32
+        return t ^ (t >> 14)
+
+    def randint(self, n):
+        """Return an integer in [0, n)."""
+        return (self.next() * n) >> 32
+
+    def shuffle(self, items):
+        """Return a Fisher-Yates shuffled copy of items."""
+        items = list(items)
+        for i in range(len(items) - 1, 0, -1):
+            j = self.randint(i + 1)
+            items[i], items[j] = items[j], items[i]
+        return items
+
+
+def _line_order(rng):
+    """Draw a band (or stack) order and the line order inside each one."""
+    blocks = rng.shuffle(range(3))
+    within = [rng.shuffle(range(3)) for _ in range(3)]
+    return [blocks[i] * 3 + within[i][k] for i in range(3) for k in range(3)]
+
+
+def random_transform(seed):
+    """Return the Transform a seed stands for."""
+    rng = Mulberry32(seed)
+    digits = '0' + ''.join(str(d) for d in rng.shuffle(range(1, 10)))
+    row_order = _line_order(rng)
+    col_order = _line_order(rng)
+    return Transform(digits, row_order, col_order, rng.randint(2) == 1)
+
+
+def cell_sources(transform):
+    """Return, for every output cell, the source cell the transform takes it from."""
+    row_order, col_order = transform.row_order, transform.col_order
+    if transform.transpose:
+        return [row_order[c] * 9 + col_order[r] for r in range(9) for c in range(9)]
+    return [row_order[r] * 9 + col_order[c] for r in range(9) for c in range(9)]
+
+
+def apply_transform(grid, transform):
+    """Apply a Transform to an 81-character grid string."""
+    moved = ''.join(itemgetter(*cell_sources(transform))(grid))
+    return moved.translate(str.maketrans('0123456789', transform.digits))
+
+
+def transform_board(puzzle, solution, seed):
+    """Return the (puzzle, solution) variant a seed makes of a board."""
+    transform = random_transform(seed)
+    return apply_transform(puzzle, transform), apply_transform(solution, transform)
+
+
+def _mulberry_next(state):
+    """Vectorized mulberry32 step over a uint64 array of states. Returns (state, next)."""
+    state = (state + MULBERRY_INCREMENT) & MASK32
+    t = ((state ^ (state >> 15)) * (state | 1)) & MASK32
+    t ^= (t + ((t ^ (t >> 7)) * (t | 61))) & MASK32
+    return state, t ^ (t >> 14)
+
+
+def _batch_shuffle(state, count, size):
+    """Fisher-Yates shuffle range(size) once per state. Returns (state, permutations)."""
+    perms = np.tile(np.arange(size), (count, 1))
+    rows = np.arange(count)
+    for i in range(size - 1, 0, -1):
+        state, value = _mulberry_next(state)
+        j = ((value * (i + 1)) >> 32).astype(np.intp)
+        swapped = perms[rows, j]
+        perms[rows, j] = perms[:, i]
+        perms[:, i] = swapped
+    return state, perms
+
+
+def _batch_line_order(state, count):
+    """Vectorized _line_order. Returns (state, orders of shape (count, 9))."""
+    state, blocks = _batch_shuffle(state, count, 3)
+    within = []
+    for _ in range(3):
+        state, perm = _batch_shuffle(state, count, 3)
+        within.append(perm)
+    orders = [blocks[:, i] * 3 + within[i][:, k] for i in range(3) for k in range(3)]
+    return state, np.stack(orders, axis=1)
+
+
+def batch_transforms(seeds):
+    """
+    Vectorized random_transform for an array of seeds.
+
+    Returns (cell sources, digit maps): arrays of shape (len(seeds), 81) and
+    (len(seeds), 10), the batch forms of cell_sources and Transform.digits.
+    """
+    seeds = np.asarray(seeds, dtype=np.uint64) & MASK32
+    count = len(seeds)
+    state, digits = _batch_shuffle(seeds, count, 9)
+    state, row_order = _batch_line_order(state, count)
+    state, col_order = _batch_line_order(state, count)
+    state, value = _mulberry_next(state)
+    transpose = (value >> 31) == 1  # randint(2)
+
+    sources = row_order[:, :, None] * 9 + col_order[:, None, :]
+    sources[transpose] = sources[transpose].transpose(0, 2, 1)
+    sources = sources.reshape(count, 81)
+
+    digit_maps = np.zeros((count, 10), dtype=np.uint8)
+    digit_maps[:, 1:] = digits + 1
+    return sources, digit_maps
+
+
+def expand_batch(puzzles, solutions, seeds):
+    """
+    Transform whole arrays of boards at once with NumPy.
+
+    puzzles and solutions are uint8 digit arrays of shape (n, 81), one row
+    per (board, seed) pair; returns the transformed arrays.
+    """
+    sources, digit_maps = batch_transforms(seeds)
+    results = []
+    for grids in (puzzles, solutions):
+        moved = np.take_along_axis(np.asarray(grids, dtype=np.uint8), sources, axis=1)
+        results.append(np.take_along_axis(digit_maps, moved.astype(np.intp), axis=1))
+    return tuple(results)
@@ -0,0 +1,102 @@
+"""
+Script to write a synthetic sudoku.csv for benchmarking without the Kaggle download.
+
+Rows have the same layout as the Kaggle file (puzzle,solution as 81-digit
+strings). Every solution is a valid grid: a fixed base grid with random
+digit relabelling, row/column shuffles inside bands and stacks, band/stack
+shuffles and an optional transpose. Puzzles blank a random set of cells,
+with the blank count drawn from a normal distribution (clamped to
+BLANK_LIMITS) so every difficulty band gets rows. Puzzles are not checked
+for a unique solution, so the file is only meant for measuring speed.
+
+The output depends only on --rows and --seed.
+
+Run this script from the project root:
+    py scripts/synthetic_dataset.py --rows 10000
+    py scripts/synthetic_dataset.py --rows 10000000 --output kaggle_sudokus/synthetic/sudoku.csv
+"""
+
+import argparse
+import random
+from pathlib import Path
+
+from build_shards import atomic_open
+from instrumentation import instrumented
+from sudoku_symmetry import permute, transpose
+
+# Paths
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTPUT_FILE = PROJECT_ROOT / "kaggle_sudokus" / "synthetic" / "sudoku.csv"
+
+BASE_GRID = ''.join(str((r * 3 + r // 3 + c) % 9 + 1) for r in range(9) for c in range(9))
+BLANK_MEAN = 45
+BLANK_STDDEV = 8
+BLANK_LIMITS = (17, 64)
+PROGRESS_EVERY = 1000000
+
+
+def shuffled_lines(rng):
+    """Return a random line order that keeps every line inside its band."""
+    bands = rng.sample(range(3), 3)
+    return [band * 3 + line for band in bands for line in rng.sample(range(3), 3)]
+
+
+def random_solution(rng):
+    """Return a random valid solution grid as an 81-digit string."""
+    digits = ''.join(rng.sample('123456789', 9))
+    grid = permute(BASE_GRID.translate(str.maketrans('123456789', digits)),
+                   shuffled_lines(rng), shuffled_lines(rng))
+    return transpose(grid) if rng.random() < 0.5 else grid
+
+
+def random_blank_count(rng):
+    """Draw a blank count from the clamped normal distribution."""
+    low, high = BLANK_LIMITS
+    return min(max(round(rng.gauss(BLANK_MEAN, BLANK_STDDEV)), low), high)
+
+
+def random_row(rng):
+    """Return one synthetic (puzzle, solution) pair."""
+    solution = random_solution(rng)
+    puzzle = list(solution)
+    for cell in rng.sample(range(81), random_blank_count(rng)):
+        puzzle[cell] = '0'
+    return ''.join(puzzle), solution
+
+
+def write_dataset(output_file, rows, seed=0):
+    """Write rows synthetic puzzles to output_file. Returns the file size in bytes."""
+    rng = random.Random(seed)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    print(f"Writing {rows:,} synthetic puzzles to {output_file}...")
+
+    with atomic_open(output_file) as outfile:
+        outfile.write("puzzle,solution\n")
+        for row_num in range(1, rows + 1):
+            puzzle, solution = random_row(rng)
+            outfile.write(f"{puzzle},{solution}\n")
+            if row_num % PROGRESS_EVERY == 0:
+                print(f"  {row_num:,} rows written")
+
+    size = output_file.stat().st_size
+    print(f"Wrote {rows:,} rows ({size / (1024**2):.1f} MB)")
+    return size
+
+
+@instrumented
+def main():
+    """Parse the arguments and write the dataset."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help="number of puzzles to write (default: 10000)")
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE, help="CSV file to write")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args()
+
+    if args.rows < 1:
+        print("Error: --rows must be at least 1")
+        exit(1)
+    write_dataset(args.output, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Shared fixtures for the script tests.
+
+The scripts import each other by module name, as when they are run from the
+project root, so the scripts directory is put on sys.path.
+
+Run the tests from the project root:
+    py -m pytest scripts/tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sudoku_symmetry import transform_board  # noqa: E402
+
+BASE_PUZZLE = "530070000600195000098000060800060003400803001700020006060000280000419005000080079"
+BASE_SOLUTION = "534678912672195348198342567859761423426853791713924856961537284287419635345286179"
+
+
+def string_to_grid(digits):
+    """Turn an 81-character digit string into a 9x9 grid of ints."""
+    return [[int(digit) for digit in digits[row * 9:row * 9 + 9]] for row in range(9)]
+
+
+@pytest.fixture
+def make_board():
+    """Return a factory for distinct valid boards: make_board(seed, difficulty)."""
+    def make(seed, difficulty="easy"):
+        puzzle, solution = transform_board(BASE_PUZZLE, BASE_SOLUTION, seed)
+        # A placeholder trace, so add_hints does not solve every test board
+        return {
+            "puzzle": string_to_grid(puzzle),
+            "solution": string_to_grid(solution),
+            "difficulty": difficulty,
+            "hints": "",
+        }
+    return make
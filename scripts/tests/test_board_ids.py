@@ -0,0 +1,121 @@
+"""Tests for the board Id allocator of combine_boards.py and the level packs built from it."""
+
+import json
+
+import pytest
+
+import combine_boards
+from build_level_packs import build_packs
+from combine_boards import append, board_hash, grid_to_digits, load_corpus, read_id_log
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def boards_dir(tmp_path, monkeypatch):
+    """A data/boards directory with 3 bundled Easy boards (Ids 1-3) and no Id log yet."""
+    monkeypatch.setattr(combine_boards, "boards_dir", tmp_path)
+    monkeypatch.setattr(combine_boards, "compact_dir", tmp_path / "compact")
+    monkeypatch.setattr(combine_boards, "id_log_file", tmp_path / "board_ids.txt")
+    return tmp_path
+
+
+@pytest.fixture
+def bundled(boards_dir, make_board):
+    boards = [dict(make_board(seed), Id=board_id) for board_id, seed in enumerate(range(1, 4), start=1)]
+    write_json(boards_dir / "boardsEasy.json", boards)
+    return boards
+
+
+def write_board_files(directory, boards):
+    for number, board in enumerate(boards, start=1):
+        write_json(directory / f"board{number}.json", board)
+
+
+def corpus_by_id(directory):
+    return {board["Id"]: board for board in load_corpus(directory)}
+
+
+def test_append_allocates_ids_after_the_bundled_ones(boards_dir, bundled, make_board):
+    # An already bundled board, then two new Easy boards and a new Hard one
+    write_board_files(boards_dir, [
+        make_board(2), make_board(10), make_board(11), make_board(12, "hard"),
+    ])
+
+    append()
+
+    ids = read_id_log(boards_dir / "board_ids.txt")
+    assert sorted(ids.values()) == [1, 2, 3, 4, 5, 6]
+    easy = read_json(boards_dir / "boardsEasy.json")
+    hard = read_json(boards_dir / "boardsHard.json")
+    assert [board["Id"] for board in easy] == [1, 2, 3, 4, 5]
+    assert [board["Id"] for board in hard] == [6]
+    # Every Id logged is the Id the bundles give the same board
+    for board in easy + hard:
+        assert ids[board_hash(board)] == board["Id"]
+
+
+def test_append_keeps_existing_ids_and_skips_known_boards(boards_dir, bundled, make_board):
+    write_board_files(boards_dir, [make_board(10), make_board(11)])
+    append()
+    first = corpus_by_id(boards_dir)
+
+    # A second extraction overwrites the board files, numbered from 1 again
+    write_board_files(boards_dir, [make_board(11), make_board(20), make_board(21)])
+    append()
+    second = corpus_by_id(boards_dir)
+
+    assert sorted(second) == [1, 2, 3, 4, 5, 6, 7]
+    for board_id, board in first.items():
+        assert board_hash(second[board_id]) == board_hash(board)
+    assert board_hash(second[6]) == board_hash(make_board(20))
+
+    # Nothing new: the bundles are left as they are
+    before = (boards_dir / "boardsEasy.json").read_bytes()
+    assert append() == []
+    assert (boards_dir / "boardsEasy.json").read_bytes() == before
+
+
+def test_load_corpus_reads_the_bundles_once_ids_are_logged(boards_dir, bundled, make_board):
+    write_board_files(boards_dir, [make_board(10)])
+    # Before the first --append, the board files are the corpus, numbered from 1
+    assert [board["Id"] for board in load_corpus(boards_dir)] == [1]
+
+    append()
+    write_board_files(boards_dir, [make_board(10)])
+    corpus = corpus_by_id(boards_dir)
+    assert sorted(corpus) == [1, 2, 3, 4]
+    assert board_hash(corpus[4]) == board_hash(make_board(10))
+
+
+def test_packs_carry_the_allocated_ids(boards_dir, bundled, make_board):
+    write_board_files(boards_dir, [make_board(seed, difficulty)
+                                   for seed in range(10, 14)
+                                   for difficulty in ("easy", "medium", "hard", "advanced")])
+    append()
+    corpus = corpus_by_id(boards_dir)
+
+    requirements = {1: 0, 2: 4, 3: 8, 4: 12}
+    manifest = build_packs(list(corpus.values()), requirements, boards_dir / "packs", levels_per_pack=2, seed=1)
+
+    first_pack = {}
+    for index, entry in enumerate(manifest["packs"]):
+        pack = read_json(boards_dir / "packs" / entry["file"])
+        for bundle in pack["bundles"].values():
+            for board_id, puzzle, solution in zip(bundle["ids"], bundle["puzzles"], bundle["solutions"]):
+                # The pack holds the board the corpus has under that Id
+                assert puzzle == grid_to_digits(corpus[board_id]["puzzle"])
+                assert solution == grid_to_digits(corpus[board_id]["solution"])
+                first_pack.setdefault(board_id, index)
+
+    assert manifest["boardIds"] == sorted(first_pack)
+    assert manifest["boardPacks"] == [first_pack[board_id] for board_id in manifest["boardIds"]]
+    assert read_json(boards_dir / "packs" / "manifest.json") == manifest
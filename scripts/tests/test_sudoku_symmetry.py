@@ -0,0 +1,78 @@
+"""Tests for the symmetry transforms and canonical forms of sudoku_symmetry.py."""
+
+import base64
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from conftest import BASE_PUZZLE, BASE_SOLUTION
+from sudoku_symmetry import canonical_form, canonical_key, transform_board, transpose
+
+SEEDS = [0, 1, 2, 12345, 2**31, 2**32 - 1]
+TRANSFORM_JS = Path(__file__).parent.parent.parent / "src" / "game" / "sudoku" / "transform.js"
+
+
+def is_valid_solution(solution):
+    rows = [solution[r * 9:r * 9 + 9] for r in range(9)]
+    cols = [solution[c::9] for c in range(9)]
+    boxes = [''.join(solution[(br + r) * 9 + bc:(br + r) * 9 + bc + 3] for r in range(3))
+             for br in (0, 3, 6) for bc in (0, 3, 6)]
+    return all(sorted(unit) == list("123456789") for unit in rows + cols + boxes)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_transform_makes_a_valid_board(seed):
+    puzzle, solution = transform_board(BASE_PUZZLE, BASE_SOLUTION, seed)
+    assert is_valid_solution(solution)
+    assert puzzle.count('0') == BASE_PUZZLE.count('0')
+    assert all(p in ('0', s) for p, s in zip(puzzle, solution))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_canonical_form_is_invariant_under_transforms(seed):
+    puzzle, _ = transform_board(BASE_PUZZLE, BASE_SOLUTION, seed)
+    assert canonical_form(puzzle) == canonical_form(BASE_PUZZLE)
+    assert canonical_key(transpose(puzzle)) == canonical_key(BASE_PUZZLE)
+
+
+def test_canonical_form_tells_different_puzzles_apart():
+    # One more given is a different puzzle under every symmetry
+    first_empty = BASE_PUZZLE.index('0')
+    harder = BASE_PUZZLE[:first_empty] + BASE_SOLUTION[first_empty] + BASE_PUZZLE[first_empty + 1:]
+    assert canonical_form(harder) != canonical_form(BASE_PUZZLE)
+
+
+def test_expand_batch_matches_transform_board():
+    np = pytest.importorskip("numpy")
+    from sudoku_symmetry import expand_batch
+
+    digits = [np.frombuffer(grid.encode('ascii'), dtype=np.uint8) - ord('0') for grid in (BASE_PUZZLE, BASE_SOLUTION)]
+    puzzles, solutions = expand_batch(np.tile(digits[0], (len(SEEDS), 1)),
+                                      np.tile(digits[1], (len(SEEDS), 1)), SEEDS)
+    for seed, puzzle, solution in zip(SEEDS, puzzles, solutions):
+        expected = transform_board(BASE_PUZZLE, BASE_SOLUTION, seed)
+        assert (''.join(map(str, puzzle)), ''.join(map(str, solution))) == expected
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is not installed")
+def test_app_transform_matches():
+    # transform.js is an ES module without imports, loaded from a data: URL
+    source = base64.b64encode(TRANSFORM_JS.read_bytes()).decode('ascii')
+    script = (
+        f"const {{ transformBoard }} = await import('data:text/javascript;base64,{source}');\n"
+        "const grid = (digits) => Array.from({ length: 9 }, (_, r) => [...digits.slice(r * 9, r * 9 + 9)].map(Number));\n"
+        "const flat = (grid) => grid.flat().join('');\n"
+        f"const seeds = {json.dumps(SEEDS)};\n"
+        f"const board = {{ puzzle: grid('{BASE_PUZZLE}'), solution: grid('{BASE_SOLUTION}') }};\n"
+        "console.log(JSON.stringify(seeds.map((seed) => {\n"
+        "  const variant = transformBoard(board, seed);\n"
+        "  return [flat(variant.puzzle), flat(variant.solution)];\n"
+        "})));\n"
+    )
+    result = subprocess.run(["node", "--input-type=module", "-e", script],
+                            capture_output=True, text=True, check=True)
+    expected = [list(transform_board(BASE_PUZZLE, BASE_SOLUTION, seed)) for seed in SEEDS]
+    assert json.loads(result.stdout) == expected
@@ -1,25 +1,93 @@
-import boardsEasy from '@data/boards/boardsEasy.json';
-import boardsMedium from '@data/boards/boardsMedium.json';
-import boardsHard from '@data/boards/boardsHard.json';
-import boardsAdvanced from '@data/boards/boardsAdvanced.json';
-
-const boards = [
-  ...boardsEasy,
-  ...boardsMedium,
-  ...boardsHard,
-  ...boardsAdvanced,
-];
-
-export function getRandomBoard(difficulty = 'easy') {
-  const filteredBoards = boards.filter(b => b.difficulty === difficulty);
-  if (filteredBoards.length === 0) {
-    return boards[0];
+import { manifest, packLoaders } from '@data/boards/packs';
+
+// Boards come in level packs (scripts/build_level_packs.py), which replaced
+// the per-difficulty compact bundles: one pack per range of levels, each
+// holding a compact bundle per difficulty with every grid stored as an
+// 81-character digit string. Only the pack for the player's level is parsed,
+// and the next one is prefetched in the background, so startup cost does not
+// grow with the corpus.
+// hints is the encoded solving trace, see src/game/sudoku/hintTrace.js.
+const loadedPacks = new Map();
+
+const toGrid = digits =>
+  Array.from({ length: 9 }, (_, row) =>
+    Array.from(digits.slice(row * 9, row * 9 + 9), Number)
+  );
+
+function decodeBoard(bundle, index) {
+  return {
+    Id: bundle.ids[index],
+    puzzle: toGrid(bundle.puzzles[index]),
+    solution: toGrid(bundle.solutions[index]),
+    difficulty: bundle.difficulty,
+    hints: bundle.hints?.[index],
+  };
+}
+
+function packIndexForLevel(level) {
+  const index = manifest.packs.findIndex(pack => level <= pack.lastLevel);
+  return index === -1 ? manifest.packs.length - 1 : index;
+}
+
+function loadPack(index) {
+  if (!loadedPacks.has(index)) {
+    loadedPacks.set(index, packLoaders[manifest.packs[index].file]());
   }
-  const randomIndex = Math.floor(Math.random() * filteredBoards.length);
-  return filteredBoards[randomIndex];
+  return loadedPacks.get(index);
 }
 
-export function getAllBoards() {
-  return boards;
+function prefetchPack(index) {
+  if (index < manifest.packs.length && !loadedPacks.has(index)) {
+    setTimeout(() => loadPack(index), 0);
+  }
+}
+
+function packForLevel(level) {
+  const index = packIndexForLevel(level);
+  const pack = loadPack(index);
+  prefetchPack(index + 1);
+  return pack;
 }
 
+export function getRandomBoard(difficulty = 'easy', level = 1) {
+  const pack = packForLevel(level);
+  const bundle = pack.bundles[difficulty] ?? Object.values(pack.bundles)[0];
+  const randomIndex = Math.floor(Math.random() * bundle.ids.length);
+  return decodeBoard(bundle, randomIndex);
+}
+
+// Board numbers index the distinct boards (manifest.boardIds), not pack
+// slots: small corpora reuse boards across packs.
+export function getBoardCount() {
+  return manifest.boardIds.length;
+}
+
+// Loads only the pack holding the board, on a later tick rather than
+// synchronously inside the caller.
+export async function getBoardByNumber(boardNumber) {
+  const index = boardNumber - 1;
+  if (!(index >= 0 && index < manifest.boardIds.length)) return undefined;
+  const packIndex = manifest.boardPacks[index];
+  if (!loadedPacks.has(packIndex)) {
+    await new Promise(resolve => setTimeout(resolve, 0));
+  }
+  const id = manifest.boardIds[index];
+  for (const bundle of Object.values(loadPack(packIndex).bundles)) {
+    const position = bundle.ids.indexOf(id);
+    if (position !== -1) return decodeBoard(bundle, position);
+  }
+  return undefined;
+}
+
+// Parses every pack; meant for tooling, not the game loop.
+export function getAllBoards() {
+  const boards = new Map();
+  manifest.packs.forEach((_, packIndex) => {
+    for (const bundle of Object.values(loadPack(packIndex).bundles)) {
+      bundle.ids.forEach((id, index) => {
+        if (!boards.has(id)) boards.set(id, decodeBoard(bundle, index));
+      });
+    }
+  });
+  return [...boards.values()].sort((a, b) => a.Id - b.Id);
+}
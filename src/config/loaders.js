@@ -1,17 +1,7 @@
 import levelsData from '@data/levels.json';
 import abilitiesData from '@data/abilities.json';
 import idlersData from '@data/idlers.json';
-import boardsEasy from '@data/boards/boardsEasy.json';
-import boardsMedium from '@data/boards/boardsMedium.json';
-import boardsHard from '@data/boards/boardsHard.json';
-import boardsAdvanced from '@data/boards/boardsAdvanced.json';
-
-const allBoards = [
-  ...boardsEasy,
-  ...boardsMedium,
-  ...boardsHard,
-  ...boardsAdvanced,
-];
+import { getBoardByNumber, getBoardCount } from '@/config/loadBoards';
 
 export function loadLevelRequirements() {
   return levelsData.levelRequirements;
@@ -26,7 +16,7 @@ export function loadIdlers() {
 }
 
 export async function loadSudokuBoard(boardNumber) {
-  const board = allBoards[boardNumber - 1];
+  const board = await getBoardByNumber(boardNumber);
   if (!board) {
     throw new Error(`Invalid board number: ${boardNumber}`);
   }
@@ -34,6 +24,6 @@ export async function loadSudokuBoard(boardNumber) {
 }
 
 export function getRandomBoardNumber() {
-  return Math.floor(Math.random() * allBoards.length) + 1;
+  return Math.floor(Math.random() * getBoardCount()) + 1;
 }
 
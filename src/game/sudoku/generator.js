@@ -1,7 +1,7 @@
 import { getRandomBoard } from '@/config/loadBoards';
 
-export function loadRandomBoard(difficulty = 'easy') {
-  return getRandomBoard(difficulty);
+export function loadRandomBoard(difficulty = 'easy', level = 1) {
+  return getRandomBoard(difficulty, level);
 }
 
 export function initializeBoardState(board) {
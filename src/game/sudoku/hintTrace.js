@@ -0,0 +1,37 @@
+// Decodes the hint traces baked into the boards by scripts/hint_traces.py.
+// Each step is 2 bytes: technique (5 bits), cell 0-80 (7 bits), digit (4 bits).
+
+export const TECHNIQUES = [
+  'naked single',
+  'hidden single',
+  'locked candidates',
+  'naked pair',
+  'hidden pair',
+  'naked triple',
+  'hidden triple',
+  'x-wing',
+  'swordfish',
+  'guess',
+];
+
+export function decodeHintTrace(hints) {
+  if (!hints) return [];
+  const bytes = atob(hints);
+  const steps = [];
+  for (let i = 0; i + 1 < bytes.length; i += 2) {
+    const value = (bytes.charCodeAt(i) << 8) | bytes.charCodeAt(i + 1);
+    const cell = (value >> 4) & 0x7f;
+    steps.push({
+      row: Math.floor(cell / 9),
+      col: cell % 9,
+      value: value & 0xf,
+      technique: TECHNIQUES[value >> 11],
+    });
+  }
+  return steps;
+}
+
+// The first step of the trace whose cell the player has not filled yet.
+export function nextHint(board, playerBoard) {
+  return decodeHintTrace(board.hints).find(step => playerBoard[step.row][step.col] === 0) ?? null;
+}
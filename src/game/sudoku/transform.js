@@ -0,0 +1,66 @@
+// Rebuilds a board variant from a base board and a seed, exactly as
+// scripts/sudoku_symmetry.py does (see the spec in its module docstring):
+// mulberry32 picks a digit relabelling, band/row and stack/column orders and
+// a transposition, so a seed turns one board into another valid board.
+
+function mulberry32(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return (t ^ (t >>> 14)) >>> 0;
+  };
+}
+
+function randint(next, n) {
+  return Math.floor((next() * n) / 4294967296);
+}
+
+function shuffle(next, items) {
+  const result = [...items];
+  for (let i = result.length - 1; i > 0; i--) {
+    const j = randint(next, i + 1);
+    [result[i], result[j]] = [result[j], result[i]];
+  }
+  return result;
+}
+
+function lineOrder(next) {
+  const blocks = shuffle(next, [0, 1, 2]);
+  const within = [0, 1, 2].map(() => shuffle(next, [0, 1, 2]));
+  return blocks.flatMap((block, i) => within[i].map(k => block * 3 + k));
+}
+
+export function randomTransform(seed) {
+  const next = mulberry32(seed);
+  const digits = [0, ...shuffle(next, [1, 2, 3, 4, 5, 6, 7, 8, 9])];
+  const rowOrder = lineOrder(next);
+  const colOrder = lineOrder(next);
+  return { digits, rowOrder, colOrder, transpose: randint(next, 2) === 1 };
+}
+
+// Apply a transform to a 9x9 grid.
+export function applyTransform(grid, { digits, rowOrder, colOrder, transpose }) {
+  return Array.from({ length: 9 }, (_, row) =>
+    Array.from({ length: 9 }, (_, col) => {
+      const value = transpose
+        ? grid[rowOrder[col]][colOrder[row]]
+        : grid[rowOrder[row]][colOrder[col]];
+      return digits[value];
+    })
+  );
+}
+
+export function transformBoard(board, seed) {
+  const transform = randomTransform(seed);
+  return {
+    ...board,
+    puzzle: applyTransform(board.puzzle, transform),
+    solution: applyTransform(board.solution, transform),
+    seed,
+    // The hint trace refers to the base board's cells
+    hints: undefined,
+  };
+}
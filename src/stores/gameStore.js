@@ -1,5 +1,6 @@
 import { create } from 'zustand';
 import { getRandomBoard } from '@/config/loadBoards';
+import { usePlayerStore } from './playerStore';
 
 export const useGameStore = create((set, get) => ({
   currentBoard: null,
@@ -13,7 +14,8 @@ export const useGameStore = create((set, get) => ({
   isComplete: false,
 
   loadNewBoard: (difficulty = 'easy') => {
-    const board = getRandomBoard(difficulty);
+    const { highestLevel, level } = usePlayerStore.getState();
+    const board = getRandomBoard(difficulty, highestLevel || level);
     const playerBoard = board.puzzle.map(row => [...row]);
     
     set({